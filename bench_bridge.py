@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Bench Bridge - Load test cho YouTube HTTP bridge
+================================================
+Giả lập nhiều tab Chrome cùng POST /youtube/state (keep-alive), kèm vài
+kết nối "treo" (mở socket, gửi nửa request rồi im lặng) để kiểm tra
+server không bị chặn. In ra requests/s và độ trễ p50/p99.
+
+Cách dùng:
+    python3 bench_bridge.py                      # server tạm trên port ngẫu nhiên
+    python3 bench_bridge.py --tabs 50 --requests 200 --stalled 8
+    python3 bench_bridge.py --port 9876          # đo server đang chạy
+    python3 bench_bridge.py --batch 20           # POST /events/batch, 20 event/request
+    python3 bench_bridge.py --transport both     # so sánh TCP với Unix socket
+    python3 bench_bridge.py --server both        # so sánh server đa luồng với asyncio (runtime.py)
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import threading
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import youtube_bridge
+from bridge_client import UnixHTTPConnection
+from runtime import AsyncRuntime
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def video_event(tab: int, i: int) -> dict:
+    return {
+        "title": f"Video {tab}", "channel": "Bench", "duration": 600,
+        "currentTime": i, "isPlaying": True, "volume": 1.0, "isMuted": False,
+        "url": f"https://www.youtube.com/watch?v=bench{tab}", "tabId": tab,
+    }
+
+
+def open_connection(port: int, socket_path: Optional[str] = None) -> http.client.HTTPConnection:
+    if socket_path:
+        return UnixHTTPConnection(socket_path, timeout=10)
+    return http.client.HTTPConnection("localhost", port, timeout=10)
+
+
+def tab_client(port: int, tab: int, requests: int, latencies: List[float], errors: List[str],
+               batch: int = 1, socket_path: Optional[str] = None):
+    """Một tab: một kết nối keep-alive, gửi liên tục trạng thái video.
+
+    batch > 1: mỗi request là POST /events/batch chứa batch event.
+    socket_path: đi qua Unix socket thay vì TCP.
+    """
+    conn = open_connection(port, socket_path)
+    path = "/events/batch" if batch > 1 else "/youtube/state"
+    local = []
+    for i in range(requests):
+        if batch > 1:
+            body = json.dumps({"events": [dict(video_event(tab, i * batch + j), type="youtube_state")
+                                          for j in range(batch)]})
+        else:
+            body = json.dumps(video_event(tab, i))
+        started = time.perf_counter()
+        try:
+            conn.request("POST", path, body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(f"HTTP {response.status}")
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = open_connection(port, socket_path)
+            continue
+        local.append(time.perf_counter() - started)
+    conn.close()
+    latencies.extend(local)
+
+
+def stalled_client(port: int, hold: float, sockets: List[socket.socket],
+                   socket_path: Optional[str] = None):
+    """Kết nối nửa chừng: gửi một phần header rồi không gửi tiếp"""
+    try:
+        if socket_path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(hold + 5)
+            sock.connect(socket_path)
+        else:
+            sock = socket.create_connection(("localhost", port), timeout=hold + 5)
+        sock.sendall(b"POST /youtube/state HTTP/1.1\r\nHost: localhost\r\n")
+        sockets.append(sock)
+    except OSError:
+        pass
+
+
+def run_bench(port: int, tabs: int, requests: int, stalled: int, batch: int = 1,
+              socket_path: Optional[str] = None) -> dict:
+    held: List[socket.socket] = []
+    for _ in range(stalled):
+        stalled_client(port, 30, held, socket_path)
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    threads = [threading.Thread(target=tab_client, args=(port, tab, requests, latencies, errors, batch, socket_path))
+               for tab in range(tabs)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    for sock in held:
+        sock.close()
+
+    return {
+        "transport": "unix" if socket_path else "tcp",
+        "tabs": tabs,
+        "stalled": stalled,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "batch": batch,
+        "events_per_s": len(latencies) * batch / elapsed if elapsed else 0.0,
+        "us_per_event": elapsed * 1e6 / (len(latencies) * batch) if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+
+
+class RuntimeServer:
+    """AsyncRuntime (không engine) với cùng giao diện server_address / path / rejected"""
+
+    def __init__(self, transport: str, tmpdir: str):
+        unix = transport == "unix"
+        self.runtime = AsyncRuntime(None, port=None if unix else 0, unix_socket=unix,
+                                    socket_path=Path(tmpdir) / youtube_bridge.SOCKET_NAME)
+        self.runtime.start()
+        self.server_address = ("localhost", self.runtime.port)
+        self.path = str(self.runtime.socket_path) if unix else None
+
+    @property
+    def rejected(self) -> int:
+        return self.runtime.rejected
+
+    def shutdown(self):
+        self.runtime.stop()
+
+    def server_close(self):
+        pass
+
+
+def start_server(transport: str, tmpdir: str, kind: str = "threaded"):
+    """Server tạm: TCP trên port ngẫu nhiên hoặc Unix socket trong thư mục tạm"""
+    if kind == "runtime":
+        return RuntimeServer(transport, tmpdir)
+    if transport == "unix":
+        server = youtube_bridge.create_unix_server(Path(tmpdir) / youtube_bridge.SOCKET_NAME)
+    else:
+        server = youtube_bridge.create_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def print_result(result: dict, requests: int):
+    print(f"[{result.get('server', 'external')}/{result['transport']}] {result['tabs']} tab × {requests} request, "
+          f"{result['stalled']} kết nối treo")
+    print(f"  {result['requests']} OK, {result['errors']} lỗi trong {result['elapsed_s']:.2f}s")
+    print(f"  {result['rps']:.0f} req/s  p50 {result['p50_ms']:.2f} ms  "
+          f"p99 {result['p99_ms']:.2f} ms  max {result['max_ms']:.2f} ms")
+    print(f"  {result['events_per_s']:.0f} event/s ({result['batch']} event/request), "
+          f"{result['us_per_event']:.1f} µs/event")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /youtube/state")
+    parser.add_argument("--port", type=int, help="Đo server TCP có sẵn (mặc định: tự chạy server tạm)")
+    parser.add_argument("--socket", help="Đo server Unix socket có sẵn")
+    parser.add_argument("--transport", choices=["tcp", "unix", "both"], default="tcp",
+                        help="Đường truyền khi tự chạy server tạm")
+    parser.add_argument("--server", choices=["threaded", "runtime", "both"], default="threaded",
+                        help="Server tạm: đa luồng (youtube_bridge) hay asyncio (runtime.py)")
+    parser.add_argument("--tabs", type=int, default=32, help="Số tab đồng thời")
+    parser.add_argument("--requests", type=int, default=200, help="Số request mỗi tab")
+    parser.add_argument("--stalled", type=int, default=4, help="Số kết nối treo")
+    parser.add_argument("--batch", type=int, default=1,
+                        help="Số event mỗi request (>1: dùng POST /events/batch)")
+    parser.add_argument("--json", action="store_true", help="In kết quả JSON")
+    args = parser.parse_args()
+
+    results = []
+    if args.port is not None or args.socket:
+        results.append(run_bench(args.port or 0, args.tabs, args.requests, args.stalled,
+                                 args.batch, args.socket))
+    else:
+        transports = ["tcp", "unix"] if args.transport == "both" else [args.transport]
+        kinds = ["threaded", "runtime"] if args.server == "both" else [args.server]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for kind in kinds:
+                for transport in transports:
+                    server = start_server(transport, tmpdir, kind)
+                    port = server.server_address[1] if transport == "tcp" else 0
+                    socket_path = server.path if transport == "unix" else None
+                    result = run_bench(port, args.tabs, args.requests, args.stalled,
+                                       args.batch, socket_path)
+                    result["server"] = kind
+                    result["rejected_connections"] = server.rejected
+                    server.shutdown()
+                    server.server_close()
+                    results.append(result)
+
+    if args.json:
+        print(json.dumps(results if len(results) > 1 else results[0]))
+    else:
+        for result in results:
+            print_result(result, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Bench Config - Chi phí đọc / ghi settings.json
+==============================================
+Đo trên thư mục tạm (không đụng config thật):
+- load(): đọc + parse JSON + kiểm tra schema
+- save_now(): ghi nguyên tử (file tạm + fsync + rename + fsync thư mục)
+- ghi thẳng kiểu cũ (open 'w' + json.dump, không fsync) để so sánh
+- một loạt save() liên tiếp được debounce gộp thành bao nhiêu lần ghi
+
+Cách dùng:
+    python3 bench_config.py
+    python3 bench_config.py --rounds 500 --burst 20
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from config_store import ConfigStore, settings_to_dict
+from reminder_engine import ReminderInterval, WorkConfig
+
+
+def measure(fn, rounds: int) -> float:
+    """µs trung bình mỗi lần"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lưu / đọc config")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=10, help="Số lần save() liên tiếp")
+    parser.add_argument("--debounce", type=float, default=0.2)
+    args = parser.parse_args()
+
+    config = WorkConfig(is_configured=True)
+    intervals = ReminderInterval()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "settings.json"
+        store = ConfigStore(path, debounce=args.debounce)
+        store.save_now(config, intervals)
+
+        load_us = measure(store.load, args.rounds)
+
+        # Đổi nội dung mỗi lần để save_now() không bỏ qua vì trùng
+        counter = iter(range(10 ** 9))
+        save_us = measure(lambda: store.save_now(replace(config, dialog_timeout=next(counter) % 3600),
+                                                 intervals), args.rounds)
+
+        def legacy_save():
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(settings_to_dict(config, intervals), f, indent=2, ensure_ascii=False)
+        legacy_us = measure(legacy_save, args.rounds)
+
+        store.save_now(config, intervals)
+        before = store.writes
+        for i in range(args.burst):
+            store.save(replace(config, pomodoro_work=20 + i), intervals)
+        time.sleep(args.debounce * 2)
+        coalesced = store.writes - before
+        loaded, _ = store.load()
+
+    print(f"load()            : {load_us:8.1f} µs")
+    print(f"save_now() (fsync): {save_us:8.1f} µs")
+    print(f"ghi kiểu cũ       : {legacy_us:8.1f} µs (không fsync, không nguyên tử)")
+    print(f"{args.burst} lần save() liên tiếp -> {coalesced} lần ghi, "
+          f"pomodoro_work cuối = {loaded.pomodoro_work}")
+
+
+if __name__ == "__main__":
+    main()
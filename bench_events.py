@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Bench Events - Tốc độ ghi / đọc lịch sử nhắc nhở (event_store.py)
+=================================================================
+Đo trên DB tạm:
+- record(): chi phí trên đường nóng (chỉ xếp hàng)
+- flush(): ghi theo lô vào SQLite WAL, sự kiện/giây
+- so sánh: mỗi sự kiện một INSERT + commit riêng (kiểu ghi thẳng)
+- query(): một ngày / một loại nhắc nhở trong DB đã có nhiều ngày dữ liệu
+- daily() / total(): đọc bảng tổng hợp, so với đếm bằng cách quét sự kiện
+
+Cách dùng:
+    python3 bench_events.py
+    python3 bench_events.py --events 200000 --days 365
+"""
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from event_store import EVENT_KINDS, EventStore
+from reminder_engine import INTERVAL_KEYS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event store")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=180, help="Trải sự kiện trên bao nhiêu ngày")
+    parser.add_argument("--single", type=int, default=2000, help="Số INSERT lẻ để so sánh")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    end = datetime(2026, 1, 1)
+    start = end - timedelta(days=args.days)
+    span = (end - start).total_seconds()
+    samples = [(start + timedelta(seconds=rng.random() * span), rng.choice(EVENT_KINDS),
+                rng.choice(INTERVAL_KEYS)) for _ in range(args.events)]
+    samples.sort()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = EventStore(Path(tmpdir) / "history.db", batch_size=args.events + 1)
+
+        started = time.perf_counter()
+        for when, kind, key in samples:
+            store.record(kind, key, None, when)
+        record_us = (time.perf_counter() - started) / args.events * 1e6
+
+        started = time.perf_counter()
+        store.flush()
+        flush_s = time.perf_counter() - started
+
+        # Kiểu ghi thẳng: một transaction cho mỗi sự kiện
+        conn = sqlite3.connect(str(Path(tmpdir) / "single.db"), isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, ts REAL, kind TEXT, reminder TEXT, detail TEXT)")
+        started = time.perf_counter()
+        for when, kind, key in samples[:args.single]:
+            conn.execute("INSERT INTO events (ts, kind, reminder, detail) VALUES (?, ?, ?, NULL)",
+                         (when.timestamp(), kind, key))
+        single_rate = args.single / (time.perf_counter() - started)
+        conn.close()
+
+        day = start + timedelta(days=args.days // 2)
+        started = time.perf_counter()
+        rounds = 50
+        for _ in range(rounds):
+            one_day = store.query(since=day, until=day + timedelta(days=1))
+        day_ms = (time.perf_counter() - started) / rounds * 1000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            water = store.query(since=day, until=day + timedelta(days=7), reminder="water")
+        week_ms = (time.perf_counter() - started) / rounds * 1000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            store.daily(day.date())
+        rollup_us = (time.perf_counter() - started) / rounds * 1e6
+        month = day.date() - timedelta(days=30)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            month_acks = store.total(month, day.date(), reminder="water", kind="ack")
+        month_us = (time.perf_counter() - started) / rounds * 1e6
+        started = time.perf_counter()
+        for _ in range(rounds):
+            scanned = len(store.query(since=day - timedelta(days=30), until=day, kind="ack", reminder="water"))
+        scan_ms = (time.perf_counter() - started) / rounds * 1000
+        assert scanned == month_acks
+        store.close()
+
+    print(f"record()              : {record_us:8.2f} µs/sự kiện")
+    print(f"flush() theo lô       : {args.events / flush_s:10,.0f} sự kiện/s ({flush_s * 1000:.0f} ms cho {args.events:,})")
+    print(f"INSERT lẻ (autocommit): {single_rate:10,.0f} sự kiện/s")
+    print(f"query 1 ngày          : {day_ms:8.2f} ms ({len(one_day)} sự kiện)")
+    print(f"query 1 tuần, water   : {week_ms:8.2f} ms ({len(water)} sự kiện)")
+    print(f"daily() (tổng hợp)    : {rollup_us:8.1f} µs")
+    print(f"total() 30 ngày, water: {month_us:8.1f} µs = {month_acks} ack "
+          f"(quét sự kiện: {scan_ms:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Bridge Client - Client nhỏ cho bridge của menubar app
+=====================================================
+Nói cùng giao thức HTTP với youtube_bridge, ưu tiên Unix domain socket
+(bridge.sock trong thư mục config) và quay về TCP localhost:9876 nếu
+socket không có. Giữ một kết nối keep-alive, tự kết nối lại khi bị đóng.
+
+Ví dụ:
+    from bridge_client import BridgeClient
+    client = BridgeClient()
+    version, state = client.get_state()
+    version, state = client.get_state(since=version, wait=30)  # long-poll
+"""
+
+import http.client
+import json
+import socket
+import threading
+from typing import Optional, Tuple
+
+from youtube_bridge import YOUTUBE_HTTP_PORT, default_socket_path
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection đi qua Unix domain socket"""
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class BridgeClient:
+    """Client keep-alive cho bridge (Unix socket hoặc TCP)"""
+
+    def __init__(self, socket_path: Optional[str] = None, port: Optional[int] = None,
+                 timeout: float = 10.0):
+        self.timeout = timeout
+        self.port = port or YOUTUBE_HTTP_PORT
+        if socket_path is None and port is None:
+            path = default_socket_path()
+            socket_path = str(path) if path.exists() else None
+        self.socket_path = socket_path
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def transport(self) -> str:
+        return "unix" if self.socket_path else "tcp"
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        if self.socket_path:
+            return UnixHTTPConnection(self.socket_path, timeout=timeout)
+        return http.client.HTTPConnection("localhost", self.port, timeout=timeout)
+
+    def request(self, method: str, path: str, data=None, headers: Optional[dict] = None,
+                timeout: Optional[float] = None) -> Tuple[int, dict, bytes]:
+        """Gửi một request, trả (status, headers, body). Thử lại một lần nếu kết nối cũ đã đóng"""
+        body = json.dumps(data).encode() if data is not None else None
+        headers = dict(headers or {})
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = self._connect(self.timeout)
+                conn = self._conn
+                conn.timeout = timeout or self.timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(conn.timeout)
+                try:
+                    conn.request(method, path, body, headers)
+                    response = conn.getresponse()
+                    payload = response.read()
+                except (ConnectionError, http.client.BadStatusLine,
+                        http.client.CannotSendRequest, http.client.ResponseNotReady):
+                    # Server đóng kết nối keep-alive: mở lại rồi thử lần nữa
+                    self.close_locked()
+                    if attempt:
+                        raise
+                    continue
+                except OSError:
+                    self.close_locked()
+                    raise
+                if response.will_close:
+                    self.close_locked()
+                return response.status, dict(response.getheaders()), payload
+        raise ConnectionError("bridge unreachable")
+
+    def close_locked(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def close(self):
+        with self._lock:
+            self.close_locked()
+
+    # ==================== API ====================
+
+    def health(self) -> bool:
+        try:
+            status, _, _ = self.request("GET", "/health")
+        except OSError:
+            return False
+        return status == 200
+
+    def get_state(self, since: Optional[int] = None, wait: float = 0.0) -> Tuple[int, Optional[dict]]:
+        """Trạng thái YouTube hiện tại: (version, state). state = None nếu không đổi so với since"""
+        path = "/youtube/state"
+        if since is not None:
+            path += f"?since={since}" + (f"&wait={wait:g}" if wait else "")
+        status, headers, body = self.request("GET", path, timeout=self.timeout + wait)
+        version = int(headers.get("X-State-Version", 0))
+        if status == 304:
+            return version, None
+        if status != 200:
+            raise ConnectionError(f"HTTP {status}")
+        return version, json.loads(body)
+
+    def get_tabs(self) -> list:
+        status, _, body = self.request("GET", "/youtube/tabs")
+        if status != 200:
+            raise ConnectionError(f"HTTP {status}")
+        return json.loads(body)["tabs"]
+
+    def post_state(self, data: dict) -> bool:
+        status, _, _ = self.request("POST", "/youtube/state", data)
+        return status == 200
+
+    def post_batch(self, events: list) -> dict:
+        status, _, body = self.request("POST", "/events/batch", {"events": events})
+        result = json.loads(body) if body else {}
+        if status != 200:
+            raise ValueError(result.get("error", f"HTTP {status}"))
+        return result
+
+
+def main():
+    """In trạng thái hiện tại của bridge"""
+    client = BridgeClient()
+    if not client.health():
+        print(f"Bridge không chạy ({client.transport})")
+        return
+    version, state = client.get_state()
+    print(f"[{client.transport}] v{version}: {json.dumps(state, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
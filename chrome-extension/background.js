@@ -650,7 +650,7 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
         }
 
         // Notify menubar app (fire and forget)
-        notifyMenubarApp(message.videoInfo);
+        notifyMenubarApp(message.videoInfo, tabId);
 
         sendResponse({ success: true });
         return true;
@@ -672,6 +672,7 @@ async function handleMessage(message) {
             return await handleGetStatus();
 
         case 'resetTimer':
+            queueMenubarEvent({ type: 'timer_reset', key: message.timerType });
             return await handleResetTimer(message.timerType);
 
         case 'togglePause':
@@ -704,12 +705,14 @@ async function handleMessage(message) {
             state.pomodoroState = 'work';
             state.pomodoroEndTime = Date.now() + settings.pomodoroWork * 60 * 1000;
             await chrome.storage.local.set({ state });
+            queueMenubarEvent({ type: 'pomodoro', action: 'start' });
             return { success: true, pomodoroState: state.pomodoroState, pomodoroEndTime: state.pomodoroEndTime };
 
         case 'stopPomodoro':
             state.pomodoroState = null;
             state.pomodoroEndTime = null;
             await chrome.storage.local.set({ state });
+            queueMenubarEvent({ type: 'pomodoro', action: 'stop' });
             return { success: true };
 
         case 'updateSettings':
@@ -1033,6 +1036,7 @@ async function handleCloseYoutubeTab(tabId) {
 
         // Clean up cached state
         delete youtubeState.tabs[tabId];
+        notifyMenubarApp({ closed: true }, tabId);
 
         // If closed tab was selected, reset selection
         if (youtubeState.selectedTabId === tabId) {
@@ -1046,20 +1050,67 @@ async function handleCloseYoutubeTab(tabId) {
 }
 
 // Notify menubar app about YouTube state (fire and forget)
-async function notifyMenubarApp(videoInfo) {
+// tabId lets the menubar keep one entry per tab instead of the last poster winning.
+// Events are queued and flushed together to POST /events/batch every few seconds.
+const MENUBAR_FLUSH_MS = 3000;
+let menubarQueue = [];
+let menubarFlushTimer = null;
+let menubarBatchSupported = true;
+
+function notifyMenubarApp(videoInfo, tabId) {
     if (!videoInfo) return;
+    queueMenubarEvent({ type: 'youtube_state', ...videoInfo, tabId });
+}
+
+function queueMenubarEvent(event) {
+    // Only the newest state per tab matters
+    if (event.type === 'youtube_state') {
+        menubarQueue = menubarQueue.filter(e => e.type !== 'youtube_state' || e.tabId !== event.tabId);
+    }
+    menubarQueue.push(event);
+    if (!menubarFlushTimer) {
+        menubarFlushTimer = setTimeout(flushMenubarEvents, MENUBAR_FLUSH_MS);
+    }
+}
+
+async function flushMenubarEvents() {
+    menubarFlushTimer = null;
+    const events = menubarQueue;
+    menubarQueue = [];
+    if (events.length === 0) return;
 
     try {
-        await fetch(`http://localhost:${MENUBAR_HTTP_PORT}/youtube/state`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(videoInfo)
-        });
+        if (menubarBatchSupported) {
+            const response = await fetch(`http://localhost:${MENUBAR_HTTP_PORT}/events/batch`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ events })
+            });
+            if (response.status !== 404) return;
+            // Older menubar app without the batch endpoint
+            menubarBatchSupported = false;
+        }
+        for (const { type, ...videoInfo } of events) {
+            if (type !== 'youtube_state') continue;
+            await fetch(`http://localhost:${MENUBAR_HTTP_PORT}/youtube/state`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(videoInfo)
+            });
+        }
     } catch (e) {
         // Menubar app not running, ignore silently
     }
 }
 
+// Tell the menubar app when a YouTube tab goes away so it can switch tabs immediately
+chrome.tabs.onRemoved.addListener((tabId) => {
+    if (youtubeState.tabs[tabId]) {
+        delete youtubeState.tabs[tabId];
+        notifyMenubarApp({ closed: true }, tabId);
+    }
+});
+
 // Initialize on startup
 chrome.runtime.onStartup.addListener(() => {
     setupAlarms();
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Clock - Đồng hồ có thể thay thế
+===============================
+SystemClock dùng giờ thật; VirtualClock chạy giờ ảo để mô phỏng cả ngày
+làm việc trong vài mili giây (xem simulate.py). Mọi chỗ cần "bây giờ" hoặc
+cần ngủ đều đi qua clock thay vì gọi datetime.now() / time.sleep().
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
+
+class SystemClock:
+    """Đồng hồ thật"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def wait(self, cond: threading.Condition, timeout: Optional[float]):
+        """Chờ trên condition (đã giữ lock) tối đa timeout giây"""
+        cond.wait(timeout)
+
+
+class VirtualClock:
+    """Đồng hồ ảo: ngủ = tua thời gian, không chờ thật"""
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, when: datetime):
+        self._now = when
+
+    def advance(self, delta: Union[float, timedelta]):
+        if not isinstance(delta, timedelta):
+            delta = timedelta(seconds=delta)
+        if delta > timedelta(0):
+            self._now += delta
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def wait(self, cond: threading.Condition, timeout: Optional[float]):
+        if timeout is None:
+            raise RuntimeError("VirtualClock: chờ vô hạn sẽ không bao giờ kết thúc")
+        self.advance(timeout)
+
+
+SYSTEM_CLOCK = SystemClock()
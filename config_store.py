@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Config Store - Lưu / đọc settings.json an toàn khi crash
+========================================================
+- Ghi nguyên tử: ghi file tạm cùng thư mục, fsync, os.replace() đè lên
+  settings.json rồi fsync thư mục. Crash lúc nào thì file trên đĩa cũng là
+  bản cũ hoặc bản mới trọn vẹn, không bao giờ bị cắt cụt.
+- Gộp ghi: nhiều lần sửa liên tiếp (vd. hai dialog của "Giờ làm") chỉ ghi
+  một lần sau DEBOUNCE_SECONDS; flush() ghi ngay phần còn chờ (lúc thoát).
+- Đọc có kiểm tra schema theo từng trường: giá trị sai kiểu / ngoài khoảng
+  thì trường đó về mặc định, các trường khác giữ nguyên. File hỏng hẳn thì
+  được đổi tên thành settings.json.corrupt và app vẫn coi như đã cấu hình
+  (không chạy lại wizard lần đầu).
+- reload(): đọc lại khi file bị sửa từ bên ngoài (config_watcher.py), bỏ
+  qua lần ghi của chính mình, trả về các trường đã đổi.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from dataclasses import MISSING, asdict, fields, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from reminder_engine import ReminderInterval, WorkConfig
+from timeline import WEEKEND_MODES
+
+DEBOUNCE_SECONDS = 0.5
+
+
+def default_config_dir() -> Path:
+    return Path.home() / "Library" / "Application Support" / "WorkHealthReminder"
+
+
+def get_config_path() -> Path:
+    """Lấy đường dẫn file config"""
+    config_dir = default_config_dir()
+    config_dir.mkdir(parents=True, exist_ok=True)
+    return config_dir / "settings.json"
+
+
+# ============================================
+# SCHEMA
+# ============================================
+
+def _hhmm(value) -> tuple:
+    if (isinstance(value, (list, tuple)) and len(value) == 2
+            and all(type(v) is int for v in value)
+            and 0 <= value[0] < 24 and 0 <= value[1] < 60):
+        return tuple(value)
+    raise ValueError(f"cần [giờ, phút], nhận {value!r}")
+
+
+def _minutes(low: int, high: int) -> Callable:
+    def check(value) -> int:
+        if type(value) is int and low <= value <= high:
+            return value
+        raise ValueError(f"cần số nguyên {low}..{high}, nhận {value!r}")
+    return check
+
+
+def _flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    raise ValueError(f"cần true/false, nhận {value!r}")
+
+
+def _weekend_mode(value) -> str:
+    if value in WEEKEND_MODES:
+        return value
+    raise ValueError(f"cần một trong {', '.join(WEEKEND_MODES)}, nhận {value!r}")
+
+
+# Trường không có ở đây được suy ra từ kiểu của giá trị mặc định
+WORK_CONFIG_CHECKS: Dict[str, Callable] = {
+    "weekend_mode": _weekend_mode,
+    "pomodoro_work": _minutes(1, 240),
+    "pomodoro_break": _minutes(1, 120),
+    "pomodoro_long_break": _minutes(1, 240),
+    "coalesce_window": _minutes(0, 60),
+    "notifications_per_hour": _minutes(0, 3600),
+    "dialog_timeout": _minutes(0, 3600),
+}
+
+
+def _check_for(name: str, default, overrides: Dict[str, Callable]) -> Callable:
+    if name in overrides:
+        return overrides[name]
+    if isinstance(default, tuple):
+        return _hhmm
+    if isinstance(default, bool):
+        return _flag
+    return _minutes(1, 24 * 60)
+
+
+def _build_schema(cls, overrides: Dict[str, Callable]) -> Tuple[Tuple[str, object, Callable], ...]:
+    schema = []
+    for f in fields(cls):
+        default = f.default if f.default is not MISSING else f.default_factory()
+        schema.append((f.name, default, _check_for(f.name, default, overrides)))
+    return tuple(schema)
+
+
+WORK_CONFIG_SCHEMA = _build_schema(WorkConfig, WORK_CONFIG_CHECKS)
+INTERVAL_SCHEMA = _build_schema(ReminderInterval, {})
+
+
+def _parse_section(cls, schema, section, name: str, errors: List[str]):
+    if not isinstance(section, dict):
+        if section is not None:
+            errors.append(f"{name}: cần object")
+        section = {}
+    values = {}
+    for key, default, check in schema:
+        if key not in section:
+            continue
+        try:
+            values[key] = check(section[key])
+        except ValueError as e:
+            errors.append(f"{name}.{key}: {e}")
+    return cls(**values)
+
+
+def settings_from_dict(data) -> Tuple[WorkConfig, ReminderInterval, List[str]]:
+    """dict từ JSON -> (config, intervals, lỗi). Trường sai thì dùng mặc định"""
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        errors.append("settings: cần object")
+        data = {}
+    config = _parse_section(WorkConfig, WORK_CONFIG_SCHEMA, data.get("work_config"), "work_config", errors)
+    intervals = _parse_section(ReminderInterval, INTERVAL_SCHEMA, data.get("intervals"), "intervals", errors)
+    return config, intervals, errors
+
+
+def settings_to_dict(config: WorkConfig, intervals: ReminderInterval) -> dict:
+    """(config, intervals) -> dict để ghi JSON (tuple thành list)"""
+    work_config = {k: list(v) if isinstance(v, tuple) else v for k, v in asdict(config).items()}
+    return {"work_config": work_config, "intervals": asdict(intervals)}
+
+
+def changed_fields(old, new) -> dict:
+    """Các trường khác nhau giữa hai dataclass cùng kiểu: {tên: giá trị mới}"""
+    return {f.name: getattr(new, f.name) for f in fields(new)
+            if getattr(old, f.name) != getattr(new, f.name)}
+
+
+def _validated(schema, changes: dict) -> dict:
+    """Kiểm tra giá trị nhập từ UI theo schema; ValueError gộp mọi trường sai"""
+    checks = {key: check for key, _, check in schema}
+    values, errors = {}, []
+    for key, value in changes.items():
+        try:
+            values[key] = checks[key](value)
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+    if errors:
+        raise ValueError("; ".join(errors))
+    return values
+
+
+def edit_config(config: WorkConfig, **changes) -> WorkConfig:
+    """Sửa từ menu: chỉ đổi các field được truyền (đã kiểm tra schema), giữ nguyên phần còn lại"""
+    return replace(config, is_configured=True, **_validated(WORK_CONFIG_SCHEMA, changes))
+
+
+def edit_intervals(intervals: ReminderInterval, **changes) -> ReminderInterval:
+    """Như edit_config cho chu kỳ nhắc nhở (1..1440 phút)"""
+    return replace(intervals, **_validated(INTERVAL_SCHEMA, changes))
+
+
+def encode_settings(config: WorkConfig, intervals: ReminderInterval) -> bytes:
+    return json.dumps(settings_to_dict(config, intervals), indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# ============================================
+# GHI NGUYÊN TỬ
+# ============================================
+
+def atomic_write(path: Path, data: bytes):
+    """Ghi file tạm + fsync + rename: path luôn là bản cũ hoặc bản mới trọn vẹn"""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    # fsync thư mục để chính lần rename cũng bền vững
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+# ============================================
+# STORE
+# ============================================
+
+class ConfigStore:
+    """settings.json: đọc có kiểm tra schema, ghi nguyên tử và gộp theo debounce"""
+
+    def __init__(self, path: Optional[Path] = None, debounce: float = DEBOUNCE_SECONDS):
+        self.path = Path(path) if path else get_config_path()
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._pending: Optional[Tuple[WorkConfig, ReminderInterval]] = None
+        self._timer: Optional[threading.Timer] = None
+        self._written: Optional[bytes] = None
+        # Cấu hình mà file trên đĩa đang chứa + (mtime, size, inode) lúc đó
+        self._disk: Optional[Tuple[WorkConfig, ReminderInterval]] = None
+        self._signature: Optional[tuple] = None
+        self.writes = 0
+
+    # ---------- Đọc ----------
+
+    def load(self) -> Tuple[WorkConfig, ReminderInterval]:
+        """Đọc settings.json. Chưa có file -> mặc định, chưa cấu hình"""
+        try:
+            raw = self.path.read_bytes()
+        except FileNotFoundError:
+            return WorkConfig(is_configured=False), ReminderInterval()
+        except OSError as e:
+            print(f"Error loading config: {e}")
+            return WorkConfig(is_configured=False), ReminderInterval()
+
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            # File có tồn tại tức là người dùng đã cấu hình: giữ lại bản hỏng
+            # để xem sau, chạy bằng mặc định thay vì mở lại wizard
+            print(f"Error loading config: {e}")
+            self._set_aside()
+            return WorkConfig(is_configured=True), ReminderInterval()
+
+        config, intervals, errors = settings_from_dict(data)
+        for error in errors:
+            print(f"Config: {error} -> dùng mặc định")
+        with self._lock:
+            self._written = raw
+            self._disk = (config, intervals)
+            self._signature = self._stat()
+        return config, intervals
+
+    def reload(self) -> Optional[Tuple[dict, dict]]:
+        """Đọc lại sau khi file bị sửa từ bên ngoài.
+
+        Trả (trường đổi của work_config, trường đổi của intervals) so với lần
+        đọc / ghi trước, hoặc None nếu không có gì mới: file không đổi, là chính
+        lần ghi của mình, hoặc đang ghi dở (JSON lỗi, chờ sự kiện kế tiếp).
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+        try:
+            raw = self.path.read_bytes()
+        except OSError:
+            return None
+        with self._lock:
+            self._signature = signature
+            if raw == self._written:
+                return None
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            print(f"Config reload skipped: {e}")
+            return None
+
+        config, intervals, errors = settings_from_dict(data)
+        for error in errors:
+            print(f"Config: {error} -> dùng mặc định")
+        with self._lock:
+            old_config, old_intervals = self._disk or (WorkConfig(), ReminderInterval())
+            self._written = raw
+            self._disk = (config, intervals)
+        return changed_fields(old_config, config), changed_fields(old_intervals, intervals)
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _set_aside(self):
+        try:
+            os.replace(self.path, self.path.with_name(self.path.name + ".corrupt"))
+        except OSError as e:
+            print(f"Error moving corrupt config: {e}")
+
+    # ---------- Ghi ----------
+
+    def save(self, config: WorkConfig, intervals: ReminderInterval) -> bool:
+        """Hẹn ghi sau debounce giây; các lần save() trong khoảng đó gộp làm một"""
+        if self.debounce <= 0:
+            return self.save_now(config, intervals)
+        with self._lock:
+            self._pending = (config, intervals)
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return True
+
+    def flush(self) -> bool:
+        """Ghi ngay bản đang chờ (nếu có)"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+            timer, self._timer = self._timer, None
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+        if pending is None:
+            return True
+        return self.save_now(*pending)
+
+    def save_now(self, config: WorkConfig, intervals: ReminderInterval) -> bool:
+        """Ghi nguyên tử ngay, bỏ qua nếu nội dung không đổi so với lần ghi trước"""
+        data = encode_settings(config, intervals)
+        with self._lock:
+            if data == self._written:
+                return True
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write(self.path, data)
+            except OSError as e:
+                print(f"Error saving config: {e}")
+                return False
+            self._written = data
+            self._disk = (config, intervals)
+            self._signature = self._stat()
+            self.writes += 1
+        return True
+
+    @property
+    def pending(self) -> bool:
+        return self._pending is not None
+
+
+def load_config(path: Optional[Path] = None) -> Tuple[WorkConfig, ReminderInterval]:
+    """Đọc config từ JSON (không cần giữ store)"""
+    return ConfigStore(path).load()
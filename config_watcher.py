@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Config Watcher - Tự áp dụng settings.json khi bị sửa từ bên ngoài
+==================================================================
+Theo dõi thư mục chứa settings.json bằng kqueue (macOS) hoặc inotify
+(Linux, qua ctypes); fd của backend được gắn vào event loop của runtime
+bằng add_reader(), nên khi không có gì thay đổi thì không tốn CPU và không
+cần thêm thread. Không có cả hai thì quay về stat() định kỳ.
+
+Theo dõi thư mục chứ không chỉ file: ghi nguyên tử (config_store, phần lớn
+editor) thay file bằng rename, inode cũ không còn nhận sự kiện.
+
+Sự kiện dồn dập (editor ghi nhiều bước) được gộp sau SETTLE_SECONDS rồi
+ConfigStore.reload() đọc lại: bỏ qua lần ghi của chính app (nội dung trùng
+lần ghi cuối) và chỉ báo các trường thực sự đổi.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+from pathlib import Path
+from typing import Callable, Optional
+
+SETTLE_SECONDS = 0.2
+POLL_INTERVAL = 2.0
+
+
+# ============================================
+# BACKEND
+# ============================================
+
+class KqueueBackend:
+    """kqueue: NOTE_WRITE trên thư mục (file mới / rename) + các NOTE của chính file"""
+
+    name = "kqueue"
+    DIR_FLAGS = select.KQ_NOTE_WRITE if hasattr(select, "kqueue") else 0
+    FILE_FLAGS = (select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND | select.KQ_NOTE_ATTRIB
+                  | select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME) if hasattr(select, "kqueue") else 0
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.kq = select.kqueue()
+        self._dir_fd = self._watch(path.parent, self.DIR_FLAGS)
+        self._file_fd: Optional[int] = None
+        self._watch_file()
+
+    def _watch(self, path: Path, fflags: int) -> int:
+        # O_EVTONLY (macOS): chỉ để nhận sự kiện, không giữ volume bận
+        fd = os.open(path, getattr(os, "O_EVTONLY", os.O_RDONLY))
+        event = select.kevent(fd, filter=select.KQ_FILTER_VNODE,
+                              flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR, fflags=fflags)
+        self.kq.control([event], 0)
+        return fd
+
+    def _watch_file(self):
+        # File bị thay bằng rename: bỏ inode cũ, theo dõi inode mới
+        if self._file_fd is not None:
+            os.close(self._file_fd)
+            self._file_fd = None
+        try:
+            self._file_fd = self._watch(self.path, self.FILE_FLAGS)
+        except OSError:
+            pass
+
+    def fileno(self) -> int:
+        return self.kq.fileno()
+
+    def read_events(self) -> bool:
+        events = self.kq.control(None, 16, 0)
+        if events:
+            self._watch_file()
+        return bool(events)
+
+    def close(self):
+        for fd in (self._file_fd, self._dir_fd):
+            if fd is not None:
+                os.close(fd)
+        self.kq.close()
+
+
+class InotifyBackend:
+    """inotify trên thư mục, lọc theo tên file"""
+
+    name = "inotify"
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    MASK = IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    HEADER = struct.Struct("iIII")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.filename = os.fsencode(path.name)
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(path.parent), self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed: {path.parent}")
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def read_events(self) -> bool:
+        matched = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return matched
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = self.HEADER.unpack_from(data, offset)
+                offset += self.HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                matched = matched or name == self.filename
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_backend(path: Path):
+    """Backend theo hệ điều hành, None nếu phải dùng polling"""
+    try:
+        if hasattr(select, "kqueue"):
+            return KqueueBackend(path)
+        if sys.platform.startswith("linux"):
+            return InotifyBackend(path)
+    except (OSError, AttributeError) as e:
+        print(f"Config watcher: {e} -> polling")
+    return None
+
+
+# ============================================
+# WATCHER
+# ============================================
+
+class ConfigWatcher:
+    """Gắn vào event loop: on_change(config_changes, interval_changes) khi file đổi"""
+
+    def __init__(self, store, on_change: Callable[[dict, dict], None],
+                 poll_interval: float = POLL_INTERVAL, settle: float = SETTLE_SECONDS):
+        self.store = store
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.loop = None
+        self.backend = None
+        self._check_handle = None
+        self._poll_handle = None
+        self.reloads = 0
+
+    @property
+    def mode(self) -> str:
+        return self.backend.name if self.backend else "poll"
+
+    def attach(self, loop):
+        """Bắt đầu theo dõi (gọi trên thread của loop)"""
+        self.loop = loop
+        self.store.path.parent.mkdir(parents=True, exist_ok=True)
+        self.backend = open_backend(self.store.path)
+        if self.backend is not None:
+            loop.add_reader(self.backend.fileno(), self._on_readable)
+        else:
+            self._poll_handle = loop.call_later(self.poll_interval, self._poll)
+
+    def close(self):
+        """Dừng theo dõi (gọi trên thread của loop)"""
+        for handle in (self._check_handle, self._poll_handle):
+            if handle is not None:
+                handle.cancel()
+        self._check_handle = self._poll_handle = None
+        if self.backend is not None:
+            self.loop.remove_reader(self.backend.fileno())
+            self.backend.close()
+            self.backend = None
+
+    def _on_readable(self):
+        try:
+            changed = self.backend.read_events()
+        except OSError as e:
+            print(f"Config watcher error: {e}")
+            return
+        # Gộp cả loạt sự kiện thành một lần đọc lại
+        if changed and self._check_handle is None:
+            self._check_handle = self.loop.call_later(self.settle, self.check)
+
+    def _poll(self):
+        self.check()
+        self._poll_handle = self.loop.call_later(self.poll_interval, self._poll)
+
+    def check(self):
+        """Đọc lại file, báo các trường đã đổi (nếu có)"""
+        self._check_handle = None
+        changes = self.store.reload()
+        if changes is None or not (changes[0] or changes[1]):
+            return
+        self.reloads += 1
+        try:
+            self.on_change(*changes)
+        except Exception as e:
+            print(f"Config reload error: {e}")
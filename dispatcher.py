@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Notification Dispatcher - Gửi thông báo không chặn
+==================================================
+Đưa việc gửi thông báo / dialog ra worker thread qua hàng đợi có giới hạn,
+để thread nhắc nhở không bao giờ bị kẹt bởi một dialog đang chờ người dùng
+bấm nút. Kết quả dialog trả về dưới dạng Future.
+
+Thông báo và dialog đi hai làn riêng: dialog modal chỉ chiếm worker của làn
+dialog, thông báo thường vẫn đi tiếp.
+
+AsyncNotificationDispatcher có cùng API nhưng chạy trên event loop của
+runtime.py: không có worker thread thường trực, lời gọi notifier (chặn vì
+subprocess) chỉ mượn thread của executor khi thật sự có việc.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from metrics import REGISTRY
+
+
+class DispatchQueueFull(Exception):
+    """Hàng đợi đầy, thông báo bị bỏ"""
+
+
+class _Lane:
+    """Một hàng đợi có giới hạn + các worker của nó"""
+
+    def __init__(self, name: str, workers: int, max_queue: int, stats: "DispatcherStats"):
+        self.name = name
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self.stats = stats
+        self.threads: List[threading.Thread] = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f"notify-{name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+            REGISTRY.watch_thread(thread.name, thread)
+
+    def put(self, job):
+        self.queue.put_nowait(job)
+        self.stats.observe_depth(self.name, self.queue.qsize())
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            future, fn, args, enqueued = job
+            started = time.monotonic()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                    self.stats.delivered(self.name, started - enqueued, time.monotonic() - enqueued)
+                except Exception as e:
+                    self.stats.failed(self.name)
+                    future.set_exception(e)
+
+
+class DispatcherStats:
+    """Metrics: độ sâu hàng đợi, số lượng, độ trễ gửi"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lanes: Dict[str, dict] = {}
+
+    def _lane(self, name: str) -> dict:
+        lane = self.lanes.get(name)
+        if lane is None:
+            lane = self.lanes[name] = {
+                "submitted": 0, "delivered": 0, "dropped": 0, "failed": 0,
+                "max_depth": 0, "wait_total": 0.0,
+                "latency_total": 0.0, "latency_max": 0.0, "latency_last": 0.0,
+            }
+        return lane
+
+    def submitted(self, name: str):
+        with self._lock:
+            self._lane(name)["submitted"] += 1
+
+    def dropped(self, name: str):
+        with self._lock:
+            self._lane(name)["dropped"] += 1
+
+    def failed(self, name: str):
+        with self._lock:
+            self._lane(name)["failed"] += 1
+
+    def observe_depth(self, name: str, depth: int):
+        with self._lock:
+            lane = self._lane(name)
+            lane["max_depth"] = max(lane["max_depth"], depth)
+
+    def delivered(self, name: str, wait: float, latency: float):
+        with self._lock:
+            lane = self._lane(name)
+            lane["delivered"] += 1
+            lane["wait_total"] += wait
+            lane["latency_total"] += latency
+            lane["latency_last"] = latency
+            lane["latency_max"] = max(lane["latency_max"], latency)
+
+
+class NotificationDispatcher:
+    """Bọc một notifier (notify / exercise / choose), trả Future thay vì chặn"""
+
+    def __init__(self, notifier, notify_workers: int = 1, dialog_workers: int = 2,
+                 max_queue: int = 32):
+        self.notifier = notifier
+        self.stats = DispatcherStats()
+        self._lanes = {
+            "notify": _Lane("notify", notify_workers, max_queue, self.stats),
+            "dialog": _Lane("dialog", dialog_workers, max_queue, self.stats),
+        }
+
+    def submit(self, lane: str, fn: Callable, *args) -> Future:
+        """Đưa một lời gọi vào hàng đợi; Future lỗi DispatchQueueFull nếu đầy"""
+        future: Future = Future()
+        self.stats.submitted(lane)
+        try:
+            self._lanes[lane].put((future, fn, args, time.monotonic()))
+        except queue.Full:
+            self.stats.dropped(lane)
+            future.set_exception(DispatchQueueFull(f"{lane} queue full"))
+        return future
+
+    def notify(self, title: str, message: str, sound: bool = True) -> Future:
+        return self.submit("notify", self.notifier.notify, title, message, sound)
+
+    def exercise(self, title: str, content: str, timeout: Optional[int] = None) -> Future:
+        return self.submit("dialog", self.notifier.exercise, title, content, timeout)
+
+    def choose(self, title: str, message: str, options: list,
+               timeout: Optional[int] = None, default: Optional[str] = None) -> Future:
+        return self.submit("dialog", self.notifier.choose, title, message, options, timeout, default)
+
+    def queue_depth(self) -> Dict[str, int]:
+        return {name: lane.queue.qsize() for name, lane in self._lanes.items()}
+
+    def metrics(self) -> Dict[str, dict]:
+        """Số liệu theo làn: depth, submitted, delivered, dropped, latency (ms)"""
+        result = {}
+        depths = self.queue_depth()
+        with self.stats._lock:
+            for name, depth in depths.items():
+                s = dict(self.stats._lane(name))
+                delivered = s["delivered"] or 1
+                result[name] = {
+                    "depth": depth,
+                    "max_depth": s["max_depth"],
+                    "submitted": s["submitted"],
+                    "delivered": s["delivered"],
+                    "dropped": s["dropped"],
+                    "failed": s["failed"],
+                    "wait_avg_ms": s["wait_total"] / delivered * 1000,
+                    "latency_avg_ms": s["latency_total"] / delivered * 1000,
+                    "latency_max_ms": s["latency_max"] * 1000,
+                    "latency_last_ms": s["latency_last"] * 1000,
+                }
+        return result
+
+    def samples(self) -> List[str]:
+        """metrics() dạng text Prometheus (đăng ký bằng REGISTRY.add_collector)"""
+        lanes = sorted(self.metrics().items())
+        series = (
+            ("whr_dispatch_queue_depth", "gauge", "Số lời gọi đang chờ trong làn", "depth", 1),
+            ("whr_dispatch_queue_max_depth", "gauge", "Độ sâu hàng đợi lớn nhất đã thấy", "max_depth", 1),
+            ("whr_dispatch_submitted_total", "counter", "Số lời gọi đã đưa vào làn", "submitted", 1),
+            ("whr_dispatch_delivered_total", "counter", "Số lời gọi đã gửi xong", "delivered", 1),
+            ("whr_dispatch_dropped_total", "counter", "Số lời gọi bị bỏ vì hàng đợi đầy", "dropped", 1),
+            ("whr_dispatch_failed_total", "counter", "Số lời gọi lỗi", "failed", 1),
+            ("whr_dispatch_wait_avg_seconds", "gauge", "Thời gian chờ trung bình trong hàng đợi",
+             "wait_avg_ms", 0.001),
+            ("whr_dispatch_latency_avg_seconds", "gauge", "Độ trễ gửi trung bình (chờ + gửi)",
+             "latency_avg_ms", 0.001),
+            ("whr_dispatch_latency_max_seconds", "gauge", "Độ trễ gửi lớn nhất", "latency_max_ms", 0.001),
+        )
+        lines = []
+        for name, kind, help, key, scale in series:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{lane="{lane}"}} {values[key] * scale if scale != 1 else values[key]}'
+                      for lane, values in lanes]
+        return lines
+
+    def close(self, timeout: Optional[float] = None):
+        """Dừng worker sau khi gửi hết hàng đợi"""
+        for lane in self._lanes.values():
+            for _ in lane.threads:
+                lane.queue.put(None)
+        for lane in self._lanes.values():
+            for thread in lane.threads:
+                thread.join(timeout)
+
+
+class AsyncNotificationDispatcher(NotificationDispatcher):
+    """Dispatcher trên event loop asyncio (xem runtime.py).
+
+    Mỗi làn giới hạn bằng semaphore thay vì worker riêng; hàng đợi là các
+    task đang chờ semaphore. Gọi attach(loop) trên thread của loop; lời gọi
+    gửi trước đó được giữ lại và chạy ngay khi attach.
+    """
+
+    def __init__(self, notifier, notify_workers: int = 1, dialog_workers: int = 2,
+                 max_queue: int = 32):
+        self.notifier = notifier
+        self.stats = DispatcherStats()
+        self.max_queue = max_queue
+        self._workers = {"notify": notify_workers, "dialog": dialog_workers}
+        self._depth = {name: 0 for name in self._workers}
+        self._depth_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=notify_workers + dialog_workers,
+                                            thread_name_prefix="notify")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        # Gửi trước attach(): giữ lại (vẫn tính vào độ sâu hàng đợi)
+        self._early: List[tuple] = []
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Gắn vào loop đang chạy (gọi từ thread của loop)"""
+        self._limits = {name: asyncio.Semaphore(n) for name, n in self._workers.items()}
+        with self._depth_lock:
+            self._loop = loop
+            early, self._early = self._early, []
+        for job in early:
+            self._start(*job)
+
+    def submit(self, lane: str, fn: Callable, *args) -> Future:
+        future: Future = Future()
+        self.stats.submitted(lane)
+        with self._depth_lock:
+            full = self._depth[lane] >= self.max_queue
+            if not full:
+                self._depth[lane] += 1
+                depth = self._depth[lane]
+                loop = self._loop
+                if loop is None:
+                    self._early.append((lane, future, fn, args, time.monotonic()))
+        if full:
+            self.stats.dropped(lane)
+            future.set_exception(DispatchQueueFull(f"{lane} queue full"))
+            return future
+        self.stats.observe_depth(lane, depth)
+        if loop is not None:
+            loop.call_soon_threadsafe(self._start, lane, future, fn, args, time.monotonic())
+        return future
+
+    def _start(self, lane: str, future: Future, fn: Callable, args: tuple, enqueued: float):
+        self._loop.create_task(self._deliver(lane, future, fn, args, enqueued))
+
+    async def _deliver(self, lane: str, future: Future, fn: Callable, args: tuple, enqueued: float):
+        async with self._limits[lane]:
+            with self._depth_lock:
+                self._depth[lane] -= 1
+            started = time.monotonic()
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = await self._loop.run_in_executor(self._executor, fn, *args)
+            except Exception as e:
+                self.stats.failed(lane)
+                future.set_exception(e)
+                return
+            future.set_result(result)
+            self.stats.delivered(lane, started - enqueued, time.monotonic() - enqueued)
+
+    def queue_depth(self) -> Dict[str, int]:
+        with self._depth_lock:
+            return dict(self._depth)
+
+    def close(self, timeout: Optional[float] = None):
+        self._executor.shutdown(wait=False)
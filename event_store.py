@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Event Store - Lịch sử nhắc nhở (SQLite, chỉ ghi thêm)
+=====================================================
+Ghi lại mọi thứ đã xảy ra: nhắc nhở đã bắn (fire), người dùng đã làm
+(ack), bỏ qua / bị ngân sách chặn (skip), nhắc lại sau (snooze), tạm dừng /
+tiếp tục (pause / resume) và Focus Mode (focus).
+
+- record() trên đường nóng chỉ là một deque.append (~1 µs, không lock,
+  không I/O); thread "event-store" gom lại và ghi theo lô bằng một
+  executemany() trong một transaction, mỗi FLUSH_INTERVAL giây hoặc khi
+  đủ BATCH_SIZE sự kiện.
+- WAL + synchronous=NORMAL: người đọc không chặn người ghi, commit không
+  fsync từng lần (mất tối đa vài lô cuối nếu mất điện, DB không hỏng).
+- Index (ts) và (reminder, ts) cho truy vấn theo khoảng thời gian.
+- Bảng tổng hợp theo ngày / tuần (daily_rollup, weekly_rollup), khoá
+  (ngày, reminder, kind): cập nhật cộng dồn trong cùng transaction với lô
+  sự kiện, nên thống kê đọc vài dòng theo khoá chính thay vì quét lịch sử.
+  rollup_state giữ id sự kiện cuối đã cộng; bảng tổng hợp bị mất hoặc DB
+  cũ chưa có thì lần ghi kế tiếp tự cộng bù phần còn thiếu.
+- Đọc (query, daily, weekly, total) qua kết nối chỉ-đọc riêng, không bao
+  giờ ghi trên thread gọi (thread UI): chỉ thấy các lô đã ghi, trễ tối đa
+  FLUSH_INTERVAL; còn sự kiện đang chờ thì đánh thức thread ghi.
+
+Ví dụ:
+    store = EventStore()
+    store.start()
+    store.record("fire", "water")
+    store.flush()                  # hoặc chờ thread ghi (FLUSH_INTERVAL)
+    store.query(since=datetime.now() - timedelta(days=1), reminder="water")
+    store.daily(date.today())      # {(reminder, kind): số lần}
+
+Báo cáo: python3 event_store.py [--week] [--date YYYY-MM-DD] [--rebuild]
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config_store import default_config_dir
+from metrics import EVENT_STORE_FLUSH, REGISTRY
+
+EVENT_KINDS = ("fire", "ack", "skip", "snooze", "pause", "resume", "focus")
+
+FLUSH_INTERVAL = 1.0
+BATCH_SIZE = 512
+# Giới hạn bộ nhớ nếu thread ghi bị kẹt: bỏ sự kiện cũ nhất
+MAX_PENDING = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    reminder TEXT,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_reminder_ts ON events (reminder, ts);
+"""
+
+# reminder = '' cho sự kiện không gắn nhắc nhở (pause, focus...)
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day TEXT NOT NULL,
+    reminder TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (day, reminder, kind)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS weekly_rollup (
+    week TEXT NOT NULL,
+    reminder TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (week, reminder, kind)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
+ROLLUP_TABLES = {"daily_rollup", "weekly_rollup", "rollup_state"}
+
+UPSERT_DAILY = ("INSERT INTO daily_rollup (day, reminder, kind, n) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (day, reminder, kind) DO UPDATE SET n = n + excluded.n")
+UPSERT_WEEKLY = ("INSERT INTO weekly_rollup (week, reminder, kind, n) VALUES (?, ?, ?, ?) "
+                 "ON CONFLICT (week, reminder, kind) DO UPDATE SET n = n + excluded.n")
+
+# Cộng bù từ bảng events (cùng cách chia ngày / tuần theo giờ địa phương như Python)
+CATCH_UP_DAILY = """
+INSERT INTO daily_rollup (day, reminder, kind, n)
+SELECT date(ts, 'unixepoch', 'localtime'), COALESCE(reminder, ''), kind, COUNT(*)
+FROM events WHERE id > ? GROUP BY 1, 2, 3
+ON CONFLICT (day, reminder, kind) DO UPDATE SET n = n + excluded.n
+"""
+CATCH_UP_WEEKLY = """
+INSERT INTO weekly_rollup (week, reminder, kind, n)
+SELECT date(ts, 'unixepoch', 'localtime', 'weekday 0', '-6 days'), COALESCE(reminder, ''), kind, COUNT(*)
+FROM events WHERE id > ? GROUP BY 1, 2, 3
+ON CONFLICT (week, reminder, kind) DO UPDATE SET n = n + excluded.n
+"""
+
+
+def default_history_path() -> Path:
+    return default_config_dir() / "history.db"
+
+
+def week_start(day: date) -> date:
+    """Thứ 2 của tuần chứa day (khoá của weekly_rollup)"""
+    return day - timedelta(days=day.weekday())
+
+
+@dataclass(frozen=True)
+class HistoryEvent:
+    ts: datetime
+    kind: str
+    reminder: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class EventStore:
+    """Lịch sử sự kiện trong SQLite, ghi theo lô trên thread nền"""
+
+    def __init__(self, path: Optional[Path] = None, flush_interval: float = FLUSH_INTERVAL,
+                 batch_size: int = BATCH_SIZE):
+        self.path = Path(path) if path else default_history_path()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: deque = deque(maxlen=MAX_PENDING)
+        self._lock = threading.Lock()   # giữ kết nối: một người dùng tại một thời điểm
+        self._wake = threading.Event()
+        self._running = False
+        self.thread: Optional[threading.Thread] = None
+        self.written = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._rollups_stale = self._check_rollups()
+        # Kết nối riêng cho người đọc: WAL cho đọc song song với lô đang ghi
+        self._reader = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._read_lock = threading.Lock()
+
+    # ---------- Ghi ----------
+
+    def record(self, kind: str, reminder: Optional[str] = None, detail: Optional[str] = None,
+               when: Optional[datetime] = None):
+        """Thêm một sự kiện (không chặn). when mặc định là bây giờ"""
+        ts = when.timestamp() if when is not None else time.time()
+        pending = self._pending
+        pending.append((ts, kind, reminder, detail))
+        if len(pending) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Ghi ngay mọi sự kiện đang chờ (kèm bảng tổng hợp), trả về số dòng đã ghi"""
+        pending = self._pending
+        with self._lock:
+            rows = []
+            while pending:
+                rows.append(pending.popleft())
+            if not rows and not self._rollups_stale:
+                return 0
+            started = time.perf_counter()
+            try:
+                self._conn.execute("BEGIN")
+                if self._rollups_stale:
+                    self._catch_up_locked()
+                if rows:
+                    self._conn.executemany(
+                        "INSERT INTO events (ts, kind, reminder, detail) VALUES (?, ?, ?, ?)", rows)
+                    self._roll_up_locked(rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                print(f"Error writing history: {e}")
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                # Trả lô về đầu hàng đợi, lần flush sau ghi lại
+                pending.extendleft(reversed(rows))
+                return 0
+            self._rollups_stale = False
+            EVENT_STORE_FLUSH.observe(time.perf_counter() - started)
+            self.written += len(rows)
+            return len(rows)
+
+    # ---------- Bảng tổng hợp ----------
+
+    def _check_rollups(self) -> bool:
+        """Tạo bảng tổng hợp nếu thiếu. True nếu còn sự kiện chưa được cộng vào"""
+        conn = self._conn
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.executescript(ROLLUP_SCHEMA)
+        if not ROLLUP_TABLES <= tables:
+            # Mất một trong các bảng: cộng lại từ đầu cho chắc
+            self._reset_rollups()
+        last_id = conn.execute("SELECT last_id FROM rollup_state WHERE name = 'events'").fetchone()
+        max_id = conn.execute("SELECT MAX(id) FROM events").fetchone()[0] or 0
+        return last_id is None or last_id[0] < max_id
+
+    def _reset_rollups(self):
+        conn = self._conn
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM daily_rollup")
+        conn.execute("DELETE FROM weekly_rollup")
+        conn.execute("INSERT OR REPLACE INTO rollup_state (name, last_id) VALUES ('events', 0)")
+        conn.execute("COMMIT")
+
+    def _catch_up_locked(self):
+        """Cộng các sự kiện có id > last_id (trong transaction đang mở)"""
+        conn = self._conn
+        row = conn.execute("SELECT last_id FROM rollup_state WHERE name = 'events'").fetchone()
+        last_id = row[0] if row else 0
+        conn.execute(CATCH_UP_DAILY, (last_id,))
+        conn.execute(CATCH_UP_WEEKLY, (last_id,))
+        self._save_last_id_locked()
+
+    def _roll_up_locked(self, rows: list):
+        """Cộng một lô vừa ghi vào bảng ngày / tuần (trong transaction đang mở)"""
+        days: Counter = Counter()
+        for ts, kind, reminder, _ in rows:
+            days[(date.fromtimestamp(ts), reminder or "", kind)] += 1
+        weeks: Counter = Counter()
+        for (day, reminder, kind), n in days.items():
+            weeks[(week_start(day), reminder, kind)] += n
+        self._conn.executemany(UPSERT_DAILY, [(d.isoformat(), r, k, n) for (d, r, k), n in days.items()])
+        self._conn.executemany(UPSERT_WEEKLY, [(w.isoformat(), r, k, n) for (w, r, k), n in weeks.items()])
+        self._save_last_id_locked()
+
+    def _save_last_id_locked(self):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO rollup_state (name, last_id) "
+            "SELECT 'events', COALESCE(MAX(id), 0) FROM events")
+
+    def rebuild_rollups(self):
+        """Xoá bảng tổng hợp và cộng lại toàn bộ từ lịch sử"""
+        with self._lock:
+            self._reset_rollups()
+            self._rollups_stale = True
+        self.flush()
+
+    # ---------- Thread ghi ----------
+
+    def start(self) -> threading.Thread:
+        self._running = True
+        self.thread = threading.Thread(target=self._run, name="event-store", daemon=True)
+        self.thread.start()
+        REGISTRY.watch_thread("event-store", self.thread)
+        return self.thread
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error in history writer: {e}")
+
+    def close(self):
+        """Dừng thread ghi, ghi nốt phần còn lại rồi đóng DB"""
+        self._running = False
+        self._wake.set()
+        if self.thread is not None:
+            self.thread.join(5)
+        self.flush()
+        with self._lock:
+            self._conn.close()
+        with self._read_lock:
+            self._reader.close()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # ---------- Đọc ----------
+
+    def _read(self, sql: str, params) -> list:
+        """Chạy truy vấn trên kết nối chỉ-đọc; có sự kiện chờ thì đánh thức thread ghi"""
+        if self._pending or self._rollups_stale:
+            self._wake.set()
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def query(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              kind: Optional[str] = None, reminder: Optional[str] = None,
+              limit: Optional[int] = None) -> List[HistoryEvent]:
+        """Sự kiện đã ghi trong [since, until), cũ trước"""
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until.timestamp())
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if reminder is not None:
+            clauses.append("reminder = ?")
+            params.append(reminder)
+        sql = "SELECT ts, kind, reminder, detail FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts, id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = self._read(sql, params)
+        return [HistoryEvent(datetime.fromtimestamp(ts), kind, reminder, detail)
+                for ts, kind, reminder, detail in rows]
+
+    def daily(self, day: date) -> Dict[Tuple[str, str], int]:
+        """Tổng hợp một ngày: {(reminder, kind): số lần}"""
+        return self._rollup("SELECT reminder, kind, n FROM daily_rollup WHERE day = ?", day)
+
+    def weekly(self, day: date) -> Dict[Tuple[str, str], int]:
+        """Tổng hợp tuần (thứ 2 - CN) chứa day"""
+        return self._rollup("SELECT reminder, kind, n FROM weekly_rollup WHERE week = ?", week_start(day))
+
+    def total(self, since: date, until: date, reminder: Optional[str] = None,
+              kind: Optional[str] = None) -> int:
+        """Tổng số lần trong các ngày [since, until) - tối đa một dòng mỗi ngày mỗi loại"""
+        sql = "SELECT COALESCE(SUM(n), 0) FROM daily_rollup WHERE day >= ? AND day < ?"
+        params = [since.isoformat(), until.isoformat()]
+        if reminder is not None:
+            sql += " AND reminder = ?"
+            params.append(reminder)
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        return self._read(sql, params)[0][0]
+
+    def _rollup(self, sql: str, key: date) -> Dict[Tuple[str, str], int]:
+        rows = self._read(sql, (key.isoformat(),))
+        return {(reminder, kind): n for reminder, kind, n in rows}
+
+    def count(self) -> int:
+        return self._read("SELECT COUNT(*) FROM events", ())[0][0]
+
+
+def print_report(stats: Dict[Tuple[str, str], int], title: str):
+    print(title)
+    if not stats:
+        print("  (chưa có dữ liệu)")
+        return
+    reminders = sorted({reminder for reminder, _ in stats})
+    print(f"  {'':14}" + "".join(f"{kind:>8}" for kind in EVENT_KINDS))
+    for reminder in reminders:
+        counts = "".join(f"{stats.get((reminder, kind), 0):>8}" for kind in EVENT_KINDS)
+        print(f"  {reminder or '-':14}{counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Báo cáo lịch sử nhắc nhở")
+    parser.add_argument("--date", help="Ngày YYYY-MM-DD (mặc định: hôm nay)")
+    parser.add_argument("--week", action="store_true", help="Cả tuần chứa ngày đó")
+    parser.add_argument("--db", help="Đường dẫn history.db")
+    parser.add_argument("--rebuild", action="store_true", help="Tính lại bảng tổng hợp từ lịch sử")
+    args = parser.parse_args()
+
+    day = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else date.today()
+    store = EventStore(Path(args.db) if args.db else None)
+    try:
+        if args.rebuild:
+            store.rebuild_rollups()
+        else:
+            store.flush()   # cộng bù bảng tổng hợp nếu còn thiếu
+        if args.week:
+            print_report(store.weekly(day), f"Tuần từ {week_start(day).isoformat()}")
+        else:
+            print_report(store.daily(day), f"Ngày {day.isoformat()}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
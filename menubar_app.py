@@ -9,15 +9,18 @@ Cài đặt: pip3 install rumps
 """
 
 import subprocess
-import threading
-import time
-import json
-from datetime import datetime, timedelta
-from dataclasses import dataclass, field, asdict
+import queue
+from dataclasses import replace
+from datetime import timedelta
 from typing import Optional
-from pathlib import Path
 import sys
-from http.server import HTTPServer, BaseHTTPRequestHandler
+
+# Mô phỏng không cần rumps: python3 menubar_app.py --simulate [day|week]
+if __name__ == "__main__" and "--simulate" in sys.argv:
+    from config_store import load_config
+    from simulate import run_cli
+    config, intervals = load_config()
+    sys.exit(run_cli(sys.argv[1:], config=config, intervals=intervals))
 
 try:
     import rumps
@@ -31,465 +34,44 @@ from exercises import (
     NECK_EXERCISES, SHOULDER_EXERCISES, EYE_EXERCISES, 
     BREATHING_EXERCISES, POSTURE_CHECK, RULE_20_20_20
 )
-
-
-# ============================================
-# CẤU HÌNH
-# ============================================
-
-@dataclass
-class WorkConfig:
-    # Giờ làm việc
-    work_start: tuple = (8, 0)
-    lunch_start: tuple = (11, 30)
-    work_resume: tuple = (13, 0)
-    work_end: tuple = (17, 30)
-    night_mode_start: tuple = (18, 0)
-
-    # Cấu hình mới
-    sleep_reminder_time: tuple = (23, 0)
-    weekend_mode: str = "mon_fri"  # mon_fri, mon_sat_full, mon_sat_half, mon_sun_full, mon_sun_half
-    saturday_end: tuple = (12, 0)
-    sunday_end: tuple = (12, 0)
-    is_configured: bool = False
-    morning_reminder_start: tuple = (7, 30)
-
-    # Pomodoro
-    pomodoro_work: int = 25
-    pomodoro_break: int = 5
-    pomodoro_long_break: int = 15
-
-
-@dataclass
-class ReminderInterval:
-    # Based on scientific recommendations
-    walk: int = 30           # Columbia University: 5-min walk every 30 min
-    water: int = 30          # Hydration experts: drink regularly every 20-30 min
-    toilet: int = 60
-    eye_20_20_20: int = 20   # AAO 20-20-20 rule: every 20 min
-    blink: int = 2           # Research: blink reminder every 1-2 min during screen use
-    posture: int = 20        # Cornell 20-8-2 rule: check posture every 20 min
-    neck_stretch: int = 30   # Ergonomics: stretch every 20-30 min
-    eye_exercise: int = 90
-    breathing: int = 120
-
-
-# ============================================
-# YOUTUBE STATE & HTTP SERVER
-# ============================================
-
-# HTTP port for Chrome extension communication
-YOUTUBE_HTTP_PORT = 9876
-
-@dataclass
-class YouTubeState:
-    """Trang thai YouTube tu Chrome Extension"""
-    title: str = ""
-    channel: str = ""
-    duration: float = 0
-    current_time: float = 0
-    is_playing: bool = False
-    volume: float = 1.0
-    is_muted: bool = False
-    url: str = ""
-    last_update: float = 0
-
-# Global YouTube state
-youtube_state = YouTubeState()
-
-
-class YouTubeHTTPHandler(BaseHTTPRequestHandler):
-    """HTTP handler for Chrome Extension communication"""
-
-    def log_message(self, format, *args):
-        pass  # Suppress logging
-
-    def send_cors_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-
-    def do_OPTIONS(self):
-        """Handle CORS preflight"""
-        self.send_response(200)
-        self.send_cors_headers()
-        self.end_headers()
-
-    def do_POST(self):
-        """Handle POST requests from extension"""
-        global youtube_state
-
-        if self.path == '/youtube/state':
-            try:
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                data = json.loads(post_data.decode('utf-8'))
-
-                youtube_state = YouTubeState(
-                    title=data.get('title', ''),
-                    channel=data.get('channel', ''),
-                    duration=data.get('duration', 0),
-                    current_time=data.get('currentTime', 0),
-                    is_playing=data.get('isPlaying', False),
-                    volume=data.get('volume', 1.0),
-                    is_muted=data.get('isMuted', False),
-                    url=data.get('url', ''),
-                    last_update=time.time()
-                )
-
-                self.send_response(200)
-                self.send_cors_headers()
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': True}).encode())
-            except Exception as e:
-                self.send_response(400)
-                self.send_cors_headers()
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)}).encode())
-        else:
-            self.send_response(404)
-            self.send_cors_headers()
-            self.end_headers()
-
-    def do_GET(self):
-        """Handle GET requests"""
-        global youtube_state
-
-        if self.path == '/youtube/state':
-            self.send_response(200)
-            self.send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-
-            data = {
-                'title': youtube_state.title,
-                'channel': youtube_state.channel,
-                'duration': youtube_state.duration,
-                'currentTime': youtube_state.current_time,
-                'isPlaying': youtube_state.is_playing,
-                'volume': youtube_state.volume,
-                'isMuted': youtube_state.is_muted,
-                'url': youtube_state.url,
-                'lastUpdate': youtube_state.last_update,
-                'isStale': (time.time() - youtube_state.last_update) > 5
-            }
-            self.wfile.write(json.dumps(data).encode())
-
-        elif self.path == '/health':
-            self.send_response(200)
-            self.send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok'}).encode())
-
-        else:
-            self.send_response(404)
-            self.send_cors_headers()
-            self.end_headers()
-
-
-def run_youtube_http_server():
-    """Run HTTP server in background thread"""
-    try:
-        server = HTTPServer(('localhost', YOUTUBE_HTTP_PORT), YouTubeHTTPHandler)
-        print(f"YouTube HTTP server running on localhost:{YOUTUBE_HTTP_PORT}")
-        server.serve_forever()
-    except Exception as e:
-        print(f"Could not start YouTube HTTP server: {e}")
-
-
-# Config path
-def get_config_path() -> Path:
-    """Lấy đường dẫn file config"""
-    config_dir = Path.home() / "Library" / "Application Support" / "WorkHealthReminder"
-    config_dir.mkdir(parents=True, exist_ok=True)
-    return config_dir / "settings.json"
-
-
-def save_config(config: WorkConfig, intervals: ReminderInterval) -> bool:
-    """Lưu config ra JSON"""
-    config_path = get_config_path()
-    data = {
-        "work_config": {
-            "work_start": list(config.work_start),
-            "lunch_start": list(config.lunch_start),
-            "work_resume": list(config.work_resume),
-            "work_end": list(config.work_end),
-            "night_mode_start": list(config.night_mode_start),
-            "sleep_reminder_time": list(config.sleep_reminder_time),
-            "weekend_mode": config.weekend_mode,
-            "saturday_end": list(config.saturday_end),
-            "sunday_end": list(config.sunday_end),
-            "is_configured": config.is_configured,
-            "morning_reminder_start": list(config.morning_reminder_start),
-            "pomodoro_work": config.pomodoro_work,
-            "pomodoro_break": config.pomodoro_break,
-            "pomodoro_long_break": config.pomodoro_long_break,
-        },
-        "intervals": {
-            "walk": intervals.walk,
-            "water": intervals.water,
-            "toilet": intervals.toilet,
-            "eye_20_20_20": intervals.eye_20_20_20,
-            "blink": intervals.blink,
-            "posture": intervals.posture,
-            "neck_stretch": intervals.neck_stretch,
-            "eye_exercise": intervals.eye_exercise,
-            "breathing": intervals.breathing,
-        }
-    }
-    try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        print(f"Error saving config: {e}")
-        return False
-
-
-def load_config() -> tuple:
-    """Đọc config từ JSON"""
-    config_path = get_config_path()
-
-    if not config_path.exists():
-        return WorkConfig(is_configured=False), ReminderInterval()
-
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        wc = data.get("work_config", {})
-        intervals = data.get("intervals", {})
-
-        config = WorkConfig(
-            work_start=tuple(wc.get("work_start", [8, 0])),
-            lunch_start=tuple(wc.get("lunch_start", [11, 30])),
-            work_resume=tuple(wc.get("work_resume", [13, 0])),
-            work_end=tuple(wc.get("work_end", [17, 30])),
-            night_mode_start=tuple(wc.get("night_mode_start", [18, 0])),
-            sleep_reminder_time=tuple(wc.get("sleep_reminder_time", [23, 0])),
-            weekend_mode=wc.get("weekend_mode", "mon_fri"),
-            saturday_end=tuple(wc.get("saturday_end", [12, 0])),
-            sunday_end=tuple(wc.get("sunday_end", [12, 0])),
-            is_configured=wc.get("is_configured", False),
-            morning_reminder_start=tuple(wc.get("morning_reminder_start", [7, 30])),
-            pomodoro_work=wc.get("pomodoro_work", 25),
-            pomodoro_break=wc.get("pomodoro_break", 5),
-            pomodoro_long_break=wc.get("pomodoro_long_break", 15),
-        )
-
-        reminder_intervals = ReminderInterval(
-            walk=intervals.get("walk", 30),
-            water=intervals.get("water", 30),
-            toilet=intervals.get("toilet", 60),
-            eye_20_20_20=intervals.get("eye_20_20_20", 20),
-            blink=intervals.get("blink", 2),
-            posture=intervals.get("posture", 20),
-            neck_stretch=intervals.get("neck_stretch", 30),
-            eye_exercise=intervals.get("eye_exercise", 90),
-            breathing=intervals.get("breathing", 120),
-        )
-
-        return config, reminder_intervals
-
-    except Exception as e:
-        print(f"Error loading config: {e}")
-        return WorkConfig(is_configured=False), ReminderInterval()
-
-
-# Load config
-CONFIG, INTERVALS = load_config()
-
-
-# ============================================
-# TRACKER
-# ============================================
-
-class ReminderTracker:
-    def __init__(self):
-        self.reset_all()
-        self.is_paused = False
-        self.night_mode_reminded = False
-
-        # Trạng thái mới
-        self.sleep_reminded = False
-        self.morning_reminded = False
-        self.work_started_today = False
-
-        # Focus mode
-        self.focus_end_time: Optional[datetime] = None
-
-        # Pomodoro
-        self.pomodoro_state: Optional[str] = None  # "work", "break", None
-        self.pomodoro_end_time: Optional[datetime] = None
-        self.pomodoro_count = 0
-
-    def reset_all(self):
-        now = datetime.now()
-        self.last_walk = now
-        self.last_water = now
-        self.last_toilet = now
-        self.last_eye_20_20_20 = now
-        self.last_blink = now
-        self.last_posture = now
-        self.last_neck_stretch = now
-        self.last_eye_exercise = now
-        self.last_breathing = now
-        self.night_mode_reminded = False
-
-    def reset_daily(self):
-        """Reset các flag hàng ngày (gọi lúc 00:00)"""
-        self.night_mode_reminded = False
-        self.sleep_reminded = False
-        self.morning_reminded = False
-        self.work_started_today = False
-        self.pomodoro_count = 0
-
-    def is_focus_active(self) -> bool:
-        """Kiểm tra Focus Mode đang bật"""
-        if self.focus_end_time is None:
-            return False
-        return datetime.now() < self.focus_end_time
-
-    def is_pomodoro_active(self) -> bool:
-        """Kiểm tra Pomodoro đang chạy"""
-        return self.pomodoro_state is not None
-
-
-tracker = ReminderTracker()
+from notifier import create_notifier, send_notification
+from dispatcher import AsyncNotificationDispatcher
+from metrics import REGISTRY, UPDATE_STATUS_DURATION, timed
+from reminder_engine import WorkConfig, ReminderInterval, ReminderEngine, INTERVAL_KEYS
+from youtube_bridge import (
+    youtube_tabs, publish_reminders, register_event_handler, BatchError
+)
+from runtime import AsyncRuntime
+from config_store import ConfigStore, edit_config, edit_intervals
+from config_watcher import ConfigWatcher
+from event_store import EventStore
+from tracker_store import TrackerStore
+
+
+# Config: ghi nguyên tử, gộp các lần sửa liên tiếp (xem config_store.py)
+CONFIG_STORE = ConfigStore()
+CONFIG, INTERVALS = CONFIG_STORE.load()
+
+WEEKEND_LABELS = {
+    "mon_fri": "T2-T6",
+    "mon_sat_full": "T2-T7 (Full)",
+    "mon_sat_half": "T2-T7 (Nửa ngày)",
+    "mon_sun_full": "T2-CN (Full)",
+    "mon_sun_half": "T2-CN (Nửa ngày)",
+}
+INTERVAL_LABELS = {
+    "walk": "🚶 Đi bộ",
+    "water": "💧 Nước",
+    "eye_20_20_20": "👁️ 20-20-20",
+    "neck_stretch": "🧘 Giãn cổ",
+    "posture": "🪑 Tư thế",
+}
 
 
 # ============================================
 # HELPERS
 # ============================================
 
-def time_to_minutes(hour: int, minute: int) -> int:
-    return hour * 60 + minute
-
-
-def get_current_minutes() -> int:
-    now = datetime.now()
-    return time_to_minutes(now.hour, now.minute)
-
-
-def is_work_day() -> bool:
-    """Kiểm tra hôm nay có phải ngày làm việc không"""
-    today = datetime.now().weekday()  # Monday=0, Sunday=6
-
-    if CONFIG.weekend_mode == "mon_fri":
-        return today < 5  # T2-T6
-    elif CONFIG.weekend_mode == "mon_sat_full":
-        return today < 6  # T2-T7
-    elif CONFIG.weekend_mode == "mon_sat_half":
-        return today < 6  # T2-T7 (nửa ngày T7)
-    elif CONFIG.weekend_mode in ("mon_sun_full", "mon_sun_half"):
-        return True  # Cả tuần (T2-CN)
-    return today < 5
-
-
-def get_today_work_end() -> tuple:
-    """Lấy giờ kết thúc hôm nay (xử lý T7/CN nửa ngày)"""
-    today = datetime.now().weekday()
-    if today == 5 and CONFIG.weekend_mode == "mon_sat_half":
-        return CONFIG.saturday_end
-    if today == 6 and CONFIG.weekend_mode == "mon_sun_half":
-        return CONFIG.sunday_end
-    return CONFIG.work_end
-
-
-def is_half_day() -> bool:
-    """Kiểm tra có phải ngày nửa ngày không (T7 hoặc CN)"""
-    today = datetime.now().weekday()
-    if today == 5 and CONFIG.weekend_mode == "mon_sat_half":
-        return True
-    if today == 6 and CONFIG.weekend_mode == "mon_sun_half":
-        return True
-    return False
-
-
-def is_work_time() -> bool:
-    """Kiểm tra có đang trong giờ làm việc không"""
-    if not is_work_day():
-        return False
-
-    current = get_current_minutes()
-    work_start = time_to_minutes(*CONFIG.work_start)
-    work_end = time_to_minutes(*get_today_work_end())
-
-    # T7 nửa ngày: không có nghỉ trưa
-    if is_half_day():
-        return work_start <= current < work_end
-
-    # Ngày thường: có nghỉ trưa
-    lunch_start = time_to_minutes(*CONFIG.lunch_start)
-    work_resume = time_to_minutes(*CONFIG.work_resume)
-
-    morning_work = work_start <= current < lunch_start
-    afternoon_work = work_resume <= current < work_end
-    return morning_work or afternoon_work
-
-
-def is_lunch_break() -> bool:
-    """Kiểm tra có đang nghỉ trưa không"""
-    if not is_work_day() or is_half_day():
-        return False
-
-    current = get_current_minutes()
-    lunch_start = time_to_minutes(*CONFIG.lunch_start)
-    work_resume = time_to_minutes(*CONFIG.work_resume)
-    return lunch_start <= current < work_resume
-
-
-def is_morning_reminder_window() -> bool:
-    """Kiểm tra đang trong khung nhắc buổi sáng (7:30-work_start)"""
-    if not is_work_day():
-        return False
-
-    current = get_current_minutes()
-    morning_start = time_to_minutes(*CONFIG.morning_reminder_start)
-    work_start = time_to_minutes(*CONFIG.work_start)
-    return morning_start <= current < work_start
-
-
-def minutes_since(last_time: Optional[datetime]) -> float:
-    if last_time is None:
-        return float('inf')
-    return (datetime.now() - last_time).total_seconds() / 60
-
-
-def send_notification(title: str, message: str, sound: bool = True):
-    """Gửi thông báo macOS"""
-    sound_cmd = 'sound name "Glass"' if sound else ''
-    script = f'''
-    display notification "{message}" with title "{title}" {sound_cmd}
-    '''
-    subprocess.run(['osascript', '-e', script], capture_output=True)
-
-
-def send_exercise_dialog(title: str, content: str):
-    """Hiển thị dialog bài tập"""
-    content_escaped = content.replace('"', '\\"').replace('\n', '\\n')
-    script = f'''
-    display dialog "{content_escaped}" with title "{title}" buttons {{"Đã làm ✓", "Bỏ qua"}} default button 1
-    '''
-    subprocess.run(['osascript', '-e', script], capture_output=True)
-
-
-def send_alert_with_options(title: str, message: str, options: list) -> str:
-    """Hiển thị dialog với lựa chọn"""
-    options_str = ', '.join([f'"{opt}"' for opt in options])
-    script = f'''
-    display dialog "{message}" with title "{title}" buttons {{{options_str}}} default button 1
-    '''
-    result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
-    output = result.stdout.strip()
-    for opt in options:
-        if opt in output:
-            return opt
-    return options[0]
-
-
 def ask_time_input(title: str, message: str, default: str) -> tuple:
     """Dialog nhập giờ"""
     script = f'''
@@ -621,7 +203,7 @@ def show_first_run_setup() -> tuple:
         "23:00"
     )
 
-    config = WorkConfig(
+    answers = dict(
         work_start=work_start,
         lunch_start=lunch_start,
         work_resume=work_resume,
@@ -630,10 +212,17 @@ def show_first_run_setup() -> tuple:
         saturday_end=saturday_end,
         sunday_end=sunday_end,
         sleep_reminder_time=sleep_time,
-        is_configured=True,
     )
+    # Câu trả lời sai (VD 25:00) thì giữ giá trị mặc định của trường đó
+    config = WorkConfig(is_configured=True)
+    for name, value in answers.items():
+        try:
+            config = edit_config(config, **{name: value})
+        except ValueError as e:
+            print(f"Setup: {e}")
+    work_start, work_end = config.work_start, config.work_end
 
-    save_config(config, INTERVALS)
+    CONFIG_STORE.save_now(config, INTERVALS)
     send_notification("✅ Cấu hình xong!", f"Giờ làm: {work_start[0]:02d}:{work_start[1]:02d} - {work_end[0]:02d}:{work_end[1]:02d}")
 
     return config, INTERVALS
@@ -657,9 +246,24 @@ class HealthReminderApp(rumps.App):
             quit_button=None
         )
 
-        self.tracker = tracker
+        # Thông báo/dialog đi qua worker, thread nhắc nhở không bị chặn
+        self.dispatcher = AsyncNotificationDispatcher(create_notifier())
+        # Lịch sử nhắc nhở (history.db), ghi theo lô trên thread nền
+        self.history = EventStore()
+        self.history.start()
+        self.engine = ReminderEngine(CONFIG, INTERVALS, notifier=self.dispatcher, history=self.history)
+        self.tracker = self.engine.tracker
         self.is_running = True
 
+        # Kết quả dialog từ worker → xử lý trên main thread trong update_status
+        self.ui_events = queue.SimpleQueue()
+
+        # Event từ extension (POST /events/batch)
+        register_event_handler("timer_reset", self.on_timer_reset_event, required=("key",),
+                               validate=self.validate_timer_reset_event)
+        register_event_handler("pomodoro", self.on_pomodoro_event, required=("action",),
+                               validate=self.validate_pomodoro_event)
+
         # Menu items
         self.status_item = rumps.MenuItem("🟢 Đang hoạt động")
         self.next_reminder = rumps.MenuItem("⏱️ Nhắc tiếp: --")
@@ -701,6 +305,23 @@ class HealthReminderApp(rumps.App):
         self.quick_menu.add(rumps.MenuItem("👁️ Đã nhìn xa", callback=self.reset_eye))
         self.quick_menu.add(rumps.MenuItem("🔄 Reset tất cả", callback=self.reset_all_timers))
 
+        # Thống kê: đọc từ bảng tổng hợp ngày / tuần của history.db
+        self.stats_menu = rumps.MenuItem("📊 Thống kê")
+        self.stats_items = {}
+        for period, heading in (("day", "Hôm nay"), ("week", "Tuần này")):
+            if period == "week":
+                self.stats_menu.add(None)
+            self.stats_menu.add(rumps.MenuItem(heading))
+            for key, label in INTERVAL_LABELS.items():
+                item = rumps.MenuItem(f"{label}: --")
+                self.stats_items[(period, key)] = item
+                self.stats_menu.add(item)
+        # Nhắc nhở bị bộ giới hạn thông báo chặn (rate_limiter.py)
+        self.stats_menu.add(None)
+        self.suppressed_item = rumps.MenuItem("🚦 Bỏ qua do ngân sách: 0")
+        self.stats_menu.add(self.suppressed_item)
+        self.stats_refreshed = None
+
         # YouTube submenu
         self.youtube_menu = rumps.MenuItem("📺 YouTube")
         self.youtube_status = rumps.MenuItem("Không có video")
@@ -719,9 +340,6 @@ class HealthReminderApp(rumps.App):
         # Settings - build dynamically
         self.build_settings_menu()
 
-        # Start YouTube HTTP server
-        self.youtube_http_thread = threading.Thread(target=run_youtube_http_server, daemon=True)
-        self.youtube_http_thread.start()
 
         # Build menu
         self.menu = [
@@ -736,15 +354,29 @@ class HealthReminderApp(rumps.App):
             self.exercise_menu,
             self.youtube_menu,
             self.quick_menu,
+            self.stats_menu,
             None,
             self.settings_menu,
             None,
             rumps.MenuItem("❌ Thoát", callback=self.quit_app)
         ]
 
-        # Start reminder thread
-        self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
-        self.reminder_thread.start()
+        # Khôi phục timer / Pomodoro / Focus từ lần chạy trước (crash, đăng nhập lại...)
+        self.tracker_store = TrackerStore(self.tracker)
+        self.tracker_store.restore(self.engine)
+        if self.tracker.is_paused:
+            self.pause_item.hidden = True
+            self.resume_item.hidden = False
+
+        # Một event loop nền: vòng nhắc nhở, bridge HTTP + Unix socket, dispatcher
+        self.runtime = AsyncRuntime(self.engine, dispatcher=self.dispatcher)
+        self.runtime.start()
+        REGISTRY.watch_thread("runtime", self.runtime.thread)
+
+        # Sửa settings.json từ bên ngoài: áp dụng ngay, không cần khởi động lại
+        self.config_watcher = ConfigWatcher(CONFIG_STORE, self.on_config_file_changed)
+        self.runtime.call_soon(self.config_watcher.attach, self.runtime.loop)
+        self.runtime.call_soon(self.tracker_store.attach, self.runtime.loop)
 
         # Update status timer (faster for Pomodoro countdown)
         self.update_timer = rumps.Timer(self.update_status, 1)
@@ -773,15 +405,8 @@ class HealthReminderApp(rumps.App):
         self.settings_menu.add(self.lunch_item)
 
         # Weekend mode
-        weekend_labels = {
-            "mon_fri": "T2-T6",
-            "mon_sat_full": "T2-T7 (Full)",
-            "mon_sat_half": "T2-T7 (Nửa ngày)",
-            "mon_sun_full": "T2-CN (Full)",
-            "mon_sun_half": "T2-CN (Nửa ngày)",
-        }
         self.weekend_item = rumps.MenuItem(
-            f"📆 Làm việc: {weekend_labels.get(CONFIG.weekend_mode, 'T2-T6')}",
+            f"📆 Làm việc: {WEEKEND_LABELS.get(CONFIG.weekend_mode, 'T2-T6')}",
             callback=self.edit_weekend_mode
         )
         self.settings_menu.add(self.weekend_item)
@@ -798,31 +423,108 @@ class HealthReminderApp(rumps.App):
 
         # Intervals submenu
         self.intervals_menu = rumps.MenuItem("⏱️ Thời gian nhắc")
-        self.intervals_menu.add(rumps.MenuItem(f"🚶 Đi bộ: {INTERVALS.walk} phút", callback=lambda _: self.edit_interval("walk")))
-        self.intervals_menu.add(rumps.MenuItem(f"💧 Nước: {INTERVALS.water} phút", callback=lambda _: self.edit_interval("water")))
-        self.intervals_menu.add(rumps.MenuItem(f"👁️ 20-20-20: {INTERVALS.eye_20_20_20} phút", callback=lambda _: self.edit_interval("eye_20_20_20")))
-        self.intervals_menu.add(rumps.MenuItem(f"🧘 Giãn cổ: {INTERVALS.neck_stretch} phút", callback=lambda _: self.edit_interval("neck_stretch")))
-        self.intervals_menu.add(rumps.MenuItem(f"🪑 Tư thế: {INTERVALS.posture} phút", callback=lambda _: self.edit_interval("posture")))
+        self.interval_items = {}
+        for key, label in INTERVAL_LABELS.items():
+            item = rumps.MenuItem(f"{label}: {getattr(INTERVALS, key)} phút",
+                                  callback=lambda _, key=key: self.edit_interval(key))
+            self.interval_items[key] = item
+            self.intervals_menu.add(item)
         self.settings_menu.add(self.intervals_menu)
 
         self.settings_menu.add(None)
         self.settings_menu.add(rumps.MenuItem("ℹ️ Phiên bản 3.0 PRO"))
         self.settings_menu.add(rumps.MenuItem("🔄 Đặt lại mặc định", callback=self.reset_to_defaults))
     
+    def ask_async(self, future, callback, default=None):
+        """Chờ Future của dialog mà không chặn UI: callback(result) chạy trên main thread.
+
+        Dialog lỗi (osascript hỏng, hàng đợi đầy...) thì callback(default),
+        như khi dialog hết giờ.
+        """
+        def done(f):
+            try:
+                result = f.result()
+            except Exception as e:
+                print(f"Dialog error: {e}")
+                result = default
+            self.ui_events.put((callback, (result,)))
+        future.add_done_callback(done)
+
+    def process_ui_events(self):
+        """Áp dụng kết quả dialog đã xong (gọi từ timer của rumps)"""
+        while True:
+            try:
+                fn, args = self.ui_events.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"UI event error: {e}")
+
+    def call_soon(self, fn, *args):
+        """Chạy fn trên main thread ở lượt update_status kế tiếp"""
+        self.ui_events.put((fn, args))
+
+    def validate_timer_reset_event(self, event: dict):
+        if event["key"] not in INTERVAL_KEYS:
+            raise BatchError(f"unknown timer {event['key']!r}")
+
+    def on_timer_reset_event(self, event: dict):
+        """Extension báo đã làm (uống nước, đi bộ...): reset timer tương ứng"""
+        now = self.engine.now()
+        self.tracker.update(**{f"last_{event['key']}": now})
+        self.engine.record("ack", event["key"], "extension", now)
+        self.engine.wake()
+
+    def validate_pomodoro_event(self, event: dict):
+        if event["action"] not in ("start", "stop"):
+            raise BatchError(f"unknown pomodoro action {event['action']!r}")
+
+    def on_pomodoro_event(self, event: dict):
+        """Extension bắt đầu / dừng Pomodoro"""
+        if event["action"] == "start":
+            self.call_soon(self.start_pomodoro, None)
+        else:
+            self.call_soon(self.stop_pomodoro, None)
+
+    def show_exercise(self, title: str, content: str, tracker_field: str):
+        """Mở dialog bài tập qua dispatcher, ghi nhận khi dialog đóng"""
+        future = self.dispatcher.exercise(title, content, timeout=CONFIG.dialog_timeout or None)
+        self.ask_async(future, lambda done: self.on_exercise_closed(tracker_field, done), default=False)
+
+    def on_exercise_closed(self, tracker_field: str, done: bool):
+        """Dialog bài tập mở từ menu đã đóng"""
+        now = self.engine.now()
+        self.tracker.update(**{tracker_field: now})
+        self.engine.record("ack" if done else "skip", tracker_field[len("last_"):], "menu", now)
+
     def update_status(self, _):
+        """Timer 1 giây của menu (đo thời gian cho /metrics)"""
+        REGISTRY.beat("ui")
+        with timed(UPDATE_STATUS_DURATION):
+            self.refresh_status()
+
+    def refresh_status(self):
         """Cập nhật trạng thái trên menu"""
-        now = datetime.now()
+        self.process_ui_events()
+        now = self.engine.now()
+        self.publish_reminder_state(now)
+        self.refresh_stats(now)
+
+        # Một snapshot cho cả lượt: không thấy trạng thái nửa cũ nửa mới
+        state = self.tracker.state
 
         # Update Pomodoro count
-        self.pomodoro_count_item.title = f"📊 Hoàn thành hôm nay: {self.tracker.pomodoro_count}"
+        self.pomodoro_count_item.title = f"📊 Hoàn thành hôm nay: {state.pomodoro_count}"
 
         # Pomodoro active - show countdown
-        if self.tracker.is_pomodoro_active() and self.tracker.pomodoro_end_time:
-            remaining = (self.tracker.pomodoro_end_time - now).total_seconds()
+        if state.is_pomodoro_active() and state.pomodoro_end_time:
+            remaining = (state.pomodoro_end_time - now).total_seconds()
             if remaining > 0:
                 mins = int(remaining // 60)
                 secs = int(remaining % 60)
-                if self.tracker.pomodoro_state == "work":
+                if state.pomodoro_state == "work":
                     self.title = f"🍅 {mins:02d}:{secs:02d}"
                     self.status_item.title = f"🍅 Pomodoro: {mins:02d}:{secs:02d}"
                 else:
@@ -834,9 +536,15 @@ class HealthReminderApp(rumps.App):
                 self.handle_pomodoro_end()
                 return
 
+        # Đang chờ người dùng trả lời "Tiếp tục Pomodoro?"
+        if state.is_pomodoro_active():
+            self.title = "🍅 ?"
+            self.status_item.title = "🍅 Chờ xác nhận Pomodoro"
+            return
+
         # Focus mode active - show countdown
-        if self.tracker.is_focus_active() and self.tracker.focus_end_time:
-            remaining = (self.tracker.focus_end_time - now).total_seconds()
+        if state.is_focus_active(now) and state.focus_end_time:
+            remaining = (state.focus_end_time - now).total_seconds()
             if remaining > 0:
                 mins = int(remaining // 60)
                 self.title = f"🎯 {mins}m"
@@ -848,18 +556,18 @@ class HealthReminderApp(rumps.App):
                 return
 
         # Normal status
-        if self.tracker.is_paused:
+        if state.is_paused:
             self.status_item.title = "⏸️ Đã tạm dừng"
             self.title = "⏸️"
-        elif not is_work_day():
+        elif not self.engine.is_work_day(now):
             day_names = ["T2", "T3", "T4", "T5", "T6", "T7", "CN"]
             today = day_names[now.weekday()]
             self.status_item.title = f"🎉 Ngày nghỉ ({today})"
             self.title = "🎉"
-        elif is_work_time():
+        elif self.engine.is_work_time(now):
             self.status_item.title = "🟢 Đang làm việc"
             self.title = "🏃"
-        elif is_lunch_break():
+        elif self.engine.is_lunch_break(now):
             self.status_item.title = "🍚 Nghỉ trưa"
             self.title = "🍚"
         else:
@@ -867,7 +575,7 @@ class HealthReminderApp(rumps.App):
             self.title = "🌙"
 
         # Update next reminder
-        if not self.tracker.is_paused and is_work_time():
+        if not state.is_paused and self.engine.is_work_time(now):
             next_times = self.get_next_reminders()
             if next_times:
                 soonest = min(next_times.items(), key=lambda x: x[1])
@@ -880,28 +588,38 @@ class HealthReminderApp(rumps.App):
         # Update YouTube menu
         self.update_youtube_menu()
 
+    def publish_reminder_state(self, now):
+        """Đẩy trạng thái nhắc nhở cho client SSE (/events), chỉ gửi khi thay đổi.
+
+        Gửi mốc kết thúc thay vì đếm ngược từng giây: client tự đếm.
+        """
+        t = self.tracker.state
+        data = {
+            "status": self.engine.status(now),
+            "focusEnd": t.focus_end_time.isoformat(timespec="seconds") if t.focus_end_time else None,
+            "pomodoro": t.pomodoro_state,
+            "pomodoroEnd": t.pomodoro_end_time.isoformat(timespec="seconds") if t.pomodoro_end_time else None,
+            "pomodoroCount": t.pomodoro_count,
+        }
+        for key in INTERVAL_KEYS:
+            data[key] = max(0, round(self.engine.minutes_until(key, now)))
+        publish_reminders(data)
+
     def get_next_reminders(self) -> dict:
         """Lấy thời gian đến nhắc nhở tiếp theo"""
+        labels = {"walk": "🚶 Đi bộ", "water": "💧 Nước", "eye_20_20_20": "👁️ 20-20-20"}
         reminders = {}
-        
-        next_walk = INTERVALS.walk - minutes_since(self.tracker.last_walk)
-        if next_walk > 0:
-            reminders["🚶 Đi bộ"] = round(next_walk)
-        
-        next_water = INTERVALS.water - minutes_since(self.tracker.last_water)
-        if next_water > 0:
-            reminders["💧 Nước"] = round(next_water)
-        
-        next_eye = INTERVALS.eye_20_20_20 - minutes_since(self.tracker.last_eye_20_20_20)
-        if next_eye > 0:
-            reminders["👁️ 20-20-20"] = round(next_eye)
-        
+        for key, label in labels.items():
+            remaining = self.engine.minutes_until(key)
+            if remaining > 0:
+                reminders[label] = round(remaining)
         return reminders
     
     @rumps.clicked("⏸️ Tạm dừng")
     def pause_reminders(self, _):
         """Tạm dừng tất cả nhắc nhở"""
-        self.tracker.is_paused = True
+        self.tracker.update(is_paused=True)
+        self.engine.record("pause")
         self.pause_item.hidden = True
         self.resume_item.hidden = False
         send_notification("⏸️ Đã tạm dừng", "Nhắc nhở đã tạm dừng. Nhớ tiếp tục nhé!")
@@ -909,50 +627,54 @@ class HealthReminderApp(rumps.App):
     @rumps.clicked("▶️ Tiếp tục")
     def resume_reminders(self, _):
         """Tiếp tục nhắc nhở"""
-        self.tracker.is_paused = False
+        now = self.engine.now()
+        self.tracker.submit(lambda t: replace(t.reset_all(now), is_paused=False))
+        self.engine.record("resume", when=now)
         self.pause_item.hidden = False
         self.resume_item.hidden = True
-        self.tracker.reset_all()
+        self.engine.wake()
         send_notification("▶️ Tiếp tục", "Đã tiếp tục nhắc nhở. Chăm sóc sức khỏe nhé!")
     
     def do_neck_stretch(self, _):
         """Hiển thị bài tập cổ vai"""
-        send_exercise_dialog("🧘 Giãn cổ vai", NECK_EXERCISES + "\n\n" + SHOULDER_EXERCISES)
-        self.tracker.last_neck_stretch = datetime.now()
+        self.show_exercise("🧘 Giãn cổ vai", NECK_EXERCISES + "\n\n" + SHOULDER_EXERCISES, "last_neck_stretch")
     
     def do_eye_exercise(self, _):
         """Hiển thị bài tập mắt"""
-        send_exercise_dialog("👁️ Bài tập mắt", EYE_EXERCISES)
-        self.tracker.last_eye_exercise = datetime.now()
+        self.show_exercise("👁️ Bài tập mắt", EYE_EXERCISES, "last_eye_exercise")
     
     def do_breathing(self, _):
         """Hiển thị bài tập hít thở"""
-        send_exercise_dialog("🌬️ Hít thở", BREATHING_EXERCISES)
-        self.tracker.last_breathing = datetime.now()
+        self.show_exercise("🌬️ Hít thở", BREATHING_EXERCISES, "last_breathing")
     
     def do_posture_check(self, _):
         """Hiển thị kiểm tra tư thế"""
-        send_exercise_dialog("🪑 Kiểm tra tư thế", POSTURE_CHECK)
-        self.tracker.last_posture = datetime.now()
+        self.show_exercise("🪑 Kiểm tra tư thế", POSTURE_CHECK, "last_posture")
     
     def reset_water(self, _):
         """Reset timer uống nước"""
-        self.tracker.last_water = datetime.now()
+        now = self.engine.now()
+        self.tracker.update(last_water=now)
+        self.engine.record("ack", "water", "menu", now)
         send_notification("💧 Đã ghi nhận", f"Timer uống nước đã reset. Nhắc lại sau {INTERVALS.water} phút.")
     
     def reset_walk(self, _):
         """Reset timer đi bộ"""
-        self.tracker.last_walk = datetime.now()
+        now = self.engine.now()
+        self.tracker.update(last_walk=now)
+        self.engine.record("ack", "walk", "menu", now)
         send_notification("🚶 Đã ghi nhận", f"Timer đi bộ đã reset. Nhắc lại sau {INTERVALS.walk} phút.")
     
     def reset_eye(self, _):
         """Reset timer 20-20-20"""
-        self.tracker.last_eye_20_20_20 = datetime.now()
+        now = self.engine.now()
+        self.tracker.update(last_eye_20_20_20=now)
+        self.engine.record("ack", "eye_20_20_20", "menu", now)
         send_notification("👁️ Đã ghi nhận", f"Timer 20-20-20 đã reset. Nhắc lại sau {INTERVALS.eye_20_20_20} phút.")
     
     def reset_all_timers(self, _):
         """Reset tất cả timer"""
-        self.tracker.reset_all()
+        self.tracker.reset_all(self.engine.now())
         send_notification("🔄 Đã reset tất cả", "Tất cả timer đã được reset từ đầu.")
 
     # ============================================
@@ -961,13 +683,17 @@ class HealthReminderApp(rumps.App):
 
     def start_focus(self, minutes: int):
         """Bắt đầu Focus Mode"""
-        self.tracker.focus_end_time = datetime.now() + timedelta(minutes=minutes)
+        now = self.engine.now()
+        self.tracker.update(focus_end_time=now + timedelta(minutes=minutes))
+        self.engine.record("focus", None, f"start {minutes}m", now)
         send_notification("🎯 Focus Mode", f"Tập trung trong {minutes} phút! Tất cả nhắc nhở đã tạm dừng.")
 
     def stop_focus(self, _):
         """Dừng Focus Mode"""
         if self.tracker.focus_end_time:
-            self.tracker.focus_end_time = None
+            self.tracker.update(focus_end_time=None)
+            self.engine.record("focus", None, "stop")
+            self.engine.wake()
             send_notification("🎯 Focus xong!", "Đã tắt Focus Mode. Nhắc nhở hoạt động lại!")
 
     # ============================================
@@ -976,70 +702,95 @@ class HealthReminderApp(rumps.App):
 
     def start_pomodoro(self, _):
         """Bắt đầu Pomodoro"""
-        self.tracker.pomodoro_state = "work"
-        self.tracker.pomodoro_end_time = datetime.now() + timedelta(minutes=CONFIG.pomodoro_work)
+        self.tracker.update(pomodoro_state="work",
+                            pomodoro_end_time=self.engine.now() + timedelta(minutes=CONFIG.pomodoro_work))
         send_notification("🍅 Pomodoro bắt đầu!", f"Tập trung làm việc trong {CONFIG.pomodoro_work} phút!")
 
     def stop_pomodoro(self, _):
         """Dừng Pomodoro"""
-        self.tracker.pomodoro_state = None
-        self.tracker.pomodoro_end_time = None
+        self.tracker.update(pomodoro_state=None, pomodoro_end_time=None)
+        self.engine.wake()
         send_notification("🍅 Đã dừng Pomodoro", "Pomodoro đã dừng.")
 
     def handle_pomodoro_end(self):
         """Xử lý khi hết thời gian Pomodoro"""
-        if self.tracker.pomodoro_state == "work":
+        state = self.tracker.state
+        if state.pomodoro_state == "work":
             # Hết thời gian làm việc
-            self.tracker.pomodoro_count += 1
+            count = self.tracker.submit(lambda t: replace(t, pomodoro_count=t.pomodoro_count + 1)).pomodoro_count
 
             # Sau 4 pomodoro → nghỉ dài
-            if self.tracker.pomodoro_count % 4 == 0:
+            if count % 4 == 0:
                 break_time = CONFIG.pomodoro_long_break
                 send_notification("🎉 Nghỉ dài!", f"Đã hoàn thành 4 Pomodoro! Nghỉ {break_time} phút.")
             else:
                 break_time = CONFIG.pomodoro_break
                 send_notification("☕ Nghỉ ngơi!", f"Hết {CONFIG.pomodoro_work} phút! Nghỉ {break_time} phút.")
 
-            self.tracker.pomodoro_state = "break"
-            self.tracker.pomodoro_end_time = datetime.now() + timedelta(minutes=break_time)
+            self.tracker.update(pomodoro_state="break",
+                                pomodoro_end_time=self.engine.now() + timedelta(minutes=break_time))
 
-        elif self.tracker.pomodoro_state == "break":
-            # Hết thời gian nghỉ
-            choice = send_alert_with_options(
+        elif state.pomodoro_state == "break":
+            # Hết thời gian nghỉ: hỏi không chặn, hết giờ thì dừng Pomodoro
+            self.tracker.update(pomodoro_end_time=None)
+            future = self.dispatcher.choose(
                 "🍅 Tiếp tục Pomodoro?",
-                f"Đã nghỉ xong! Bạn đã hoàn thành {self.tracker.pomodoro_count} Pomodoro hôm nay.",
-                ["Tiếp tục", "Dừng lại"]
+                f"Đã nghỉ xong! Bạn đã hoàn thành {state.pomodoro_count} Pomodoro hôm nay.",
+                ["Tiếp tục", "Dừng lại"],
+                timeout=CONFIG.dialog_timeout or None, default="Dừng lại"
             )
-            if "Tiếp tục" in choice:
-                self.start_pomodoro(None)
-            else:
-                self.stop_pomodoro(None)
+            self.ask_async(future, self.apply_pomodoro_choice, default="Dừng lại")
+
+    def apply_pomodoro_choice(self, choice: str):
+        """Áp dụng câu trả lời dialog Tiếp tục Pomodoro"""
+        if self.tracker.pomodoro_state != "break":
+            return  # đã dừng từ menu trong lúc chờ
+        if "Tiếp tục" in choice:
+            self.start_pomodoro(None)
+        else:
+            self.stop_pomodoro(None)
 
     # ============================================
     # YOUTUBE CONTROL
     # ============================================
 
+    def refresh_stats(self, now, every: float = 30.0):
+        """Cập nhật menu Thống kê (mỗi `every` giây, mỗi lần vài dòng theo khoá chính)"""
+        if self.stats_refreshed is not None and (now - self.stats_refreshed).total_seconds() < every:
+            return
+        self.stats_refreshed = now
+        self.suppressed_item.title = f"🚦 {self.engine.rate_limiter.summary()}"
+        try:
+            rollups = {"day": self.history.daily(now.date()), "week": self.history.weekly(now.date())}
+        except Exception as e:
+            print(f"Stats error: {e}")
+            return
+        for (period, key), item in self.stats_items.items():
+            counts = rollups[period]
+            done = counts.get((key, "ack"), 0)
+            fired = counts.get((key, "fire"), 0)
+            item.title = f"{INTERVAL_LABELS[key]}: {done} lần đã làm / {fired} lần nhắc"
+
     def update_youtube_menu(self):
         """Cap nhat menu YouTube"""
-        global youtube_state
+        # Tab active (đang phát gần nhất), không phải tab POST cuối cùng
+        state = youtube_tabs.active()
 
         # Check if data is stale (more than 5 seconds old)
-        is_stale = (time.time() - youtube_state.last_update) > 5
-
-        if is_stale or not youtube_state.title:
+        if state.is_stale() or not state.title:
             self.youtube_status.title = "Không có video"
             self.youtube_title.title = "Mở YouTube trong Chrome"
             self.youtube_playpause.title = "▶️ Play/Pause"
         else:
             # Truncate title if too long
-            title = youtube_state.title
+            title = state.title
             if len(title) > 35:
                 title = title[:32] + "..."
 
-            status = "▶️ Đang phát" if youtube_state.is_playing else "⏸️ Tạm dừng"
+            status = "▶️ Đang phát" if state.is_playing else "⏸️ Tạm dừng"
             self.youtube_status.title = status
             self.youtube_title.title = f"🎵 {title}"
-            self.youtube_playpause.title = "⏸️ Pause" if youtube_state.is_playing else "▶️ Play"
+            self.youtube_playpause.title = "⏸️ Pause" if state.is_playing else "▶️ Play"
 
     def send_youtube_command(self, command: str):
         """Send command to YouTube via Chrome AppleScript"""
@@ -1100,327 +851,177 @@ class HealthReminderApp(rumps.App):
     # SETTINGS EDIT
     # ============================================
 
+    def ask_settings(self, ask, callback, *args):
+        """Chạy dialog nhập liệu (osascript, chặn) trên làn dialog của dispatcher.
+
+        callback(result) chạy trên main thread; dialog lỗi thì callback(None)
+        và cấu hình giữ nguyên.
+        """
+        self.ask_async(self.dispatcher.submit("dialog", ask, *args), callback)
+
+    def save_settings(self, config_changes: Optional[dict] = None,
+                      interval_changes: Optional[dict] = None) -> bool:
+        """Kiểm tra thay đổi từ menu theo schema của config_store rồi áp dụng.
+
+        Giá trị sai: giữ nguyên cấu hình cũ, báo lỗi, trả về False.
+        """
+        global CONFIG, INTERVALS
+        try:
+            config = edit_config(CONFIG, **config_changes) if config_changes else CONFIG
+            intervals = edit_intervals(INTERVALS, **interval_changes) if interval_changes else INTERVALS
+        except ValueError as e:
+            send_notification("⚠️ Giá trị không hợp lệ", str(e))
+            return False
+        CONFIG, INTERVALS = config, intervals
+        CONFIG_STORE.save(CONFIG, INTERVALS)
+        self.engine.update_config(CONFIG, INTERVALS)
+        return True
+
     def edit_work_hours(self, _):
         """Chỉnh giờ làm việc"""
-        global CONFIG
         ws = CONFIG.work_start
         we = CONFIG.work_end
 
-        new_start = ask_time_input("Giờ bắt đầu", f"Hiện tại: {ws[0]:02d}:{ws[1]:02d}", f"{ws[0]:02d}:{ws[1]:02d}")
-        new_end = ask_time_input("Giờ kết thúc", f"Hiện tại: {we[0]:02d}:{we[1]:02d}", f"{we[0]:02d}:{we[1]:02d}")
-
-        CONFIG = WorkConfig(
-            work_start=new_start, work_end=new_end,
-            lunch_start=CONFIG.lunch_start, work_resume=CONFIG.work_resume,
-            night_mode_start=CONFIG.night_mode_start,
-            sleep_reminder_time=CONFIG.sleep_reminder_time,
-            weekend_mode=CONFIG.weekend_mode, saturday_end=CONFIG.saturday_end, sunday_end=CONFIG.sunday_end,
-            is_configured=True, morning_reminder_start=CONFIG.morning_reminder_start,
-            pomodoro_work=CONFIG.pomodoro_work, pomodoro_break=CONFIG.pomodoro_break,
-            pomodoro_long_break=CONFIG.pomodoro_long_break,
-        )
-        save_config(CONFIG, INTERVALS)
+        def ask():
+            return (ask_time_input("Giờ bắt đầu", f"Hiện tại: {ws[0]:02d}:{ws[1]:02d}", f"{ws[0]:02d}:{ws[1]:02d}"),
+                    ask_time_input("Giờ kết thúc", f"Hiện tại: {we[0]:02d}:{we[1]:02d}", f"{we[0]:02d}:{we[1]:02d}"))
+        self.ask_settings(ask, self.apply_work_hours)
+
+    def apply_work_hours(self, hours):
+        if hours is None:
+            return
+        new_start, new_end = hours
+        if not self.save_settings(dict(work_start=new_start, work_end=new_end)):
+            return
         self.work_hours_item.title = f"📅 Giờ làm: {new_start[0]:02d}:{new_start[1]:02d} - {new_end[0]:02d}:{new_end[1]:02d}"
         send_notification("✅ Đã cập nhật", f"Giờ làm: {new_start[0]:02d}:{new_start[1]:02d} - {new_end[0]:02d}:{new_end[1]:02d}")
 
     def edit_lunch_hours(self, _):
         """Chỉnh giờ nghỉ trưa"""
-        global CONFIG
         ls = CONFIG.lunch_start
         wr = CONFIG.work_resume
 
-        new_start = ask_time_input("Bắt đầu nghỉ trưa", f"Hiện tại: {ls[0]:02d}:{ls[1]:02d}", f"{ls[0]:02d}:{ls[1]:02d}")
-        new_end = ask_time_input("Kết thúc nghỉ trưa", f"Hiện tại: {wr[0]:02d}:{wr[1]:02d}", f"{wr[0]:02d}:{wr[1]:02d}")
-
-        CONFIG = WorkConfig(
-            work_start=CONFIG.work_start, work_end=CONFIG.work_end,
-            lunch_start=new_start, work_resume=new_end,
-            night_mode_start=CONFIG.night_mode_start,
-            sleep_reminder_time=CONFIG.sleep_reminder_time,
-            weekend_mode=CONFIG.weekend_mode, saturday_end=CONFIG.saturday_end, sunday_end=CONFIG.sunday_end,
-            is_configured=True, morning_reminder_start=CONFIG.morning_reminder_start,
-            pomodoro_work=CONFIG.pomodoro_work, pomodoro_break=CONFIG.pomodoro_break,
-            pomodoro_long_break=CONFIG.pomodoro_long_break,
-        )
-        save_config(CONFIG, INTERVALS)
+        def ask():
+            return (ask_time_input("Bắt đầu nghỉ trưa", f"Hiện tại: {ls[0]:02d}:{ls[1]:02d}", f"{ls[0]:02d}:{ls[1]:02d}"),
+                    ask_time_input("Kết thúc nghỉ trưa", f"Hiện tại: {wr[0]:02d}:{wr[1]:02d}", f"{wr[0]:02d}:{wr[1]:02d}"))
+        self.ask_settings(ask, self.apply_lunch_hours)
+
+    def apply_lunch_hours(self, hours):
+        if hours is None:
+            return
+        new_start, new_end = hours
+        if not self.save_settings(dict(lunch_start=new_start, work_resume=new_end)):
+            return
         self.lunch_item.title = f"☀️ Nghỉ trưa: {new_start[0]:02d}:{new_start[1]:02d} - {new_end[0]:02d}:{new_end[1]:02d}"
         send_notification("✅ Đã cập nhật", f"Nghỉ trưa: {new_start[0]:02d}:{new_start[1]:02d} - {new_end[0]:02d}:{new_end[1]:02d}")
 
     def edit_weekend_mode(self, _):
         """Chỉnh chế độ làm cuối tuần"""
-        global CONFIG
-        new_mode = ask_weekend_mode()
-
-        saturday_end = CONFIG.saturday_end
-        sunday_end = CONFIG.sunday_end
-        if new_mode == "mon_sat_half":
-            se = CONFIG.saturday_end
-            saturday_end = ask_time_input("Giờ kết thúc T7", f"Hiện tại: {se[0]:02d}:{se[1]:02d}", f"{se[0]:02d}:{se[1]:02d}")
-        if new_mode == "mon_sun_half":
-            sn = CONFIG.sunday_end
-            sunday_end = ask_time_input("Giờ kết thúc CN", f"Hiện tại: {sn[0]:02d}:{sn[1]:02d}", f"{sn[0]:02d}:{sn[1]:02d}")
-
-        CONFIG = WorkConfig(
-            work_start=CONFIG.work_start, work_end=CONFIG.work_end,
-            lunch_start=CONFIG.lunch_start, work_resume=CONFIG.work_resume,
-            night_mode_start=CONFIG.night_mode_start,
-            sleep_reminder_time=CONFIG.sleep_reminder_time,
-            weekend_mode=new_mode, saturday_end=saturday_end, sunday_end=sunday_end,
-            is_configured=True, morning_reminder_start=CONFIG.morning_reminder_start,
-            pomodoro_work=CONFIG.pomodoro_work, pomodoro_break=CONFIG.pomodoro_break,
-            pomodoro_long_break=CONFIG.pomodoro_long_break,
-        )
-        save_config(CONFIG, INTERVALS)
-
-        weekend_labels = {"mon_fri": "T2-T6", "mon_sat_full": "T2-T7 (Full)", "mon_sat_half": "T2-T7 (Nửa ngày)", "mon_sun_full": "T2-CN (Full)", "mon_sun_half": "T2-CN (Nửa ngày)"}
-        self.weekend_item.title = f"📆 Làm việc: {weekend_labels.get(new_mode, 'T2-T6')}"
-        send_notification("✅ Đã cập nhật", f"Làm việc: {weekend_labels.get(new_mode, 'T2-T6')}")
+        se = CONFIG.saturday_end
+        sn = CONFIG.sunday_end
+
+        def ask():
+            new_mode = ask_weekend_mode()
+            saturday_end, sunday_end = se, sn
+            if new_mode == "mon_sat_half":
+                saturday_end = ask_time_input("Giờ kết thúc T7", f"Hiện tại: {se[0]:02d}:{se[1]:02d}", f"{se[0]:02d}:{se[1]:02d}")
+            if new_mode == "mon_sun_half":
+                sunday_end = ask_time_input("Giờ kết thúc CN", f"Hiện tại: {sn[0]:02d}:{sn[1]:02d}", f"{sn[0]:02d}:{sn[1]:02d}")
+            return new_mode, saturday_end, sunday_end
+        self.ask_settings(ask, self.apply_weekend_mode)
+
+    def apply_weekend_mode(self, answer):
+        if answer is None:
+            return
+        new_mode, saturday_end, sunday_end = answer
+        if not self.save_settings(dict(weekend_mode=new_mode, saturday_end=saturday_end, sunday_end=sunday_end)):
+            return
+        self.weekend_item.title = f"📆 Làm việc: {WEEKEND_LABELS.get(new_mode, 'T2-T6')}"
+        send_notification("✅ Đã cập nhật", f"Làm việc: {WEEKEND_LABELS.get(new_mode, 'T2-T6')}")
 
     def edit_sleep_time(self, _):
         """Chỉnh giờ nhắc ngủ"""
-        global CONFIG
         st = CONFIG.sleep_reminder_time
-        new_time = ask_time_input("Giờ nhắc ngủ", f"Hiện tại: {st[0]:02d}:{st[1]:02d}", f"{st[0]:02d}:{st[1]:02d}")
-
-        CONFIG = WorkConfig(
-            work_start=CONFIG.work_start, work_end=CONFIG.work_end,
-            lunch_start=CONFIG.lunch_start, work_resume=CONFIG.work_resume,
-            night_mode_start=CONFIG.night_mode_start,
-            sleep_reminder_time=new_time,
-            weekend_mode=CONFIG.weekend_mode, saturday_end=CONFIG.saturday_end, sunday_end=CONFIG.sunday_end,
-            is_configured=True, morning_reminder_start=CONFIG.morning_reminder_start,
-            pomodoro_work=CONFIG.pomodoro_work, pomodoro_break=CONFIG.pomodoro_break,
-            pomodoro_long_break=CONFIG.pomodoro_long_break,
-        )
-        save_config(CONFIG, INTERVALS)
+        self.ask_settings(ask_time_input, self.apply_sleep_time,
+                          "Giờ nhắc ngủ", f"Hiện tại: {st[0]:02d}:{st[1]:02d}", f"{st[0]:02d}:{st[1]:02d}")
+
+    def apply_sleep_time(self, new_time):
+        if new_time is None:
+            return
+        if not self.save_settings(dict(sleep_reminder_time=new_time)):
+            return
         self.sleep_item.title = f"🌙 Nhắc ngủ: {new_time[0]:02d}:{new_time[1]:02d}"
         send_notification("✅ Đã cập nhật", f"Nhắc ngủ lúc {new_time[0]:02d}:{new_time[1]:02d}")
 
     def edit_interval(self, interval_name: str):
         """Chỉnh thời gian interval"""
-        global INTERVALS
-        labels = {
-            "walk": ("🚶 Đi bộ", INTERVALS.walk),
-            "water": ("💧 Nước", INTERVALS.water),
-            "eye_20_20_20": ("👁️ 20-20-20", INTERVALS.eye_20_20_20),
-            "neck_stretch": ("🧘 Giãn cổ", INTERVALS.neck_stretch),
-            "posture": ("🪑 Tư thế", INTERVALS.posture),
-        }
-        label, current = labels.get(interval_name, ("", 30))
-        new_val = ask_number_input(label, f"Nhập số phút (hiện tại: {current})", current)
-
-        INTERVALS = ReminderInterval(
-            walk=new_val if interval_name == "walk" else INTERVALS.walk,
-            water=new_val if interval_name == "water" else INTERVALS.water,
-            toilet=INTERVALS.toilet,
-            eye_20_20_20=new_val if interval_name == "eye_20_20_20" else INTERVALS.eye_20_20_20,
-            blink=INTERVALS.blink,
-            posture=new_val if interval_name == "posture" else INTERVALS.posture,
-            neck_stretch=new_val if interval_name == "neck_stretch" else INTERVALS.neck_stretch,
-            eye_exercise=INTERVALS.eye_exercise,
-            breathing=INTERVALS.breathing,
-        )
-        save_config(CONFIG, INTERVALS)
-        send_notification("✅ Đã cập nhật", f"{label}: {new_val} phút")
+        label = INTERVAL_LABELS.get(interval_name, "")
+        current = getattr(INTERVALS, interval_name, 30)
+        self.ask_settings(ask_number_input, lambda new_val: self.apply_interval(interval_name, new_val),
+                          label, f"Nhập số phút (hiện tại: {current})", current)
+
+    def apply_interval(self, interval_name: str, new_val):
+        if new_val is None:
+            return
+        if not self.save_settings(interval_changes={interval_name: new_val}):
+            return
+        self.refresh_settings_menu()
+        send_notification("✅ Đã cập nhật", f"{INTERVAL_LABELS.get(interval_name, '')}: {new_val} phút")
+
+    def on_config_file_changed(self, config_changes: dict, interval_changes: dict):
+        """settings.json bị sửa bên ngoài (thread của runtime): áp dụng trên main thread"""
+        self.call_soon(self.apply_config_changes, config_changes, interval_changes)
+
+    def apply_config_changes(self, config_changes: dict, interval_changes: dict):
+        """Chỉ ghép các trường đã đổi vào cấu hình đang chạy, lập lịch lại phần bị ảnh hưởng"""
+        global CONFIG, INTERVALS
+        CONFIG = replace(CONFIG, **config_changes)
+        INTERVALS = replace(INTERVALS, **interval_changes)
+        rescheduled = self.engine.update_config(CONFIG, INTERVALS)
+        self.refresh_settings_menu()
+        fields_changed = ", ".join(sorted({**config_changes, **interval_changes}))
+        print(f"Config reloaded: {fields_changed} (lập lịch lại: {', '.join(sorted(rescheduled)) or 'không'})")
+
+    def refresh_settings_menu(self):
+        """Cập nhật tiêu đề menu Cài đặt theo CONFIG / INTERVALS hiện tại"""
+        ws, we = CONFIG.work_start, CONFIG.work_end
+        ls, wr = CONFIG.lunch_start, CONFIG.work_resume
+        st = CONFIG.sleep_reminder_time
+        self.work_hours_item.title = f"📅 Giờ làm: {ws[0]:02d}:{ws[1]:02d} - {we[0]:02d}:{we[1]:02d}"
+        self.lunch_item.title = f"☀️ Nghỉ trưa: {ls[0]:02d}:{ls[1]:02d} - {wr[0]:02d}:{wr[1]:02d}"
+        self.weekend_item.title = f"📆 Làm việc: {WEEKEND_LABELS.get(CONFIG.weekend_mode, 'T2-T6')}"
+        self.sleep_item.title = f"🌙 Nhắc ngủ: {st[0]:02d}:{st[1]:02d}"
+        for key, item in self.interval_items.items():
+            item.title = f"{INTERVAL_LABELS[key]}: {getattr(INTERVALS, key)} phút"
 
     def reset_to_defaults(self, _):
         """Đặt lại mặc định"""
+        future = self.dispatcher.choose("Xác nhận", "Đặt lại tất cả cài đặt về mặc định?", ["Đặt lại", "Hủy"],
+                                        timeout=CONFIG.dialog_timeout or None, default="Hủy")
+        self.ask_async(future, self.apply_reset_to_defaults, default="Hủy")
+
+    def apply_reset_to_defaults(self, choice: str):
+        """Kết quả dialog xác nhận đặt lại mặc định"""
         global CONFIG, INTERVALS
-        choice = send_alert_with_options("Xác nhận", "Đặt lại tất cả cài đặt về mặc định?", ["Đặt lại", "Hủy"])
         if "Đặt lại" in choice:
             CONFIG = WorkConfig(is_configured=True)
             INTERVALS = ReminderInterval()
-            save_config(CONFIG, INTERVALS)
+            CONFIG_STORE.save(CONFIG, INTERVALS)
+            self.engine.update_config(CONFIG, INTERVALS)
+            self.refresh_settings_menu()
             send_notification("🔄 Đã đặt lại", "Tất cả cài đặt đã về mặc định.")
 
     def quit_app(self, _):
         """Thoát ứng dụng"""
         send_notification("👋 Tạm biệt", "Health Reminder đã dừng. Nhớ chăm sóc sức khỏe nhé!")
         self.is_running = False
+        self.runtime.call_soon(self.config_watcher.close)
+        self.runtime.call_soon(self.tracker_store.close)
+        self.runtime.stop()
+        CONFIG_STORE.flush()
+        self.tracker_store.save(force=True)
+        self.history.close()
         rumps.quit_application()
-    
-    def reminder_loop(self):
-        """Thread chạy kiểm tra nhắc nhở"""
-        last_minute = -1
-        was_working = False
-
-        while self.is_running:
-            try:
-                now = datetime.now()
-                current_minute = now.minute
-
-                if current_minute != last_minute:
-                    last_minute = current_minute
-
-                    # Kiểm tra các mốc đặc biệt (luôn chạy)
-                    self.check_special_times(now)
-
-                    # Skip reminders if paused, focus mode, or pomodoro
-                    if self.tracker.is_paused:
-                        time.sleep(5)
-                        continue
-
-                    if self.tracker.is_focus_active() or self.tracker.is_pomodoro_active():
-                        time.sleep(5)
-                        continue
-
-                    # Reset khi bắt đầu làm việc
-                    if is_work_time() and not was_working:
-                        self.tracker.reset_all()
-                        self.tracker.work_started_today = True
-                        was_working = True
-                    elif not is_work_time():
-                        was_working = False
-
-                    # Kiểm tra nhắc nhở (chỉ trong giờ làm việc)
-                    if is_work_time():
-                        self.check_eye_protection()
-                        self.check_basic_reminders()
-                        self.check_exercise_reminders()
-
-                time.sleep(5)
-
-            except Exception as e:
-                print(f"Error in reminder loop: {e}")
-                time.sleep(10)
-    
-    def check_special_times(self, now):
-        """Kiểm tra các mốc thời gian đặc biệt"""
-        current_time = (now.hour, now.minute)
-
-        # Reset daily flags at midnight
-        if current_time == (0, 0):
-            self.tracker.reset_daily()
-
-        # Morning reminder (7:30 - work_start)
-        if is_morning_reminder_window() and not self.tracker.morning_reminded and not self.tracker.work_started_today:
-            self.check_morning_startup()
-
-        # Only check work-related times on work days
-        if not is_work_day():
-            # Sleep reminder still works on weekends
-            self.check_sleep_reminder(current_time)
-            return
-
-        # Lunch time (not for Saturday half-day)
-        if current_time == CONFIG.lunch_start and not is_half_day():
-            send_notification("🍚 Giờ ăn trưa!", "Đi lấy phiếu ăn cơm thôi!")
-
-        # Resume after lunch
-        if current_time == CONFIG.work_resume and not is_half_day():
-            send_notification("💼 Hết nghỉ trưa!", "Bắt đầu làm việc lại! Fighting! 💪")
-            self.tracker.reset_all()
-
-        # Work end
-        today_end = get_today_work_end()
-        if current_time == today_end:
-            end_str = f"{today_end[0]:02d}:{today_end[1]:02d}"
-            choice = send_alert_with_options(
-                "🏠 Hết giờ làm!",
-                f"Đã {end_str}! Bạn muốn:",
-                ["Đón người yêu 💕", "Về nhà 🏠"]
-            )
-            if "Đón người yêu" in choice:
-                send_notification("💕 Đón người yêu", "Đi đón người yêu thôi! 🥰")
-            else:
-                send_notification("🏠 Về nhà", "Đi về nhà nghỉ ngơi nhé! 😊")
-
-        # Night mode reminder (18:00)
-        if current_time == CONFIG.night_mode_start and not self.tracker.night_mode_reminded:
-            send_notification("🌙 Bật Night Mode!", "Bật Night Shift/Dark Mode để bảo vệ mắt!")
-            self.tracker.night_mode_reminded = True
-
-        # Sleep reminder
-        self.check_sleep_reminder(current_time)
-
-    def check_morning_startup(self):
-        """Nhắc bắt đầu làm việc buổi sáng"""
-        self.tracker.morning_reminded = True
-
-        ws = CONFIG.work_start
-        choice = send_alert_with_options(
-            "🌅 Chuẩn bị làm việc!",
-            f"Sắp đến giờ làm việc ({ws[0]:02d}:{ws[1]:02d}).\\nBạn đã sẵn sàng chưa?",
-            ["Bắt đầu ngay!", "Nhắc lại sau", "Hôm nay nghỉ"]
-        )
-
-        if "Bắt đầu ngay" in choice:
-            self.tracker.work_started_today = True
-            self.tracker.reset_all()
-            send_notification("💪 Bắt đầu làm việc!", "Chúc bạn một ngày làm việc hiệu quả!")
-        elif "Hôm nay nghỉ" in choice:
-            send_notification("😴 Nghỉ ngơi", "OK! Hẹn gặp bạn ngày mai!")
-        else:
-            # Nhắc lại sau - reset flag để nhắc lại
-            self.tracker.morning_reminded = False
-
-    def check_sleep_reminder(self, current_time: tuple):
-        """Kiểm tra nhắc ngủ"""
-        if self.tracker.sleep_reminded:
-            return
-
-        if current_time == CONFIG.sleep_reminder_time:
-            self.tracker.sleep_reminded = True
-            st = CONFIG.sleep_reminder_time
-            choice = send_alert_with_options(
-                "🌙 Đến giờ ngủ rồi!",
-                f"Đã {st[0]:02d}:{st[1]:02d} rồi!\\n\\nNgủ đủ giấc giúp:\\n- Tăng cường trí nhớ\\n- Phục hồi sức khỏe\\n- Giảm stress",
-                ["Đi ngủ 😴", "Thêm 30 phút", "Bỏ qua"]
-            )
-
-            if "Đi ngủ" in choice:
-                send_notification("😴 Chúc ngủ ngon!", "Hẹn gặp bạn sáng mai! 🌅")
-            elif "Thêm 30 phút" in choice:
-                self.tracker.sleep_reminded = False  # Will remind again
-                send_notification("⏰ Nhắc lại", "Sẽ nhắc lại sau 30 phút!")
-    
-    def check_eye_protection(self):
-        """Kiểm tra nhắc bảo vệ mắt"""
-        now = datetime.now()
-        
-        if minutes_since(self.tracker.last_eye_20_20_20) >= INTERVALS.eye_20_20_20:
-            send_notification("👁️ 20-20-20!", "Nhìn xa 6m trong 20 giây!")
-            self.tracker.last_eye_20_20_20 = now
-        
-        if minutes_since(self.tracker.last_blink) >= INTERVALS.blink:
-            send_notification("😊 Chớp mắt!", "Chớp mắt 15-20 lần để làm ẩm mắt!")
-            self.tracker.last_blink = now
-    
-    def check_basic_reminders(self):
-        """Kiểm tra nhắc cơ bản"""
-        now = datetime.now()
-        
-        if minutes_since(self.tracker.last_walk) >= INTERVALS.walk:
-            send_notification("🚶 Đứng dậy!", "Đi bộ vài bước nhé!")
-            self.tracker.last_walk = now
-        
-        if minutes_since(self.tracker.last_water) >= INTERVALS.water:
-            send_notification("💧 Uống nước!", "Uống một ly nước lọc nhé!")
-            self.tracker.last_water = now
-        
-        if minutes_since(self.tracker.last_toilet) >= INTERVALS.toilet:
-            send_notification("🚽 Đi toilet!", "Đi toilet một chút nhé!")
-            self.tracker.last_toilet = now
-    
-    def check_exercise_reminders(self):
-        """Kiểm tra nhắc bài tập"""
-        now = datetime.now()
-        
-        if minutes_since(self.tracker.last_posture) >= INTERVALS.posture:
-            send_exercise_dialog("🪑 Kiểm tra tư thế", POSTURE_CHECK)
-            self.tracker.last_posture = now
-        
-        if minutes_since(self.tracker.last_neck_stretch) >= INTERVALS.neck_stretch:
-            send_exercise_dialog("🧘 Giãn cổ vai", NECK_EXERCISES + "\n\n" + SHOULDER_EXERCISES)
-            self.tracker.last_neck_stretch = now
-        
-        if minutes_since(self.tracker.last_eye_exercise) >= INTERVALS.eye_exercise:
-            send_exercise_dialog("👁️ Bài tập mắt", EYE_EXERCISES)
-            self.tracker.last_eye_exercise = now
-        
-        if minutes_since(self.tracker.last_breathing) >= INTERVALS.breathing:
-            send_exercise_dialog("🌬️ Hít thở", BREATHING_EXERCISES)
-            self.tracker.last_breathing = now
 
 
 def main():
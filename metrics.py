@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Metrics - Counter / histogram rẻ cho các đường nóng
+===================================================
+Số liệu dùng chung trong process, xuất ra dạng text Prometheus qua
+GET /metrics của bridge. Histogram có bucket cố định: observe() chỉ là một
+bisect và vài phép cộng dưới lock, nên để bật vĩnh viễn trong vòng lặp
+nhắc nhở và update_status (~1 µs mỗi lần).
+
+Thread liveness: watch_thread() đăng ký thread, beat() ghi nhịp tim; lúc
+scrape mới tính alive / tuổi nhịp tim.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Bucket mặc định (giây)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DRIFT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 15.0, 30.0, 60.0, 300.0)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Bộ đếm tăng dần, theo nhãn"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labels, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram:
+    """Histogram bucket cố định: đếm không tích luỹ, cộng dồn lúc render"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.bounds = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # nhãn -> [đếm từng bucket (+Inf ở cuối), tổng]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, labels: Tuple = ()):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.bounds) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def count(self, labels: Tuple = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        lines = []
+        names = self.labels + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.bounds + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Tập metric của process + thread được theo dõi"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._threads: Dict[str, threading.Thread] = {}
+        self._beats: Dict[str, float] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def watch_thread(self, name: str, thread: threading.Thread):
+        self._threads[name] = thread
+
+    def beat(self, name: str):
+        """Nhịp tim của một vòng lặp (gán dict: không cần lock)"""
+        self._beats[name] = time.monotonic()
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Hàm trả thêm các dòng text lúc scrape (gauge tính tại chỗ)"""
+        self._collectors.append(collector)
+
+    def thread_samples(self) -> List[str]:
+        now = time.monotonic()
+        lines = ["# HELP whr_thread_alive Thread nền còn chạy (1) hay đã chết (0)",
+                 "# TYPE whr_thread_alive gauge"]
+        for name, thread in sorted(self._threads.items()):
+            lines.append(f'whr_thread_alive{{thread="{name}"}} {int(thread.is_alive())}')
+        lines += ["# HELP whr_thread_heartbeat_age_seconds Số giây từ nhịp tim gần nhất của vòng lặp",
+                  "# TYPE whr_thread_heartbeat_age_seconds gauge"]
+        for name, beat in sorted(self._beats.items()):
+            lines.append(f'whr_thread_heartbeat_age_seconds{{thread="{name}"}} {now - beat:.3f}')
+        return lines
+
+    def render(self) -> str:
+        """Toàn bộ metric theo định dạng text Prometheus 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        lines.extend(self.thread_samples())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                lines.append(f"# collector error: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ============================================
+# METRIC CỦA APP
+# ============================================
+
+REMINDERS_FIRED = REGISTRY.counter(
+    "whr_reminders_fired_total", "Số nhắc nhở đã bắn theo loại", ("type",))
+NOTIFY_LATENCY = REGISTRY.histogram(
+    "whr_notification_seconds", "Thời gian gửi thông báo / mở dialog", ("kind", "backend"),
+    buckets=LATENCY_BUCKETS + (10.0, 30.0, 60.0, 120.0))
+TICK_DURATION = REGISTRY.histogram(
+    "whr_reminder_tick_seconds", "Thời gian một lượt của vòng lặp nhắc nhở")
+UPDATE_STATUS_DURATION = REGISTRY.histogram(
+    "whr_update_status_seconds", "Thời gian một lần update_status của menubar")
+SCHEDULE_DRIFT = REGISTRY.histogram(
+    "whr_schedule_drift_seconds", "Độ trễ bắn nhắc nhở so với hạn chót dự kiến", ("type",),
+    buckets=DRIFT_BUCKETS)
+HTTP_LATENCY = REGISTRY.histogram(
+    "whr_http_request_seconds", "Thời gian xử lý request HTTP theo route", ("route", "method"),
+    buckets=LATENCY_BUCKETS + (10.0, 30.0, 60.0))
+HTTP_REQUESTS = REGISTRY.counter(
+    "whr_http_requests_total", "Số request HTTP theo route và mã trả về", ("route", "status"))
+EVENT_STORE_FLUSH = REGISTRY.histogram(
+    "whr_event_store_flush_seconds", "Thời gian ghi một lô sự kiện lịch sử xuống SQLite")
+
+
+def timed(histogram: Histogram, labels: Tuple = ()):
+    """Context manager đo thời gian một khối code"""
+    return _Timer(histogram, labels)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+        self.started: Optional[float] = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.labels)
+        return False
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Notifier - Gửi thông báo / dialog trên macOS
+============================================
+Các hàm osascript dùng chung cho mọi front-end, và các notifier backend
+(osascript, notify-send, win10toast, stdout, bộ nhớ) để truyền vào
+ReminderEngine. Chọn backend một lần lúc khởi động bằng create_notifier().
+"""
+
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from metrics import NOTIFY_LATENCY
+from notify_helper import NotifyCoprocess
+
+# Dùng helper process sống lâu thay vì fork osascript cho mỗi thông báo
+USE_NOTIFY_HELPER = True
+
+_helper: Optional[NotifyCoprocess] = None
+_helper_lock = threading.Lock()
+
+
+def get_notify_helper() -> Optional[NotifyCoprocess]:
+    """Helper dùng chung (khởi tạo lần đầu khi cần)"""
+    global _helper
+    if not USE_NOTIFY_HELPER:
+        return None
+    with _helper_lock:
+        if _helper is None:
+            _helper = NotifyCoprocess()
+        return _helper
+
+
+def _quote(text: str) -> str:
+    """Escape cho chuỗi AppleScript "...": text giữ xuống dòng thật, chỉ escape ở đây"""
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def send_notification(title: str, message: str, sound: bool = True):
+    """Gửi thông báo macOS"""
+    helper = get_notify_helper()
+    if helper is not None and helper.send(title, message, sound):
+        return
+
+    # Fallback: một osascript cho mỗi thông báo
+    sound_cmd = 'sound name "Glass"' if sound else ''
+    script = f'''
+    display notification "{_quote(message)}" with title "{_quote(title)}" {sound_cmd}
+    '''
+    subprocess.run(['osascript', '-e', script], capture_output=True)
+
+
+def _giving_up(timeout: Optional[int]) -> str:
+    return f" giving up after {int(timeout)}" if timeout else ""
+
+
+def _run_dialog(script: str, timeout: Optional[int]) -> str:
+    """Chạy dialog osascript; chuỗi rỗng nếu hết giờ / lỗi"""
+    try:
+        result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True,
+                                timeout=timeout + 10 if timeout else None)
+    except subprocess.TimeoutExpired:
+        return ""
+    if "gave up:true" in result.stdout:
+        return ""
+    return result.stdout
+
+
+def send_exercise_dialog(title: str, content: str, timeout: Optional[int] = None) -> bool:
+    """Hiển thị dialog bài tập, trả về True nếu người dùng bấm "Đã làm".
+
+    timeout (giây): tự đóng dialog và coi như "Bỏ qua".
+    """
+    script = f'''
+    display dialog "{_quote(content)}" with title "{_quote(title)}" buttons {{"Đã làm ✓", "Bỏ qua"}} default button 1{_giving_up(timeout)}
+    '''
+    return "Đã làm" in _run_dialog(script, timeout)
+
+
+def send_alert_with_options(title: str, message: str, options: list,
+                            timeout: Optional[int] = None, default: Optional[str] = None) -> str:
+    """Hiển thị dialog với lựa chọn.
+
+    timeout (giây): tự đóng dialog và trả về default (mặc định: nút đầu).
+    """
+    options_str = ', '.join([f'"{_quote(opt)}"' for opt in options])
+    script = f'''
+    display dialog "{_quote(message)}" with title "{_quote(title)}" buttons {{{options_str}}} default button 1{_giving_up(timeout)}
+    '''
+    output = _run_dialog(script, timeout).strip()
+    for opt in options:
+        if opt in output:
+            return opt
+    return default or options[0]
+
+
+# ============================================
+# NOTIFIER BACKENDS
+# ============================================
+
+class BaseNotifier:
+    """Giao diện notifier cho ReminderEngine: notify / exercise / choose.
+
+    Lớp con cài đặt _notify, _exercise, _choose; lớp gốc đo độ trễ từng lời
+    gọi theo loại (notify, exercise, choose).
+    """
+
+    name = "base"
+
+    def __init__(self, echo: bool = False):
+        # echo=True: in thêm ra terminal (bản terminal)
+        self.echo = echo
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, dict] = {}
+
+    def notify(self, title: str, message: str, sound: bool = True):
+        started = time.perf_counter()
+        self._notify(title, message, sound)
+        self._record("notify", started)
+        if self.echo:
+            print(f"🔔 [{datetime.now().strftime('%H:%M:%S')}] {title}: {message}")
+
+    def exercise(self, title: str, content: str, timeout: Optional[int] = None) -> bool:
+        started = time.perf_counter()
+        done = self._exercise(title, content, timeout)
+        self._record("exercise", started)
+        if self.echo:
+            print(f"📋 [{datetime.now().strftime('%H:%M:%S')}] {title}")
+        return done
+
+    def choose(self, title: str, message: str, options: list,
+               timeout: Optional[int] = None, default: Optional[str] = None) -> str:
+        """Dialog lựa chọn; hết timeout giây thì trả về default (mặc định: nút đầu)"""
+        started = time.perf_counter()
+        choice = self._choose(title, message, options, timeout, default)
+        self._record("choose", started)
+        return choice
+
+    # Mặc định cho backend không có dialog: bỏ qua bài tập, chọn nút đầu
+    def _notify(self, title: str, message: str, sound: bool):
+        raise NotImplementedError
+
+    def _exercise(self, title: str, content: str, timeout: Optional[int]) -> bool:
+        self._notify(title, content.split("\n", 1)[0], False)
+        return False
+
+    def _choose(self, title: str, message: str, options: list,
+                timeout: Optional[int], default: Optional[str]) -> str:
+        self._notify(title, message, True)
+        return default or options[0]
+
+    def _record(self, kind: str, started: float):
+        latency = time.perf_counter() - started
+        NOTIFY_LATENCY.observe(latency, (kind, self.name))
+        with self._stats_lock:
+            s = self.stats.setdefault(kind, {"calls": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+            s["calls"] += 1
+            s["total"] += latency
+            s["last"] = latency
+            s["max"] = max(s["max"], latency)
+
+    def metrics(self) -> Dict[str, dict]:
+        """Độ trễ theo loại lời gọi (ms)"""
+        with self._stats_lock:
+            return {kind: {
+                "calls": s["calls"],
+                "latency_avg_ms": s["total"] / s["calls"] * 1000,
+                "latency_max_ms": s["max"] * 1000,
+                "latency_last_ms": s["last"] * 1000,
+            } for kind, s in self.stats.items()}
+
+
+class OsascriptNotifier(BaseNotifier):
+    """macOS: thông báo qua helper/osascript, dialog qua osascript"""
+
+    name = "osascript"
+
+    def _notify(self, title: str, message: str, sound: bool):
+        send_notification(title, message, sound)
+
+    def _exercise(self, title: str, content: str, timeout: Optional[int]) -> bool:
+        return send_exercise_dialog(title, content, timeout)
+
+    def _choose(self, title: str, message: str, options: list,
+                timeout: Optional[int], default: Optional[str]) -> str:
+        return send_alert_with_options(title, message, options, timeout, default)
+
+
+class NotifySendNotifier(BaseNotifier):
+    """Linux (freedesktop): notify-send gửi qua D-Bus, dialog bằng zenity nếu có"""
+
+    name = "notify-send"
+
+    def __init__(self, echo: bool = False):
+        super().__init__(echo)
+        self.notify_send = shutil.which("notify-send")
+        self.zenity = shutil.which("zenity")
+
+    def _notify(self, title: str, message: str, sound: bool):
+        subprocess.run([self.notify_send or "notify-send", "--app-name=Work Health Reminder",
+                        title, message], capture_output=True)
+
+    def _zenity(self, args: list, timeout: Optional[int]) -> subprocess.CompletedProcess:
+        if timeout:
+            args = args + [f"--timeout={int(timeout)}"]
+        return subprocess.run([self.zenity, *args], capture_output=True, text=True)
+
+    def _exercise(self, title: str, content: str, timeout: Optional[int]) -> bool:
+        if not self.zenity:
+            return super()._exercise(title, content, timeout)
+        result = self._zenity(["--question", f"--title={title}", f"--text={content}",
+                               "--ok-label=Đã làm ✓", "--cancel-label=Bỏ qua"], timeout)
+        return result.returncode == 0
+
+    def _choose(self, title: str, message: str, options: list,
+                timeout: Optional[int], default: Optional[str]) -> str:
+        if not self.zenity:
+            return super()._choose(title, message, options, timeout, default)
+        result = self._zenity(["--list", f"--title={title}", f"--text={message}",
+                               "--column=", *options], timeout)
+        output = result.stdout.strip()
+        return output if output in options else default or options[0]
+
+
+class Win10ToastNotifier(BaseNotifier):
+    """Windows: toast qua win10toast"""
+
+    name = "win10toast"
+
+    def __init__(self, echo: bool = False):
+        super().__init__(echo)
+        from win10toast import ToastNotifier
+        self.toaster = ToastNotifier()
+
+    def _notify(self, title: str, message: str, sound: bool):
+        self.toaster.show_toast(title, message, duration=5, threaded=True)
+
+
+class StdoutNotifier(BaseNotifier):
+    """In thông báo ra terminal (headless / máy build)"""
+
+    name = "stdout"
+
+    def __init__(self, echo: bool = False):
+        # Backend này đã in ra terminal, không cần echo
+        super().__init__(False)
+
+    def _notify(self, title: str, message: str, sound: bool):
+        print(f"🔔 [{datetime.now().strftime('%H:%M:%S')}] {title}: {message}")
+
+
+class RecordingNotifier(BaseNotifier):
+    """Ghi lại mọi lời gọi trong bộ nhớ (test, benchmark)"""
+
+    name = "memory"
+
+    def __init__(self, echo: bool = False, answers: Optional[Dict[str, str]] = None):
+        super().__init__(echo)
+        # title -> lựa chọn trả lời cho choose (mặc định nút đầu)
+        self.answers = answers or {}
+        self.calls: List[tuple] = []
+
+    def _notify(self, title: str, message: str, sound: bool):
+        self.calls.append(("notify", title, message))
+
+    def _exercise(self, title: str, content: str, timeout: Optional[int]) -> bool:
+        self.calls.append(("exercise", title, content))
+        return True
+
+    def _choose(self, title: str, message: str, options: list,
+                timeout: Optional[int], default: Optional[str]) -> str:
+        self.calls.append(("choose", title, message))
+        return self.answers.get(title, default or options[0])
+
+
+NOTIFIER_BACKENDS = {
+    "osascript": OsascriptNotifier,
+    "notify-send": NotifySendNotifier,
+    "win10toast": Win10ToastNotifier,
+    "stdout": StdoutNotifier,
+    "memory": RecordingNotifier,
+}
+
+
+def default_notifier_name() -> str:
+    """Chọn backend theo nền tảng (gọi một lần lúc khởi động)"""
+    if sys.platform == "darwin":
+        return "osascript"
+    if sys.platform.startswith("win"):
+        return "win10toast" if importlib.util.find_spec("win10toast") else "stdout"
+    if shutil.which("notify-send") and (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        return "notify-send"
+    return "stdout"
+
+
+def create_notifier(name: Optional[str] = None, echo: bool = False) -> BaseNotifier:
+    """Tạo notifier: name > biến môi trường WHR_NOTIFIER > tự chọn theo nền tảng"""
+    name = name or os.environ.get("WHR_NOTIFIER") or default_notifier_name()
+    if name not in NOTIFIER_BACKENDS:
+        print(f"Unknown notifier backend {name!r}, using stdout")
+        name = "stdout"
+    try:
+        return NOTIFIER_BACKENDS[name](echo=echo)
+    except ImportError as e:
+        print(f"Notifier backend {name!r} unavailable ({e}), using stdout")
+        return StdoutNotifier()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Notify Helper - Co-process gửi thông báo
+========================================
+Thay vì fork một `osascript` cho mỗi thông báo, app giữ một helper process
+sống lâu và gửi yêu cầu qua stdin, mỗi dòng một JSON:
+
+    {"id": 1, "title": "💧 Uống nước!", "message": "...", "sound": true}
+
+Helper trả lời mỗi yêu cầu bằng một dòng JSON trên stdout:
+
+    {"id": 1, "ok": true}
+
+Backend:
+- "jxa":    `osascript -l JavaScript` chạy một lần, gọi displayNotification (macOS)
+- "python": chính file này (`python3 notify_helper.py`), in thông báo ra
+            stderr - dùng thay thế trên Linux / khi test
+"""
+
+import json
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Script JXA: đọc stdin theo dòng, hiển thị notification, ghi ack ra stdout
+JXA_HELPER_SCRIPT = r'''
+ObjC.import('Foundation');
+var app = Application.currentApplication();
+app.includeStandardAdditions = true;
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+function reply(obj) {
+    var line = $(JSON.stringify(obj) + "\n");
+    stdout.writeData(line.dataUsingEncoding($.NSUTF8StringEncoding));
+}
+var buffer = "";
+while (true) {
+    var data = stdin.availableData;
+    if (data.length === 0) { break; }
+    buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+    var lines = buffer.split("\n");
+    buffer = lines.pop();
+    for (var i = 0; i < lines.length; i++) {
+        if (!lines[i]) { continue; }
+        var req = {};
+        try {
+            req = JSON.parse(lines[i]);
+            var opts = { withTitle: req.title || "" };
+            if (req.sound) { opts.soundName = "Glass"; }
+            app.displayNotification(req.message || "", opts);
+            reply({ id: req.id, ok: true });
+        } catch (e) {
+            reply({ id: req.id, ok: false, error: String(e) });
+        }
+    }
+}
+'''
+
+
+def helper_command(backend: str) -> List[str]:
+    """Lệnh khởi chạy helper cho backend"""
+    if backend == "jxa":
+        return ["osascript", "-l", "JavaScript", "-e", JXA_HELPER_SCRIPT]
+    return [sys.executable, "-u", __file__]
+
+
+def default_backend() -> str:
+    return "jxa" if sys.platform == "darwin" else "python"
+
+
+class NotifyCoprocess:
+    """Client của helper: ghi JSON lines, đọc ack, tự khởi động lại khi lỗi"""
+
+    def __init__(self, backend: Optional[str] = None, max_restarts: int = 5,
+                 restart_window: float = 60.0):
+        self.backend = backend or default_backend()
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._next_id = 0
+        self._pending: Dict[int, float] = {}
+        self._restarts: List[float] = []
+
+        # Metrics
+        self.sent = 0
+        self.acked = 0
+        self.errors = 0
+        self.lost = 0
+        self.restarts = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    # ---------- Vòng đời ----------
+
+    def _start_locked(self):
+        self._proc = subprocess.Popen(
+            helper_command(self.backend),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        reader = threading.Thread(target=self._read_acks, args=(self._proc,),
+                                  name="notify-helper-reader", daemon=True)
+        reader.start()
+
+    def _ensure_running_locked(self) -> bool:
+        if self._proc is not None and self._proc.poll() is None:
+            return True
+
+        # Giới hạn số lần khởi động lại trong một khoảng thời gian
+        now = time.monotonic()
+        self._restarts = [t for t in self._restarts if now - t < self.restart_window]
+        if len(self._restarts) >= self.max_restarts:
+            return False
+        if self._proc is not None:
+            self.restarts += 1
+        # Helper cũ đã chết: thông báo chưa ack sẽ không bao giờ được ack
+        self._drop_pending_locked()
+        self._restarts.append(now)
+        try:
+            self._start_locked()
+            return True
+        except OSError as e:
+            print(f"Could not start notify helper: {e}")
+            self._proc = None
+            return False
+
+    def _drop_pending_locked(self):
+        self.lost += len(self._pending)
+        self._pending.clear()
+
+    def close(self):
+        with self._lock:
+            proc, self._proc = self._proc, None
+            self._drop_pending_locked()
+        if proc is not None:
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=2)
+            except Exception:
+                proc.kill()
+
+    # ---------- Gửi / nhận ----------
+
+    def send(self, title: str, message: str, sound: bool = True) -> bool:
+        """Gửi một thông báo; False nếu helper không chạy được (caller tự fallback)"""
+        with self._lock:
+            for _ in range(2):  # thử lại một lần với helper mới
+                if not self._ensure_running_locked():
+                    return False
+                self._next_id += 1
+                request = {"id": self._next_id, "title": title, "message": message, "sound": sound}
+                line = (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+                try:
+                    self._proc.stdin.write(line)
+                    self._proc.stdin.flush()
+                    self._pending[self._next_id] = time.monotonic()
+                    self.sent += 1
+                    return True
+                except (BrokenPipeError, OSError, ValueError):
+                    self.errors += 1
+                    self._proc.kill()
+            return False
+
+    def _read_acks(self, proc: subprocess.Popen):
+        for raw in proc.stdout:
+            try:
+                reply = json.loads(raw.decode("utf-8"))
+            except ValueError:
+                continue
+            with self._lock:
+                started = self._pending.pop(reply.get("id"), None)
+                if started is None:
+                    continue  # ack muộn của helper đã bị thay
+                if not reply.get("ok"):
+                    self.errors += 1
+                    continue
+                self.acked += 1
+                latency = time.monotonic() - started
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            acked = self.acked or 1
+            return {
+                "backend": self.backend,
+                "sent": self.sent,
+                "acked": self.acked,
+                "pending": len(self._pending),
+                "errors": self.errors,
+                "lost": self.lost,
+                "restarts": self.restarts,
+                "latency_avg_ms": self.latency_total / acked * 1000,
+                "latency_max_ms": self.latency_max * 1000,
+            }
+
+
+# ============================================
+# PYTHON STAND-IN HELPER
+# ============================================
+
+def main():
+    """Helper thay thế bằng Python: in thông báo ra stderr, ack ra stdout"""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request = {}
+        try:
+            request = json.loads(line)
+            sys.stderr.write(f"🔔 {request.get('title', '')}: {request.get('message', '')}\n")
+            reply = {"id": request.get("id"), "ok": True}
+        except ValueError as e:
+            reply = {"id": request.get("id"), "ok": False, "error": str(e)}
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
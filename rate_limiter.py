@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter - Giới hạn số thông báo theo độ ưu tiên
+====================================================
+Token bucket đứng trước mọi thông báo do engine bắn ra: ngân sách chung
+N thông báo / giờ, mỗi loại nhắc nhở có độ ưu tiên riêng.
+
+- HIGH   (mốc giờ cố định, dialog lựa chọn): luôn được gửi
+- NORMAL (đi bộ, uống nước, bài tập...): cần còn ít nhất 1 token
+- LOW    (chớp mắt): một mình thì chỉ gửi nếu sau đó bucket còn ít nhất nửa; nếu cùng
+         lượt có thông báo khác được gửi thì gộp chung (không tốn thêm token)
+
+Các nhắc nhở bị bỏ / bị gộp được đếm theo key để xem trong metrics().
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from clock import SYSTEM_CLOCK
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+# key -> độ ưu tiên (key không có trong bảng: HIGH)
+REMINDER_PRIORITIES = {
+    "blink": PRIORITY_LOW,
+    "eye_20_20_20": PRIORITY_NORMAL,
+    "walk": PRIORITY_NORMAL,
+    "water": PRIORITY_NORMAL,
+    "toilet": PRIORITY_NORMAL,
+    "posture": PRIORITY_NORMAL,
+    "neck_stretch": PRIORITY_NORMAL,
+    "eye_exercise": PRIORITY_NORMAL,
+    "breathing": PRIORITY_NORMAL,
+}
+
+
+def priority_of(event) -> int:
+    if event.style == "choice":
+        return PRIORITY_HIGH
+    return REMINDER_PRIORITIES.get(event.key, PRIORITY_HIGH)
+
+
+class NotificationRateLimiter:
+    """Token bucket: per_hour token / giờ, tối đa burst token dồn lại"""
+
+    def __init__(self, per_hour: int = 30, burst: Optional[int] = None, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._last_refill: Optional[datetime] = None
+        self.configure(per_hour, burst)
+
+        # Metrics
+        self.allowed = 0
+        self.suppressed: Dict[str, int] = {}
+        self.merged: Dict[str, int] = {}
+
+    def configure(self, per_hour: int, burst: Optional[int] = None):
+        """Đổi ngân sách (per_hour <= 0: không giới hạn)"""
+        with self._lock:
+            self.per_hour = per_hour
+            # Mặc định cho dồn tối đa ~10 phút ngân sách
+            self.burst = burst or max(2, per_hour // 6)
+            self.tokens = float(self.burst)
+
+    def _refill_locked(self, now: datetime):
+        if self._last_refill is not None and now > self._last_refill:
+            elapsed = (now - self._last_refill).total_seconds()
+            self.tokens = min(self.burst, self.tokens + elapsed * self.per_hour / 3600)
+        self._last_refill = now
+
+    def filter(self, events: list, now: Optional[datetime] = None) -> list:
+        """Lọc các sự kiện của một lượt theo ngân sách, giữ nguyên thứ tự.
+
+        Tính token theo lần hiển thị: các thông báo định kỳ cùng lượt được
+        gộp thành một (coalesce_events) nên chỉ tốn một token, bài tập cũng vậy.
+        """
+        if self.per_hour <= 0 or not events:
+            self.allowed += len(events)
+            return events
+
+        # Nhóm theo lần hiển thị: mỗi sự kiện HIGH một nhóm, thông báo / bài tập
+        # định kỳ mỗi loại một nhóm
+        groups: Dict[object, list] = {}
+        for i, event in enumerate(events):
+            if priority_of(event) == PRIORITY_HIGH:
+                groups[i] = [i]
+            else:
+                groups.setdefault(event.style, []).append(i)
+
+        with self._lock:
+            self._refill_locked(now or self.clock.now())
+            keep = set()
+            # Xét ưu tiên cao trước để LOW không ăn mất token của HIGH
+            ranked = sorted(groups.values(), key=lambda g: -max(priority_of(events[i]) for i in g))
+            for group in ranked:
+                priority = max(priority_of(events[i]) for i in group)
+                if (priority == PRIORITY_HIGH
+                        or (priority == PRIORITY_NORMAL and self.tokens >= 1)
+                        or (priority == PRIORITY_LOW and self.tokens - 1 >= self.burst / 2)):
+                    self.tokens = max(self.tokens - 1, 0.0)
+                    keep.update(group)
+                    if priority > PRIORITY_LOW:
+                        # LOW đi kèm nhóm đã được gửi: gộp chung, không tốn thêm
+                        for i in group:
+                            if priority_of(events[i]) == PRIORITY_LOW:
+                                key = events[i].key
+                                self.merged[key] = self.merged.get(key, 0) + 1
+
+            result = []
+            for i, event in enumerate(events):
+                if i in keep:
+                    result.append(event)
+                else:
+                    self.suppressed[event.key] = self.suppressed.get(event.key, 0) + 1
+            self.allowed += len(result)
+            return result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "per_hour": self.per_hour,
+                "burst": self.burst,
+                "tokens": round(self.tokens, 2),
+                "allowed": self.allowed,
+                "suppressed": dict(self.suppressed),
+                "merged": dict(self.merged),
+                "suppressed_total": sum(self.suppressed.values()),
+            }
+
+    def summary(self) -> str:
+        """Một dòng cho menu: số nhắc nhở bị bỏ từ lúc mở app, nhiều nhất trước"""
+        with self._lock:
+            suppressed = sorted(self.suppressed.items(), key=lambda item: (-item[1], item[0]))
+        total = sum(n for _, n in suppressed)
+        if not total:
+            return "Bỏ qua do ngân sách: 0"
+        return f"Bỏ qua do ngân sách: {total} ({', '.join(f'{key} {n}' for key, n in suppressed)})"
+
+    def samples(self) -> List[str]:
+        """metrics() dạng text Prometheus"""
+        m = self.metrics()
+        lines = [
+            "# HELP whr_rate_limit_tokens Token còn lại trong bucket",
+            "# TYPE whr_rate_limit_tokens gauge",
+            f"whr_rate_limit_tokens {m['tokens']}",
+            "# HELP whr_rate_limit_budget_per_hour Ngân sách thông báo mỗi giờ (0 = không giới hạn)",
+            "# TYPE whr_rate_limit_budget_per_hour gauge",
+            f"whr_rate_limit_budget_per_hour {m['per_hour']}",
+            "# HELP whr_rate_limit_allowed_total Số nhắc nhở được gửi qua bộ giới hạn",
+            "# TYPE whr_rate_limit_allowed_total counter",
+            f"whr_rate_limit_allowed_total {m['allowed']}",
+        ]
+        for name, help, counts in (
+                ("whr_rate_limit_suppressed_total", "Số nhắc nhở bị bỏ do vượt ngân sách", m["suppressed"]),
+                ("whr_rate_limit_merged_total", "Số nhắc nhở ưu tiên thấp được gộp vào thông báo khác",
+                 m["merged"])):
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+            lines += [f'{name}{{type="{key}"}} {n}' for key, n in sorted(counts.items())]
+        return lines
@@ -0,0 +1,827 @@
+#!/usr/bin/env python3
+"""
+Reminder Engine - Logic lịch nhắc nhở dùng chung
+================================================
+Một engine duy nhất cho menubar_app.py, reminder_pro.py, reminder.py và
+reminder_gui.py: giờ làm việc, nghỉ trưa, ngày nghỉ, các nhắc nhở định kỳ
+và các mốc giờ cố định. Engine nhận clock và notifier từ bên ngoài và trả
+về các sự kiện đến hạn; front-end chỉ lo hiển thị.
+"""
+
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from clock import SYSTEM_CLOCK
+
+from exercises import (
+    NECK_EXERCISES, SHOULDER_EXERCISES, EYE_EXERCISES,
+    BREATHING_EXERCISES, POSTURE_CHECK
+)
+from scheduler import (
+    MIN_INTERVAL, DeadlineScheduler, next_minute, next_occurrence, schedule_interval_reminders,
+    cancel_interval_reminders, schedule_special_times
+)
+from rate_limiter import NotificationRateLimiter
+from metrics import REGISTRY, REMINDERS_FIRED, SCHEDULE_DRIFT, TICK_DURATION, timed
+from timeline import TimelineCache, compile_day, WORK, LUNCH, MORNING
+from snapshot import SnapshotCell
+
+
+# ============================================
+# CẤU HÌNH
+# ============================================
+
+@dataclass(frozen=True)
+class WorkConfig:
+    # Giờ làm việc
+    work_start: tuple = (8, 0)
+    lunch_start: tuple = (11, 30)
+    work_resume: tuple = (13, 0)
+    work_end: tuple = (17, 30)
+    night_mode_start: tuple = (18, 0)
+
+    # Cấu hình mới
+    sleep_reminder_time: tuple = (23, 0)
+    weekend_mode: str = "mon_fri"  # mon_fri, mon_sat_full, mon_sat_half, mon_sun_full, mon_sun_half
+    saturday_end: tuple = (12, 0)
+    sunday_end: tuple = (12, 0)
+    is_configured: bool = False
+    morning_reminder_start: tuple = (7, 30)
+
+    # Pomodoro
+    pomodoro_work: int = 25
+    pomodoro_break: int = 5
+    pomodoro_long_break: int = 15
+
+    # Gộp nhắc nhở: các reminder đến hạn trong vòng N phút được gộp chung
+    coalesce_window: int = 2
+
+    # Ngân sách thông báo mỗi giờ (0 = không giới hạn), xem rate_limiter.py
+    notifications_per_hour: int = 30
+
+    # Dialog tự đóng sau N giây và dùng câu trả lời mặc định (0 = chờ mãi)
+    dialog_timeout: int = 120
+
+
+@dataclass(frozen=True)
+class ReminderInterval:
+    # Based on scientific recommendations
+    walk: int = 30           # Columbia University: 5-min walk every 30 min
+    water: int = 30          # Hydration experts: drink regularly every 20-30 min
+    toilet: int = 60
+    eye_20_20_20: int = 20   # AAO 20-20-20 rule: every 20 min
+    blink: int = 2           # Research: blink reminder every 1-2 min during screen use
+    posture: int = 20        # Cornell 20-8-2 rule: check posture every 20 min
+    neck_stretch: int = 30   # Ergonomics: stretch every 20-30 min
+    eye_exercise: int = 90
+    breathing: int = 120
+
+
+def clamp_intervals(intervals: ReminderInterval) -> ReminderInterval:
+    """Chu kỳ < MIN_INTERVAL phút được nâng lên MIN_INTERVAL"""
+    changes = {f.name: MIN_INTERVAL for f in fields(intervals)
+               if getattr(intervals, f.name) < MIN_INTERVAL}
+    if not changes:
+        return intervals
+    print(f"Interval quá ngắn, dùng {MIN_INTERVAL} phút: {', '.join(sorted(changes))}")
+    return replace(intervals, **changes)
+
+
+# ============================================
+# TRACKER
+# ============================================
+
+@dataclass(frozen=True)
+class TrackerState:
+    """Snapshot bất biến của tracker; thay đổi bằng replace() qua ReminderTracker"""
+    last_walk: Optional[datetime] = None
+    last_water: Optional[datetime] = None
+    last_toilet: Optional[datetime] = None
+    last_eye_20_20_20: Optional[datetime] = None
+    last_blink: Optional[datetime] = None
+    last_posture: Optional[datetime] = None
+    last_neck_stretch: Optional[datetime] = None
+    last_eye_exercise: Optional[datetime] = None
+    last_breathing: Optional[datetime] = None
+
+    is_paused: bool = False
+    night_mode_reminded: bool = False
+
+    # Trạng thái mới
+    sleep_reminded: bool = False
+    morning_reminded: bool = False
+    work_started_today: bool = False
+
+    # Focus mode
+    focus_end_time: Optional[datetime] = None
+
+    # Pomodoro
+    pomodoro_state: Optional[str] = None  # "work", "break", None
+    pomodoro_end_time: Optional[datetime] = None
+    pomodoro_count: int = 0
+
+    def reset_all(self, now: datetime) -> "TrackerState":
+        changes = {f"last_{key}": now for key in INTERVAL_KEYS}
+        return replace(self, night_mode_reminded=False, **changes)
+
+    def reset_daily(self) -> "TrackerState":
+        """Reset các flag hàng ngày (gọi lúc 00:00)"""
+        return replace(self, night_mode_reminded=False, sleep_reminded=False,
+                       morning_reminded=False, work_started_today=False, pomodoro_count=0)
+
+    def is_focus_active(self, now: datetime) -> bool:
+        """Kiểm tra Focus Mode đang bật"""
+        return self.focus_end_time is not None and now < self.focus_end_time
+
+    def is_pomodoro_active(self) -> bool:
+        """Kiểm tra Pomodoro đang chạy"""
+        return self.pomodoro_state is not None
+
+
+TRACKER_FIELDS = frozenset(f.name for f in fields(TrackerState))
+
+
+class ReminderTracker:
+    """Tracker dùng chung giữa thread menu và thread nhắc nhở.
+
+    Đọc: tracker.state (snapshot nhất quán) hoặc tracker.last_walk... (field
+    của snapshot hiện tại), không lock. Ghi: update() / submit() / reset_*(),
+    đi qua một hàng đợi lệnh duy nhất (xem snapshot.py).
+    """
+
+    def __init__(self, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self._cell = SnapshotCell(TrackerState().reset_all(clock.now()))
+
+    @property
+    def state(self) -> TrackerState:
+        return self._cell.get()
+
+    @property
+    def generation(self) -> int:
+        return self._cell.generation
+
+    def read(self) -> Tuple[int, TrackerState]:
+        """(generation, snapshot) nhất quán với nhau"""
+        return self._cell.read()
+
+    def __getattr__(self, name):
+        # Chỉ gọi khi không tìm thấy thuộc tính thường: đọc field của snapshot
+        if name in TRACKER_FIELDS:
+            return getattr(self._cell.get(), name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name in TRACKER_FIELDS:
+            raise AttributeError(f"tracker is immutable, use tracker.update({name}=...)")
+        super().__setattr__(name, value)
+
+    def submit(self, command: Callable[[TrackerState], TrackerState]) -> TrackerState:
+        return self._cell.submit(command)
+
+    def update(self, **changes) -> TrackerState:
+        """Đổi một số field trong một lần ghi"""
+        return self._cell.submit(lambda state: replace(state, **changes))
+
+    def reset_all(self, now: Optional[datetime] = None) -> TrackerState:
+        now = now or self.clock.now()
+        return self._cell.submit(lambda state: state.reset_all(now))
+
+    def reset_daily(self) -> TrackerState:
+        return self._cell.submit(TrackerState.reset_daily)
+
+    def is_focus_active(self, now: Optional[datetime] = None) -> bool:
+        return self.state.is_focus_active(now or self.clock.now())
+
+    def is_pomodoro_active(self) -> bool:
+        return self.state.is_pomodoro_active()
+
+
+# ============================================
+# SỰ KIỆN NHẮC NHỞ
+# ============================================
+
+@dataclass
+class ReminderEvent:
+    """Một nhắc nhở đến hạn, front-end chỉ việc hiển thị"""
+    key: str                  # walk, water, lunch_start, work_end...
+    title: str
+    message: str
+    style: str = "notification"   # notification, exercise, choice
+    options: List[str] = field(default_factory=list)
+    sound: bool = True
+    due: Optional[datetime] = None
+    parts: List[str] = field(default_factory=list)   # các key đã gộp vào sự kiện này
+    default: Optional[str] = None   # câu trả lời khi dialog hết giờ (mặc định: nút đầu)
+
+
+# Thứ tự kiểm tra giống bản menubar: mắt → cơ bản → bài tập
+INTERVAL_KEYS = (
+    "eye_20_20_20", "blink",
+    "walk", "water", "toilet",
+    "posture", "neck_stretch", "eye_exercise", "breathing",
+)
+
+# Các field WorkConfig quyết định khung giờ làm việc trong ngày (timeline)
+TIMELINE_FIELDS = (
+    "work_start", "lunch_start", "work_resume", "work_end", "weekend_mode",
+    "saturday_end", "sunday_end", "morning_reminder_start",
+)
+
+SPECIAL_KEYS = ("morning", "lunch_start", "work_resume", "work_end", "night_mode", "sleep")
+
+# key -> (style, title, message)
+REMINDER_CATALOG = {
+    "eye_20_20_20": ("notification", "👁️ 20-20-20!", "Nhìn xa 6m trong 20 giây!"),
+    "blink": ("notification", "😊 Chớp mắt!", "Chớp mắt 15-20 lần để làm ẩm mắt!"),
+    "walk": ("notification", "🚶 Đứng dậy!", "Đi bộ vài bước nhé!"),
+    "water": ("notification", "💧 Uống nước!", "Uống một ly nước lọc nhé!"),
+    "toilet": ("notification", "🚽 Đi toilet!", "Đi toilet một chút nhé!"),
+    "posture": ("exercise", "🪑 Kiểm tra tư thế", POSTURE_CHECK),
+    "neck_stretch": ("exercise", "🧘 Giãn cổ vai", NECK_EXERCISES + "\n\n" + SHOULDER_EXERCISES),
+    "eye_exercise": ("exercise", "👁️ Bài tập mắt", EYE_EXERCISES),
+    "breathing": ("exercise", "🌬️ Hít thở", BREATHING_EXERCISES),
+}
+
+WORK_END_OPTIONS = ["Đón người yêu 💕", "Về nhà 🏠"]
+MORNING_OPTIONS = ["Bắt đầu ngay!", "Nhắc lại sau", "Hôm nay nghỉ"]
+SLEEP_OPTIONS = ["Đi ngủ 😴", "Thêm 30 phút", "Bỏ qua"]
+
+# Câu trả lời dialog -> loại sự kiện lịch sử (còn lại là "ack")
+SNOOZE_CHOICES = ("Nhắc lại sau", "Thêm 30 phút")
+SKIP_CHOICES = ("Hôm nay nghỉ", "Bỏ qua")
+
+
+# ============================================
+# HELPERS
+# ============================================
+
+def choice_outcome(choice: str) -> str:
+    """ack / skip / snooze cho câu trả lời của dialog lựa chọn"""
+    if any(option in choice for option in SNOOZE_CHOICES):
+        return "snooze"
+    if any(option in choice for option in SKIP_CHOICES):
+        return "skip"
+    return "ack"
+
+
+def minutes_between(last_time: Optional[datetime], now: datetime) -> float:
+    if last_time is None:
+        return float('inf')
+    return (now - last_time).total_seconds() / 60
+
+
+def _merge(events: List[ReminderEvent], style: str, separator: str) -> ReminderEvent:
+    first = events[0]
+    return ReminderEvent(
+        "combined",
+        " + ".join(e.title for e in events),
+        separator.join(f"{e.title}: {e.message}" if style == "notification" else f"{e.title}\n{e.message}"
+                       for e in events),
+        style=style,
+        sound=any(e.sound for e in events),
+        due=first.due,
+        parts=[key for e in events for key in (e.parts or [e.key])],
+    )
+
+
+def coalesce_events(events: List[ReminderEvent]) -> List[ReminderEvent]:
+    """Gộp các nhắc nhở định kỳ cùng lượt thành một thông báo / một dialog.
+
+    Thông báo thường gộp thành một notification, bài tập gộp thành một
+    dialog; các mốc giờ và dialog lựa chọn giữ nguyên.
+    """
+    notes = [e for e in events if e.key in INTERVAL_KEYS and e.style == "notification"]
+    drills = [e for e in events if e.key in INTERVAL_KEYS and e.style == "exercise"]
+    if len(notes) < 2 and len(drills) < 2:
+        return events
+
+    result = []
+    for event in events:
+        group = notes if any(e is event for e in notes) else drills if any(e is event for e in drills) else None
+        if group is None or len(group) < 2:
+            result.append(event)
+        elif event is group[0]:
+            if group is notes:
+                result.append(_merge(group, "notification", " • "))
+            else:
+                result.append(_merge(group, "exercise", "\n\n"))
+    return result
+
+
+# ============================================
+# ENGINE
+# ============================================
+
+class ReminderEngine:
+    """Lịch nhắc nhở dùng chung cho mọi front-end"""
+
+    def __init__(self, config: Optional[WorkConfig] = None,
+                 intervals: Optional[ReminderInterval] = None,
+                 tracker: Optional[ReminderTracker] = None,
+                 clock=SYSTEM_CLOCK,
+                 notifier=None,
+                 enabled: Optional[Iterable[str]] = None,
+                 history=None):
+        # (config, intervals) đổi cùng lúc trong một snapshot
+        self._settings = SnapshotCell((config or WorkConfig(), clamp_intervals(intervals or ReminderInterval())))
+        self.clock = clock
+        self.tracker = tracker or ReminderTracker(clock)
+        self.notifier = notifier
+        # EventStore (event_store.py) ghi lịch sử fire / ack / skip / snooze, None = không ghi
+        self.history = history
+        # Các key được bật (mặc định: tất cả)
+        self.enabled = set(enabled) if enabled is not None else set(INTERVAL_KEYS + SPECIAL_KEYS)
+        self.scheduler = DeadlineScheduler(clock)
+        self.timelines = TimelineCache()
+        self.rate_limiter = NotificationRateLimiter(self.config.notifications_per_hour, clock=clock)
+
+        self._last_minute = None
+        self._was_working = False
+        # Câu trả lời dialog đến từ thread khác (Future), xử lý ở lượt sau
+        self._answers = deque()
+
+    # ---------- Cấu hình ----------
+
+    @property
+    def config(self) -> WorkConfig:
+        return self._settings.get()[0]
+
+    @property
+    def intervals(self) -> ReminderInterval:
+        return self._settings.get()[1]
+
+    def update_config(self, config: Optional[WorkConfig] = None,
+                      intervals: Optional[ReminderInterval] = None) -> Set[str]:
+        """Áp dụng cấu hình mới, lập lịch lại ngay các hạn chót bị ảnh hưởng"""
+        previous = []
+        if intervals is not None:
+            intervals = clamp_intervals(intervals)
+
+        def swap(current):
+            previous.append(current)
+            return (config or current[0], intervals or current[1])
+
+        current = self._settings.submit(swap)
+        return self.on_config_changed(previous[0], current)
+
+    def on_config_changed(self, old: tuple, new: tuple, now: Optional[datetime] = None) -> Set[str]:
+        """Sự kiện đổi cấu hình: chỉ đổi hạn chót của các key bị ảnh hưởng.
+
+        Mỗi key là một lần đẩy vào heap (O(log n)); scheduler tự đánh thức vòng
+        lặp nếu hạn chót sớm nhất thay đổi, không cần một lượt tick() / plan() đầy đủ.
+        Trả về các key đã lập lịch lại.
+        """
+        now = now or self.clock.now()
+        (old_config, old_intervals), (config, intervals) = old, new
+        # TimelineCache tự bỏ cache khi thấy object config khác
+        if config.notifications_per_hour != self.rate_limiter.per_hour:
+            self.rate_limiter.configure(config.notifications_per_hour)
+
+        scheduler = self.scheduler
+        changed = set()
+
+        # Mốc giờ cố định: chỉ các mốc đổi giờ
+        old_times, new_times = self.special_times(old_config), self.special_times(config)
+        for key, hhmm in new_times.items():
+            if old_times.get(key) != hhmm:
+                scheduler.schedule(key, next_occurrence(hhmm, now))
+                changed.add(key)
+        for key in old_times.keys() - new_times.keys():
+            scheduler.cancel(key)
+            changed.add(key)
+
+        # Nhắc nhở định kỳ: cả nhóm chỉ bật / tắt khi khung giờ làm việc đổi trạng thái lúc này
+        active = not self.is_suspended(now) and self.is_work_time(now)
+        was_active = active
+        if any(getattr(old_config, name) != getattr(config, name) for name in TIMELINE_FIELDS):
+            minute = now.hour * 60 + now.minute
+            was_active = not self.is_suspended(now) and bool(
+                compile_day(old_config, now.date()).flags_at(minute) & WORK)
+
+        tracker = self.tracker.state
+        if active != was_active:
+            if active:
+                schedule_interval_reminders(scheduler, tracker, intervals)
+                for key in INTERVAL_KEYS:
+                    if key not in self.enabled:
+                        scheduler.cancel(key)
+            else:
+                cancel_interval_reminders(scheduler, intervals)
+            changed.update(INTERVAL_KEYS)
+        elif active:
+            for key in INTERVAL_KEYS:
+                minutes = getattr(intervals, key)
+                if key in self.enabled and getattr(old_intervals, key) != minutes:
+                    last = getattr(tracker, f"last_{key}")
+                    if last is not None:
+                        scheduler.schedule(key, last + timedelta(minutes=minutes))
+                        changed.add(key)
+        return changed
+
+    def restore(self, state: TrackerState, saved_at: datetime):
+        """Nạp tracker đã lưu (đã reconcile) lúc khởi động.
+
+        Lưu giữa giờ làm của hôm nay và giờ vẫn đang làm: tiếp tục phiên cũ,
+        không reset timer như khi vừa bắt đầu làm việc.
+        """
+        now = self.clock.now()
+        self.tracker.submit(lambda _: state)
+        self._was_working = (saved_at.date() == now.date() and state.work_started_today
+                             and self.is_work_time(saved_at))
+        self.plan(now)
+
+    def wake(self):
+        """Đánh thức vòng lặp (sau khi tracker thay đổi từ UI)"""
+        self.scheduler.wake()
+
+    # ---------- Trạng thái ngày / giờ ----------
+
+    def now(self) -> datetime:
+        return self.clock.now()
+
+    def timeline(self, now: Optional[datetime] = None):
+        """Timeline đã biên dịch của ngày hôm nay"""
+        return self.timelines.get(self.config, (now or self.clock.now()).date())
+
+    def is_work_day(self, now: Optional[datetime] = None) -> bool:
+        """Kiểm tra hôm nay có phải ngày làm việc không"""
+        return self.timeline(now).is_work_day
+
+    def is_half_day(self, now: Optional[datetime] = None) -> bool:
+        """Kiểm tra có phải ngày nửa ngày không (T7 hoặc CN)"""
+        return self.timeline(now).is_half_day
+
+    def today_work_end(self, now: Optional[datetime] = None) -> tuple:
+        """Lấy giờ kết thúc hôm nay (xử lý T7/CN nửa ngày)"""
+        return self.timeline(now).work_end
+
+    def is_work_time(self, now: Optional[datetime] = None) -> bool:
+        """Kiểm tra có đang trong giờ làm việc không"""
+        return bool(self.timelines.at(self.config, now or self.clock.now())[1] & WORK)
+
+    def is_lunch_break(self, now: Optional[datetime] = None) -> bool:
+        """Kiểm tra có đang nghỉ trưa không"""
+        return bool(self.timelines.at(self.config, now or self.clock.now())[1] & LUNCH)
+
+    def is_morning_reminder_window(self, now: Optional[datetime] = None) -> bool:
+        """Kiểm tra đang trong khung nhắc buổi sáng (7:30-work_start)"""
+        return bool(self.timelines.at(self.config, now or self.clock.now())[1] & MORNING)
+
+    def is_suspended(self, now: Optional[datetime] = None) -> bool:
+        """Nhắc nhở định kỳ đang bị tắt (pause, focus, pomodoro)"""
+        t = self.tracker.state
+        return t.is_paused or t.is_focus_active(now or self.clock.now()) or t.is_pomodoro_active()
+
+    def status(self, now: Optional[datetime] = None) -> str:
+        """Trạng thái hiện tại: paused, day_off, work, lunch, off"""
+        now = now or self.clock.now()
+        if self.tracker.is_paused:
+            return "paused"
+        timeline, flags = self.timelines.at(self.config, now)
+        if not timeline.is_work_day:
+            return "day_off"
+        if flags & WORK:
+            return "work"
+        if flags & LUNCH:
+            return "lunch"
+        return "off"
+
+    def minutes_since(self, last_time: Optional[datetime], now: Optional[datetime] = None) -> float:
+        return minutes_between(last_time, now or self.clock.now())
+
+    def minutes_until(self, key: str, now: Optional[datetime] = None) -> float:
+        """Số phút đến lần nhắc tiếp theo của một reminder định kỳ"""
+        last = getattr(self.tracker.state, f"last_{key}")
+        return getattr(self.intervals, key) - self.minutes_since(last, now)
+
+    # ---------- Tính sự kiện đến hạn ----------
+
+    def poll(self, now: Optional[datetime] = None) -> List[ReminderEvent]:
+        """Tính các sự kiện đến hạn tại thời điểm now và cập nhật tracker"""
+        now = now or self.clock.now()
+        events = []
+
+        current_minute = (now.date(), now.hour, now.minute)
+        if current_minute != self._last_minute:
+            self._last_minute = current_minute
+            # Các mốc đặc biệt (luôn chạy, kể cả khi tạm dừng)
+            events.extend(self.check_special_times(now))
+            # Mốc giờ cố định dự kiến bắn ở đầu phút (morning là cả khung giờ)
+            drift = (now - now.replace(second=0, microsecond=0)).total_seconds()
+            for event in events:
+                if event.key != "morning":
+                    SCHEDULE_DRIFT.observe(drift, (event.key,))
+
+        # Skip reminders if paused, focus mode, or pomodoro
+        if self.is_suspended(now):
+            return events
+
+        working = self.is_work_time(now)
+        # Reset khi bắt đầu làm việc
+        if working and not self._was_working:
+            self.tracker.submit(lambda t: replace(t.reset_all(now), work_started_today=True))
+            self._was_working = True
+        elif not working:
+            self._was_working = False
+
+        if working:
+            events.extend(self.check_interval_reminders(now))
+        return events
+
+    def check_interval_reminders(self, now: datetime) -> List[ReminderEvent]:
+        """Kiểm tra các nhắc nhở định kỳ (mắt, cơ bản, bài tập).
+
+        Khi có ít nhất một reminder đến hạn, các reminder sẽ đến hạn trong
+        vòng config.coalesce_window phút cũng được bắn luôn để gộp chung
+        (nhịp của chúng vẫn tính theo hạn chót gốc).
+        """
+        config, intervals = self._settings.get()
+        tracker = self.tracker.state
+        window = max(config.coalesce_window, 0)
+        due, soon = [], {}
+        for key in INTERVAL_KEYS:
+            if key not in self.enabled:
+                continue
+            remaining = getattr(intervals, key) - self.minutes_since(getattr(tracker, f"last_{key}"), now)
+            if remaining <= 0:
+                due.append(key)
+                SCHEDULE_DRIFT.observe(-remaining * 60, (key,))
+            elif remaining <= min(window, getattr(intervals, key) / 4):
+                # Không kéo sớm quá 1/4 chu kỳ (blink 2 phút không bị kéo theo)
+                soon[key] = remaining
+        if not due:
+            return []
+
+        events, changes = [], {}
+        for key in INTERVAL_KEYS:
+            if key in due or key in soon:
+                style, title, message = REMINDER_CATALOG[key]
+                events.append(ReminderEvent(key, title, message, style=style, due=now))
+                # Reminder bắn sớm vẫn giữ nhịp theo hạn chót gốc
+                changes[f"last_{key}"] = now + timedelta(minutes=soon[key]) if key in soon else now
+        self.tracker.update(**changes)
+        return events
+
+    def check_special_times(self, now: datetime) -> List[ReminderEvent]:
+        """Kiểm tra các mốc thời gian đặc biệt"""
+        events = []
+        current_time = (now.hour, now.minute)
+        config = self.config
+        tracker = self.tracker
+
+        # Reset daily flags at midnight
+        if current_time == (0, 0):
+            tracker.reset_daily()
+        state = tracker.state
+
+        # Morning reminder (7:30 - work_start)
+        if ("morning" in self.enabled and self.is_morning_reminder_window(now)
+                and not state.morning_reminded and not state.work_started_today):
+            tracker.update(morning_reminded=True)
+            ws = config.work_start
+            events.append(ReminderEvent(
+                "morning", "🌅 Chuẩn bị làm việc!",
+                f"Sắp đến giờ làm việc ({ws[0]:02d}:{ws[1]:02d}).\nBạn đã sẵn sàng chưa?",
+                style="choice", options=list(MORNING_OPTIONS), due=now
+            ))
+
+        # Only check work-related times on work days
+        if not self.is_work_day(now):
+            # Sleep reminder still works on weekends
+            events.extend(self.check_sleep_reminder(now))
+            return events
+
+        # Lunch time (not for Saturday half-day)
+        if "lunch_start" in self.enabled and current_time == config.lunch_start and not self.is_half_day(now):
+            events.append(ReminderEvent("lunch_start", "🍚 Giờ ăn trưa!", "Đi lấy phiếu ăn cơm thôi!", due=now))
+
+        # Resume after lunch
+        if current_time == config.work_resume and not self.is_half_day(now):
+            if "work_resume" in self.enabled:
+                events.append(ReminderEvent("work_resume", "💼 Hết nghỉ trưa!", "Bắt đầu làm việc lại! Fighting! 💪", due=now))
+            tracker.reset_all(now)
+
+        # Work end
+        today_end = self.today_work_end(now)
+        if "work_end" in self.enabled and current_time == today_end:
+            end_str = f"{today_end[0]:02d}:{today_end[1]:02d}"
+            events.append(ReminderEvent(
+                "work_end", "🏠 Hết giờ làm!", f"Đã {end_str}! Bạn muốn:",
+                style="choice", options=list(WORK_END_OPTIONS), due=now,
+                default=WORK_END_OPTIONS[1]
+            ))
+
+        # Night mode reminder (18:00)
+        if ("night_mode" in self.enabled and current_time == config.night_mode_start
+                and not state.night_mode_reminded):
+            events.append(ReminderEvent("night_mode", "🌙 Bật Night Mode!", "Bật Night Shift/Dark Mode để bảo vệ mắt!", due=now))
+            tracker.update(night_mode_reminded=True)
+
+        # Sleep reminder
+        events.extend(self.check_sleep_reminder(now))
+        return events
+
+    def check_sleep_reminder(self, now: datetime) -> List[ReminderEvent]:
+        """Kiểm tra nhắc ngủ"""
+        if "sleep" not in self.enabled or self.tracker.sleep_reminded:
+            return []
+
+        st = self.config.sleep_reminder_time
+        if (now.hour, now.minute) != st:
+            return []
+
+        self.tracker.update(sleep_reminded=True)
+        return [ReminderEvent(
+            "sleep", "🌙 Đến giờ ngủ rồi!",
+            f"Đã {st[0]:02d}:{st[1]:02d} rồi!\n\nNgủ đủ giấc giúp:\n- Tăng cường trí nhớ\n- Phục hồi sức khỏe\n- Giảm stress",
+            style="choice", options=list(SLEEP_OPTIONS), due=now,
+            default=SLEEP_OPTIONS[2]
+        )]
+
+    def answer(self, event: ReminderEvent, choice: str) -> List[ReminderEvent]:
+        """Xử lý câu trả lời của dialog lựa chọn, trả về thông báo tiếp theo"""
+        now = self.clock.now()
+        self.record(choice_outcome(choice), event.key, choice, now)
+
+        if event.key == "work_end":
+            if "Đón người yêu" in choice:
+                return [ReminderEvent("work_end_reply", "💕 Đón người yêu", "Đi đón người yêu thôi! 🥰", due=now)]
+            return [ReminderEvent("work_end_reply", "🏠 Về nhà", "Đi về nhà nghỉ ngơi nhé! 😊", due=now)]
+
+        if event.key == "morning":
+            if "Bắt đầu ngay" in choice:
+                self.tracker.submit(lambda t: replace(t.reset_all(now), work_started_today=True))
+                return [ReminderEvent("morning_reply", "💪 Bắt đầu làm việc!", "Chúc bạn một ngày làm việc hiệu quả!", due=now)]
+            if "Hôm nay nghỉ" in choice:
+                return [ReminderEvent("morning_reply", "😴 Nghỉ ngơi", "OK! Hẹn gặp bạn ngày mai!", due=now)]
+            # Nhắc lại sau - reset flag để nhắc lại
+            self.tracker.update(morning_reminded=False)
+            return []
+
+        if event.key == "sleep":
+            if "Đi ngủ" in choice:
+                return [ReminderEvent("sleep_reply", "😴 Chúc ngủ ngon!", "Hẹn gặp bạn sáng mai! 🌅", due=now)]
+            if "Thêm 30 phút" in choice:
+                self.tracker.update(sleep_reminded=False)  # Will remind again
+                return [ReminderEvent("sleep_reply", "⏰ Nhắc lại", "Sẽ nhắc lại sau 30 phút!", due=now)]
+        return []
+
+    # ---------- Lập lịch ----------
+
+    def special_times(self, config: Optional[WorkConfig] = None) -> Dict[str, tuple]:
+        """Các mốc giờ cố định cần thức dậy"""
+        config = config or self.config
+        times = {
+            "midnight": (0, 0),
+            "work_start": config.work_start,
+            "work_resume": config.work_resume,
+        }
+        if "morning" in self.enabled:
+            times["morning"] = config.morning_reminder_start
+        if "lunch_start" in self.enabled:
+            times["lunch_start"] = config.lunch_start
+        if "work_end" in self.enabled:
+            times["work_end"] = config.work_end
+            times["saturday_end"] = config.saturday_end
+            times["sunday_end"] = config.sunday_end
+        if "night_mode" in self.enabled:
+            times["night_mode"] = config.night_mode_start
+        if "sleep" in self.enabled:
+            times["sleep"] = config.sleep_reminder_time
+        return times
+
+    def plan(self, now: Optional[datetime] = None):
+        """Cập nhật hạn chót cho scheduler theo trạng thái hiện tại"""
+        now = now or self.clock.now()
+        scheduler = self.scheduler
+        tracker = self.tracker.state
+        schedule_special_times(scheduler, self.special_times(), now)
+
+        # "Nhắc lại sau" buổi sáng: hỏi lại vào phút kế tiếp
+        if ("morning" in self.enabled and self.is_morning_reminder_window(now)
+                and not tracker.morning_reminded and not tracker.work_started_today):
+            scheduler.schedule("morning_retry", next_minute(now))
+        else:
+            scheduler.cancel("morning_retry")
+
+        if tracker.is_focus_active(now):
+            scheduler.schedule("focus_end", tracker.focus_end_time)
+        else:
+            scheduler.cancel("focus_end")
+
+        if self.is_suspended(now) or not self.is_work_time(now):
+            cancel_interval_reminders(scheduler, self.intervals)
+        else:
+            schedule_interval_reminders(scheduler, tracker, self.intervals)
+            for key in INTERVAL_KEYS:
+                if key not in self.enabled:
+                    scheduler.cancel(key)
+
+    # ---------- Vòng lặp ----------
+
+    def deliver(self, event: ReminderEvent):
+        """Hiển thị một sự kiện qua notifier"""
+        notifier = self.notifier
+        if notifier is None:
+            return
+        timeout = self.config.dialog_timeout or None
+        if event.style == "exercise":
+            done = notifier.exercise(event.title, event.message, timeout=timeout)
+            if self.history is None:
+                return
+            if isinstance(done, Future):
+                done.add_done_callback(lambda f, e=event: self.record_exercise(e, f))
+            else:
+                self.record_exercise(event, done)
+        elif event.style == "choice":
+            choice = notifier.choose(event.title, event.message, event.options,
+                                     timeout=timeout, default=event.default)
+            if isinstance(choice, Future):
+                choice.add_done_callback(lambda f, e=event: self.post_answer(e, f))
+            else:
+                self.dispatch(self.answer(event, choice))
+        else:
+            notifier.notify(event.title, event.message, event.sound)
+
+    def record(self, kind: str, reminder: Optional[str] = None, detail: Optional[str] = None,
+               when: Optional[datetime] = None):
+        """Ghi một sự kiện lịch sử (không chặn, bỏ qua nếu không có event store)"""
+        if self.history is not None:
+            self.history.record(kind, reminder, detail, when or self.clock.now())
+
+    def record_exercise(self, event: ReminderEvent, done):
+        """Dialog bài tập đã đóng: "Đã làm" -> ack, "Bỏ qua" / hết giờ -> skip"""
+        if isinstance(done, Future):
+            try:
+                done = done.result()
+            except Exception:
+                done = False
+        now = self.clock.now()
+        for key in event.parts or [event.key]:
+            self.record("ack" if done else "skip", key, None, now)
+
+    def record_fired(self, due: List[ReminderEvent], shown: List[ReminderEvent], now: datetime):
+        """fire cho sự kiện được hiển thị, skip cho sự kiện bị ngân sách chặn"""
+        shown_ids = {id(event) for event in shown}
+        for event in due:
+            if id(event) in shown_ids:
+                self.record("fire", event.key, None, now)
+            else:
+                self.record("skip", event.key, "rate_limit", now)
+
+    def dispatch(self, events: List[ReminderEvent]):
+        for event in events:
+            self.deliver(event)
+
+    def post_answer(self, event: ReminderEvent, choice):
+        """Nhận câu trả lời dialog (str hoặc Future) từ thread khác"""
+        self._answers.append((event, choice))
+        self.scheduler.wake()
+
+    def process_answers(self):
+        """Áp dụng các câu trả lời dialog đang chờ trên thread nhắc nhở"""
+        while self._answers:
+            event, choice = self._answers.popleft()
+            if isinstance(choice, Future):
+                try:
+                    choice = choice.result()
+                except Exception as e:
+                    print(f"Dialog error: {e}")
+                    choice = event.default or event.options[0]
+            self.dispatch(self.answer(event, choice))
+
+    def limit(self, events: List[ReminderEvent], now: Optional[datetime] = None) -> List[ReminderEvent]:
+        """Bỏ / gộp nhắc nhở ưu tiên thấp khi vượt ngân sách thông báo"""
+        return self.rate_limiter.filter(events, now or self.clock.now())
+
+    def tick(self) -> List[ReminderEvent]:
+        """Một lượt: tính sự kiện đến hạn, lọc theo ngân sách, hiển thị, lập lịch lại"""
+        with timed(TICK_DURATION):
+            self.process_answers()
+            due = self.poll()
+            events = self.limit(due)
+            for event in events:
+                REMINDERS_FIRED.inc((event.key,))
+            if self.history is not None:
+                self.record_fired(due, events, self.clock.now())
+            self.dispatch(coalesce_events(events))
+            self.plan()
+        return events
+
+    def run(self, is_running: Callable[[], bool] = lambda: True,
+            on_tick: Optional[Callable[[List[ReminderEvent]], None]] = None):
+        """Vòng lặp chính: ngủ đến hạn chót gần nhất"""
+        while is_running():
+            REGISTRY.beat("reminder_loop")
+            try:
+                events = self.tick()
+                if on_tick:
+                    on_tick(events)
+                self.scheduler.wait()
+            except Exception as e:
+                print(f"Error in reminder loop: {e}")
+                self.clock.sleep(10)
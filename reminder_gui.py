@@ -6,12 +6,13 @@ Work Health Reminder GUI - Ứng dụng nhắc nhở sức khỏe với giao di
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
 import threading
-import time
 from datetime import datetime
 import sys
 
+from reminder_engine import WorkConfig, ReminderInterval, ReminderEngine, coalesce_events
+from notifier import create_notifier
+
 # Màu sắc theme
 COLORS = {
     'bg_dark': '#1a1a2e',
@@ -29,16 +30,12 @@ COLORS = {
     'home': '#9c27b0'
 }
 
-# Cấu hình thời gian
-CONFIG = {
-    'work_start': (8, 0),
-    'lunch_start': (11, 30),
-    'work_resume': (13, 0),
-    'work_end': (17, 30),
-    'walk_interval': 30,
-    'water_interval': 45,
-    'toilet_interval': 60
-}
+# Cấu hình thời gian (dùng chung với các bản khác, nhắc cả tuần)
+CONFIG = WorkConfig(weekend_mode="mon_sun_full")
+INTERVALS = ReminderInterval()
+
+# Bản GUI chỉ có đi bộ / uống nước / toilet và các mốc trong ngày
+ENABLED_REMINDERS = ("walk", "water", "toilet", "lunch_start", "work_resume", "work_end")
 
 
 class WorkHealthReminderGUI:
@@ -52,9 +49,9 @@ class WorkHealthReminderGUI:
         # Trạng thái
         self.is_running = False
         self.reminder_thread = None
-        self.last_walk = None
-        self.last_water = None
-        self.last_toilet = None
+        self.engine = ReminderEngine(CONFIG, INTERVALS, enabled=ENABLED_REMINDERS)
+        # Backend thông báo chọn một lần lúc khởi động
+        self.notifier = create_notifier()
         
         # Đếm số lần nhắc
         self.walk_count = 0
@@ -135,7 +132,7 @@ class WorkHealthReminderGUI:
         self.walk_card = self.create_card(
             cards_frame, 
             "🚶", "Đi bộ", 
-            f"Mỗi {CONFIG['walk_interval']} phút",
+            f"Mỗi {INTERVALS.walk} phút",
             COLORS['walk']
         )
         self.walk_card.pack(fill='x', pady=5)
@@ -144,7 +141,7 @@ class WorkHealthReminderGUI:
         self.water_card = self.create_card(
             cards_frame,
             "💧", "Uống nước",
-            f"Mỗi {CONFIG['water_interval']} phút",
+            f"Mỗi {INTERVALS.water} phút",
             COLORS['water']
         )
         self.water_card.pack(fill='x', pady=5)
@@ -153,7 +150,7 @@ class WorkHealthReminderGUI:
         self.toilet_card = self.create_card(
             cards_frame,
             "🚽", "Toilet",
-            f"Mỗi {CONFIG['toilet_interval']} phút",
+            f"Mỗi {INTERVALS.toilet} phút",
             COLORS['toilet']
         )
         self.toilet_card.pack(fill='x', pady=5)
@@ -270,9 +267,10 @@ class WorkHealthReminderGUI:
         
         # Cập nhật trạng thái
         if self.is_running:
-            if self.is_work_time():
+            status = self.engine.status(now)
+            if status == "work":
                 self.status_label.config(text="🟢 Đang làm việc", fg=COLORS['success'])
-            elif self.is_lunch_break():
+            elif status == "lunch":
                 self.status_label.config(text="🍚 Đang nghỉ trưa", fg=COLORS['warning'])
             else:
                 self.status_label.config(text="⚪ Ngoài giờ làm việc", fg=COLORS['text_dim'])
@@ -296,10 +294,7 @@ class WorkHealthReminderGUI:
         self.status_label.config(text="🟢 Đang chạy...", fg=COLORS['success'])
         
         # Reset timers
-        now = datetime.now()
-        self.last_walk = now
-        self.last_water = now
-        self.last_toilet = now
+        self.engine.tracker.reset_all(self.engine.now())
         
         # Gửi thông báo bắt đầu
         self.send_notification(
@@ -307,13 +302,15 @@ class WorkHealthReminderGUI:
             "Đã bật nhắc nhở! Chúc bạn làm việc hiệu quả!"
         )
         
-        # Bắt đầu thread kiểm tra
-        self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
-        self.reminder_thread.start()
+        # Bắt đầu thread kiểm tra (thread cũ có thể chưa kịp thoát)
+        if self.reminder_thread is None or not self.reminder_thread.is_alive():
+            self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
+            self.reminder_thread.start()
     
     def stop_reminder(self):
         """Dừng nhắc nhở"""
         self.is_running = False
+        self.engine.wake()
         self.toggle_btn.config(
             text="▶️  BẮT ĐẦU",
             bg=COLORS['success'],
@@ -326,78 +323,27 @@ class WorkHealthReminderGUI:
         )
     
     def reminder_loop(self):
-        """Vòng lặp kiểm tra nhắc nhở"""
-        last_minute = -1
-        
-        while self.is_running:
-            now = datetime.now()
-            current_minute = now.minute
-            
-            if current_minute != last_minute:
-                last_minute = current_minute
-                
-                # Kiểm tra các mốc thời gian đặc biệt
-                self.check_special_times()
-                
-                # Kiểm tra nhắc nhở theo chu kỳ
-                if self.is_work_time():
-                    self.check_interval_reminders()
-            
-            time.sleep(1)
+        """Vòng lặp nhắc nhở (ngủ đến hạn chót gần nhất)"""
+        self.engine.run(lambda: self.is_running, on_tick=self.show_reminders)
     
-    def check_special_times(self):
-        """Kiểm tra các mốc thời gian đặc biệt"""
-        now = datetime.now()
-        current_time = (now.hour, now.minute)
-        
-        if current_time == CONFIG['lunch_start']:
-            self.send_notification(
-                "🍚 Giờ ăn trưa!",
-                "Đi lấy phiếu ăn cơm thôi! Nghỉ trưa đến 13:00 nhé."
-            )
-        
-        elif current_time == CONFIG['work_resume']:
-            self.send_notification(
-                "💼 Hết giờ nghỉ trưa!",
-                "Bắt đầu làm việc lại thôi nào! Fighting! 💪"
-            )
-        
-        elif current_time == CONFIG['work_end']:
-            self.show_end_of_day_dialog()
-    
-    def check_interval_reminders(self):
-        """Kiểm tra nhắc nhở theo chu kỳ"""
-        now = datetime.now()
+    def show_reminders(self, events):
+        """Hiển thị các nhắc nhở đến hạn từ engine"""
+        for event in coalesce_events(events):
+            if event.key == "work_end":
+                self.root.after(0, lambda e=event: self.show_end_of_day_dialog(e))
+                continue
+            
+            self.send_notification(event.title, event.message)
+        
+        for event in events:
+            if event.key == "walk":
+                self.walk_count += 1
+            elif event.key == "water":
+                self.water_count += 1
+            elif event.key == "toilet":
+                self.toilet_count += 1
         
-        # Đi bộ
-        if self.last_walk and (now - self.last_walk).total_seconds() >= CONFIG['walk_interval'] * 60:
-            self.send_notification(
-                "🚶 Đứng dậy đi bộ!",
-                f"Đã ngồi {CONFIG['walk_interval']} phút rồi! Đi bộ vài bước nhé!"
-            )
-            self.last_walk = now
-            self.walk_count += 1
-            self.update_stats()
-        
-        # Uống nước
-        if self.last_water and (now - self.last_water).total_seconds() >= CONFIG['water_interval'] * 60:
-            self.send_notification(
-                "💧 Uống nước!",
-                f"Đã {CONFIG['water_interval']} phút rồi! Uống một ly nước lọc nhé!"
-            )
-            self.last_water = now
-            self.water_count += 1
-            self.update_stats()
-        
-        # Toilet
-        if self.last_toilet and (now - self.last_toilet).total_seconds() >= CONFIG['toilet_interval'] * 60:
-            self.send_notification(
-                "🚽 Đi toilet!",
-                "Đã 1 tiếng rồi! Đi toilet một chút nhé!"
-            )
-            self.last_toilet = now
-            self.toilet_count += 1
-            self.update_stats()
+        self.root.after(0, self.update_stats)
     
     def update_stats(self):
         """Cập nhật thống kê"""
@@ -405,21 +351,20 @@ class WorkHealthReminderGUI:
             text=f"🚶 {self.walk_count} lần  |  💧 {self.water_count} lần  |  🚽 {self.toilet_count} lần"
         )
     
-    def show_end_of_day_dialog(self):
+    def show_end_of_day_dialog(self, event):
         """Hiển thị dialog cuối ngày"""
-        def on_girlfriend():
-            self.send_notification(
-                "💕 Đón người yêu",
-                "Đi đón người yêu thôi! Chúc hẹn hò vui vẻ! 🥰"
-            )
+        def answer(choice):
+            if not dialog.winfo_exists():
+                return  # đã trả lời / đã hết giờ
+            for reply in self.engine.answer(event, choice):
+                self.send_notification(reply.title, reply.message)
             dialog.destroy()
         
+        def on_girlfriend():
+            answer(event.options[0])
+        
         def on_home():
-            self.send_notification(
-                "🏠 Về nhà",
-                "Đi về nhà thôi! Nghỉ ngơi và thư giãn nhé! 😊"
-            )
-            dialog.destroy()
+            answer(event.options[1])
         
         dialog = tk.Toplevel(self.root)
         dialog.title("🏠 Hết giờ làm việc!")
@@ -433,7 +378,7 @@ class WorkHealthReminderGUI:
         
         label = tk.Label(
             dialog,
-            text="Đã đến 17:30 rồi!\nBạn muốn:",
+            text=event.message.replace("! ", "!\n"),
             font=('SF Pro Display', 16),
             bg=COLORS['bg_dark'],
             fg=COLORS['text']
@@ -468,51 +413,19 @@ class WorkHealthReminderGUI:
             command=on_home
         )
         home_btn.pack(side='left', padx=10)
-    
-    def is_work_time(self) -> bool:
-        """Kiểm tra có đang trong giờ làm việc không"""
-        now = datetime.now()
-        current = now.hour * 60 + now.minute
-        
-        work_start = CONFIG['work_start'][0] * 60 + CONFIG['work_start'][1]
-        lunch_start = CONFIG['lunch_start'][0] * 60 + CONFIG['lunch_start'][1]
-        work_resume = CONFIG['work_resume'][0] * 60 + CONFIG['work_resume'][1]
-        work_end = CONFIG['work_end'][0] * 60 + CONFIG['work_end'][1]
         
-        morning = work_start <= current < lunch_start
-        afternoon = work_resume <= current < work_end
-        
-        return morning or afternoon
-    
-    def is_lunch_break(self) -> bool:
-        """Kiểm tra có đang nghỉ trưa không"""
-        now = datetime.now()
-        current = now.hour * 60 + now.minute
-        
-        lunch_start = CONFIG['lunch_start'][0] * 60 + CONFIG['lunch_start'][1]
-        work_resume = CONFIG['work_resume'][0] * 60 + CONFIG['work_resume'][1]
-        
-        return lunch_start <= current < work_resume
+        # Không ai trả lời thì tự đóng với câu trả lời mặc định
+        if CONFIG.dialog_timeout:
+            dialog.after(CONFIG.dialog_timeout * 1000,
+                         lambda: answer(event.default or event.options[0]))
     
     def send_notification(self, title: str, message: str):
-        """Gửi thông báo Windows/macOS"""
-        import platform
-        
-        if platform.system() == "Windows":
-            try:
-                # Thử dùng win10toast nếu có
-                from win10toast import ToastNotifier
-                toaster = ToastNotifier()
-                toaster.show_toast(title, message, duration=5, threaded=True)
-            except ImportError:
-                # Fallback: dùng tkinter notification
-                self.root.after(0, lambda: messagebox.showinfo(title, message))
-        else:
-            # macOS
-            script = f'''
-            display notification "{message}" with title "{title}" sound name "Glass"
-            '''
-            subprocess.run(['osascript', '-e', script], capture_output=True)
+        """Gửi thông báo Windows/macOS/Linux"""
+        if self.notifier.name == "stdout" and sys.platform.startswith("win"):
+            # Fallback khi không có win10toast: dùng tkinter notification
+            self.root.after(0, lambda: messagebox.showinfo(title, message))
+        elif self.notifier.name != "stdout":
+            self.notifier.notify(title, message)
         
         print(f"🔔 [{datetime.now().strftime('%H:%M:%S')}] {title}: {message}")
     
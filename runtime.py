@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Runtime - Một event loop asyncio cho menubar app
+================================================
+Thay cho thread nhắc nhở + thread HTTP + thread Unix socket + worker của
+dispatcher: một thread nền chạy một event loop duy nhất, trên đó có
+
+- vòng lặp nhắc nhở: tick() rồi ngủ đến hạn chót gần nhất (hoặc wake())
+- bridge HTTP trên TCP localhost:9876 và Unix socket bridge.sock, cùng
+  các route của youtube_bridge (keep-alive, long-poll, SSE /events)
+- AsyncNotificationDispatcher: gửi thông báo không chặn loop
+
+UI rumps vẫn ở main thread; runtime chỉ nói chuyện với UI qua call_soon()
+của app (hàng đợi được update_status xử lý) và Future.
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from metrics import REGISTRY, HTTP_REQUESTS
+from youtube_bridge import (
+    BufferedHTTPHandler, BUSY_RESPONSE, BRIDGE_REJECTED, MAX_BODY_BYTES, MAX_CONNECTIONS,
+    MAX_LONG_POLL, REQUEST_TIMEOUT, SSE_KEEPALIVE, SSE_QUEUE_SIZE, YOUTUBE_HTTP_PORT,
+    event_hub, prepare_socket_path, youtube_state
+)
+
+
+class LoopSubscriber:
+    """Hàng đợi của EventHub cho coroutine: publish từ thread nào cũng đánh thức loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self.queue: "queue.Queue" = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def put_nowait(self, item):
+        self.queue.put_nowait(item)  # queue.Full: hub tự ngắt subscriber
+        self._loop.call_soon_threadsafe(self.ready.set)
+
+    def put(self, item):
+        # Hub gọi khi subscriber bị ngắt vì đọc không kịp
+        self.closed = True
+        self._loop.call_soon_threadsafe(self.ready.set)
+
+    def drain(self) -> list:
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self.ready.wait(), max(timeout, 0.01))
+        except asyncio.TimeoutError:
+            pass
+        self.ready.clear()
+
+
+class AsyncRuntime:
+    """Event loop asyncio trên một thread nền (engine=None: chỉ chạy bridge)"""
+
+    def __init__(self, engine, dispatcher=None, host: str = 'localhost',
+                 port: Optional[int] = YOUTUBE_HTTP_PORT, socket_path: Optional[Path] = None,
+                 unix_socket: bool = True, max_connections: int = MAX_CONNECTIONS):
+        self.engine = engine
+        self.dispatcher = dispatcher
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.unix_socket = unix_socket
+        self.max_connections = max_connections
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.servers: List[asyncio.AbstractServer] = []
+        self.running = False
+        self._ready = threading.Event()
+        self._wake: Optional[asyncio.Event] = None
+        self._tick_requested = False
+        self._stopped: Optional[asyncio.Event] = None
+        self._gauges_registered = False
+
+        # Metrics
+        self.connections = 0
+        self.rejected = 0
+        self.wakeups = 0
+
+    # ---------- Vòng đời ----------
+
+    def start(self, timeout: float = 5.0) -> threading.Thread:
+        """Chạy loop trên thread nền, chờ đến khi server đã lắng nghe"""
+        self.running = True
+        # Ngân sách thông báo + hàng đợi dispatcher ở GET /metrics
+        if not self._gauges_registered and (self.engine is not None or self.dispatcher is not None):
+            REGISTRY.add_collector(lambda: engine_gauges(self))
+            self._gauges_registered = True
+        self.thread = threading.Thread(target=self._run, name="runtime", daemon=True)
+        self.thread.start()
+        self._ready.wait(timeout)
+        return self.thread
+
+    def stop(self, timeout: float = 5.0):
+        if self.loop is not None and self.running:
+            self.running = False
+            self.loop.call_soon_threadsafe(self._stopped.set)
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def call_soon(self, fn: Callable, *args):
+        """Chạy fn trên thread của loop (gọi được từ mọi thread)"""
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def submit(self, coro) -> Future:
+        """Chạy coroutine trên loop, trả concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def wake(self, tick: bool = True):
+        """tick=True: chạy một lượt nhắc nhở; False: chỉ tính lại thời gian ngủ"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._signal, tick)
+
+    def _signal(self, tick: bool):
+        self._tick_requested = self._tick_requested or tick
+        self._wake.set()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        except Exception as e:
+            print(f"Runtime error: {e}")
+        finally:
+            self._ready.set()
+            self.loop.close()
+
+    async def _main(self):
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_connections)
+        if self.dispatcher is not None and hasattr(self.dispatcher, "attach"):
+            self.dispatcher.attach(loop)
+        if self.engine is not None:
+            self.engine.scheduler.add_waker(self.wake)
+
+        await self._start_servers()
+        self._ready.set()
+
+        if self.engine is not None:
+            loop.create_task(self.run_reminders())
+        await self._stopped.wait()
+        for server in self.servers:
+            server.close()
+        # Huỷ vòng nhắc nhở và các kết nối còn mở (SSE, keep-alive) trước khi đóng loop
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.socket_path is not None:
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+
+    async def _start_servers(self):
+        if self.port is not None:
+            try:
+                server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+                self.port = server.sockets[0].getsockname()[1]
+                self.servers.append(server)
+                print(f"YouTube HTTP server running on {self.host}:{self.port}")
+            except OSError as e:
+                print(f"Could not start YouTube HTTP server: {e}")
+        if self.unix_socket:
+            try:
+                path = prepare_socket_path(self.socket_path)
+                server = await asyncio.start_unix_server(self.handle_connection, str(path))
+                os.chmod(path, 0o600)
+                self.socket_path = path
+                self.servers.append(server)
+                print(f"Bridge socket listening on {path}")
+            except OSError as e:
+                self.socket_path = None
+                print(f"Could not start bridge socket: {e}")
+
+    # ---------- Nhắc nhở ----------
+
+    async def run_reminders(self):
+        """Vòng lặp nhắc nhở: tick rồi ngủ đến hạn chót gần nhất hoặc đến khi wake()"""
+        engine = self.engine
+        while self.running:
+            REGISTRY.beat("reminder_loop")
+            self._wake.clear()
+            self._tick_requested = False
+            try:
+                engine.tick()
+            except Exception as e:
+                print(f"Error in reminder loop: {e}")
+                await asyncio.sleep(10)
+                continue
+
+            while True:
+                top = engine.scheduler.peek()
+                timeout = None
+                if top is not None:
+                    timeout = max((top[0] - engine.now()).total_seconds(), 0.0)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeups += 1
+                top = engine.scheduler.peek()
+                if self._tick_requested or (top is not None and top[0] <= engine.now()):
+                    break
+                # Chỉ hạn chót đổi (vd. sửa cấu hình): ngủ tiếp đến hạn chót mới
+                self._wake.clear()
+
+    # ---------- Bridge HTTP ----------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Một kết nối keep-alive: đọc request, trả lời, lặp lại"""
+        if self._slots.locked():
+            self.rejected += 1
+            BRIDGE_REJECTED.inc()
+            writer.write(BUSY_RESPONSE)
+            await self._close(writer)
+            return
+        async with self._slots:
+            self.connections += 1
+            try:
+                while await self.handle_request(reader, writer):
+                    pass
+            except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    asyncio.TimeoutError):
+                pass  # client đóng / chậm / header quá dài
+            except asyncio.CancelledError:
+                pass  # runtime đang dừng: kết thúc task bình thường
+            finally:
+                self.connections -= 1
+                await self._close(writer)
+
+    async def handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Xử lý một request; False nếu phải đóng kết nối"""
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+        request_line, _, header_block = head.partition(b"\r\n")
+        parts = request_line.decode('latin-1').split()
+        method, target = (parts[0], parts[1]) if len(parts) >= 2 else ("", "")
+
+        length = 0
+        for line in header_block.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    length = 0
+        raw = head
+        if 0 < length <= MAX_BODY_BYTES:
+            raw += await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT)
+
+        url = urlsplit(target)
+        if method == "GET" and url.path == "/events":
+            HTTP_REQUESTS.inc(("/events", 200))
+            await self.stream_events(writer)
+            return False
+        if method == "GET" and url.path == "/youtube/state":
+            await self.wait_for_state(parse_qs(url.query))
+
+        handler = BufferedHTTPHandler(raw)
+        writer.write(handler.response)
+        await writer.drain()
+        # Body quá lớn không được đọc: handler đã đặt close_connection
+        return not handler.close_connection
+
+    async def wait_for_state(self, query: dict):
+        """Long-poll ?since=&wait= không giữ thread: chờ trên loop đến khi version đổi"""
+        try:
+            since = int(query['since'][0])
+            wait = min(float(query['wait'][0]), MAX_LONG_POLL)
+        except (KeyError, ValueError):
+            return  # handler tự trả 400 / trả ngay
+        if wait <= 0:
+            return
+        subscriber, _ = event_hub.subscribe(LoopSubscriber(asyncio.get_running_loop()))
+        try:
+            deadline = time.monotonic() + wait
+            while youtube_state.version == since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or subscriber.closed:
+                    break
+                # check_stale đánh dấu isStale (tăng version) đúng lúc dữ liệu hết hạn
+                await subscriber.wait(min(remaining, youtube_state.check_stale()))
+                subscriber.drain()
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    async def stream_events(self, writer: asyncio.StreamWriter):
+        """Server-Sent Events trên loop: snapshot rồi diff, ping mỗi SSE_KEEPALIVE giây"""
+        subscriber, snapshots = event_hub.subscribe(LoopSubscriber(asyncio.get_running_loop()))
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Access-Control-Allow-Origin: *\r\n"
+                         b"Content-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\n"
+                         b"Connection: close\r\n\r\n")
+            for topic, data in snapshots.items():
+                writer.write(self.encode_event(topic, data))
+            await asyncio.wait_for(writer.drain(), SSE_KEEPALIVE)
+
+            last_write = time.monotonic()
+            while self.running and not subscriber.closed:
+                idle = time.monotonic() - last_write
+                await subscriber.wait(min(SSE_KEEPALIVE - idle, youtube_state.check_stale()))
+                events = subscriber.drain()
+                if any(topic is None for topic, _ in events):
+                    break
+                if events:
+                    writer.write(b"".join(self.encode_event(topic, data) for topic, data in events))
+                elif time.monotonic() - last_write >= SSE_KEEPALIVE:
+                    writer.write(b": ping\n\n")
+                else:
+                    continue
+                # Client không đọc trong SSE_KEEPALIVE giây: ngắt
+                await asyncio.wait_for(writer.drain(), SSE_KEEPALIVE)
+                last_write = time.monotonic()
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    @staticmethod
+    def encode_event(topic: str, data: dict) -> bytes:
+        return f"event: {topic}\ndata: {json.dumps(data)}\n\n".encode()
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+def engine_gauges(runtime: "AsyncRuntime") -> List[str]:
+    """Ngân sách thông báo (rate limiter) + hàng đợi dispatcher của runtime"""
+    lines = []
+    if runtime.engine is not None:
+        lines += runtime.engine.rate_limiter.samples()
+    if runtime.dispatcher is not None and hasattr(runtime.dispatcher, "samples"):
+        lines += runtime.dispatcher.samples()
+    return lines
+
+
+def runtime_gauges() -> List[str]:
+    """Số thread của process (để so với kiến trúc nhiều thread cũ)"""
+    return ["# TYPE whr_process_threads gauge", f"whr_process_threads {threading.active_count()}"]
+
+
+REGISTRY.add_collector(runtime_gauges)
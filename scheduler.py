@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Deadline Scheduler - Bộ lập lịch theo hạn chót
+==============================================
+Giữ thời điểm nhắc tiếp theo của từng reminder trong một priority queue
+(heap) và chỉ thức dậy khi đến hạn sớm nhất hoặc khi có sự kiện bên ngoài
+(menu, HTTP...). Thay cho vòng lặp thức dậy mỗi 1-5 giây để dò phút mới.
+"""
+
+import heapq
+import itertools
+import threading
+from dataclasses import fields
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from clock import SYSTEM_CLOCK
+
+# Chu kỳ nhắc định kỳ ngắn nhất (phút): 0 / âm thì hạn chót luôn đã qua,
+# vòng lặp sẽ thức liên tục
+MIN_INTERVAL = 1
+
+
+class DeadlineScheduler:
+    """Priority queue các hạn chót, mỗi key chỉ có một hạn chót hiệu lực"""
+
+    def __init__(self, clock=SYSTEM_CLOCK):
+        self._clock = clock
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._deadlines: Dict[str, Tuple[datetime, int]] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._woken = False
+        # Hàm gọi thêm khi wake() / hạn chót sớm nhất đổi (runtime asyncio)
+        self._wakers: List[Callable[[bool], None]] = []
+
+        # Số lần thread thực sự ngủ/thức (để đo idle wakeups)
+        self.wakeups = 0
+
+    def schedule(self, key: str, deadline: datetime):
+        """Đặt (hoặc thay) hạn chót cho một key (O(log n))"""
+        with self._cond:
+            current = self._deadlines.get(key)
+            if current is not None and current[0] == deadline:
+                return
+            seq = next(self._seq)
+            self._deadlines[key] = (deadline, seq)
+            heapq.heappush(self._heap, (deadline, seq, key))
+            # Entry cũ bị bỏ lười (lazy) khi nổi lên đỉnh heap
+            top = self._peek_locked()
+            earliest = top is not None and top[1] == key
+            if earliest:
+                # wait() tính lại thời gian ngủ, không trả về nếu chưa đến hạn
+                self._cond.notify_all()
+        if earliest:
+            for waker in self._wakers:
+                waker(False)
+
+    def cancel(self, key: str):
+        """Huỷ hạn chót của key (nếu có)"""
+        with self._cond:
+            self._deadlines.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[datetime]:
+        """Hạn chót hiện tại của key"""
+        entry = self._deadlines.get(key)
+        return entry[0] if entry else None
+
+    def peek(self) -> Optional[Tuple[datetime, str]]:
+        """Hạn chót sớm nhất (deadline, key)"""
+        with self._cond:
+            return self._peek_locked()
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[str]:
+        """Lấy ra các key đã đến hạn"""
+        with self._cond:
+            return self._pop_due_locked(now or self._clock.now())
+
+    def wake(self):
+        """Đánh thức thread đang wait() (sự kiện từ menu, HTTP...)"""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+        for waker in self._wakers:
+            waker(True)
+
+    def add_waker(self, waker: Callable[[bool], None]):
+        """Đăng ký hàm đánh thức cho vòng lặp asyncio (thay cho wait()).
+
+        waker(True): wake() - cần chạy một lượt; waker(False): hạn chót sớm nhất
+        đổi - chỉ cần tính lại thời gian ngủ.
+        """
+        self._wakers.append(waker)
+
+    def wait(self, max_wait: Optional[float] = None) -> List[str]:
+        """Ngủ đến hạn chót sớm nhất hoặc đến khi bị wake().
+
+        Trả về các key đã đến hạn (có thể rỗng nếu bị đánh thức từ bên ngoài
+        hoặc hết max_wait giây).
+        """
+        with self._cond:
+            started = self._clock.now()
+            while True:
+                now = self._clock.now()
+                if self._woken:
+                    self._woken = False
+                    return self._pop_due_locked(now)
+
+                top = self._peek_locked()
+                if top is not None and top[0] <= now:
+                    return self._pop_due_locked(now)
+
+                timeout = None
+                if top is not None:
+                    timeout = (top[0] - now).total_seconds()
+                if max_wait is not None:
+                    remaining = max_wait - (now - started).total_seconds()
+                    if remaining <= 0:
+                        return []
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+
+                self.wakeups += 1
+                self._clock.wait(self._cond, timeout)
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def _peek_locked(self) -> Optional[Tuple[datetime, str]]:
+        heap = self._heap
+        while heap:
+            deadline, seq, key = heap[0]
+            if self._deadlines.get(key) == (deadline, seq):
+                return deadline, key
+            heapq.heappop(heap)
+        return None
+
+    def _pop_due_locked(self, now: datetime) -> List[str]:
+        due = []
+        while True:
+            top = self._peek_locked()
+            if top is None or top[0] > now:
+                break
+            heapq.heappop(self._heap)
+            del self._deadlines[top[1]]
+            due.append(top[1])
+        return due
+
+
+# ============================================
+# DEADLINE HELPERS
+# ============================================
+
+def next_minute(now: datetime) -> datetime:
+    """Đầu phút kế tiếp"""
+    return now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+
+def next_occurrence(hhmm: tuple, now: datetime) -> datetime:
+    """Lần kế tiếp (sau now) của mốc giờ:phút cố định"""
+    at = now.replace(hour=hhmm[0], minute=hhmm[1], second=0, microsecond=0)
+    if at <= now.replace(second=0, microsecond=0):
+        at += timedelta(days=1)
+    return at
+
+
+def interval_deadlines(tracker, intervals) -> Dict[str, datetime]:
+    """Hạn chót của mọi trường ReminderInterval (walk, water, ... breathing)"""
+    deadlines = {}
+    for f in fields(intervals):
+        last = getattr(tracker, f"last_{f.name}", None)
+        if last is not None:
+            deadlines[f.name] = last + timedelta(minutes=max(getattr(intervals, f.name), MIN_INTERVAL))
+    return deadlines
+
+
+def schedule_interval_reminders(scheduler: DeadlineScheduler, tracker, intervals):
+    """Đưa hạn chót các reminder định kỳ vào scheduler"""
+    for key, deadline in interval_deadlines(tracker, intervals).items():
+        scheduler.schedule(key, deadline)
+
+
+def cancel_interval_reminders(scheduler: DeadlineScheduler, intervals):
+    """Bỏ các reminder định kỳ (ngoài giờ, tạm dừng, focus...)"""
+    for f in fields(intervals):
+        scheduler.cancel(f.name)
+
+
+def schedule_special_times(scheduler: DeadlineScheduler, special_times: Dict[str, tuple], now: datetime):
+    """Đưa các mốc giờ cố định (ăn trưa, hết giờ, night mode...) vào scheduler"""
+    for key, hhmm in special_times.items():
+        scheduler.schedule(key, next_occurrence(hhmm, now))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Simulate - Chạy thử lịch nhắc nhở với giờ ảo
+============================================
+Chạy ReminderEngine thật (cùng logic với menubar/pro) trên VirtualClock:
+một ngày hoặc cả tuần cho từng weekend_mode chỉ mất vài mili giây, và in
+ra chính xác dòng thời gian các nhắc nhở đã bắn.
+
+Cách dùng:
+    python3 menubar_app.py --simulate day
+    python3 reminder_pro.py --simulate week --json
+"""
+
+import argparse
+import json
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from clock import VirtualClock
+from reminder_engine import WorkConfig, ReminderInterval, ReminderEngine, ReminderEvent, coalesce_events
+from timeline import WEEKEND_MODES
+
+DAY_NAMES = ["T2", "T3", "T4", "T5", "T6", "T7", "CN"]
+
+
+class SimulationResult:
+    """Dòng thời gian các sự kiện của một lần mô phỏng"""
+
+    def __init__(self, config: WorkConfig, start: datetime, end: datetime):
+        self.config = config
+        self.start = start
+        self.end = end
+        self.timeline: List[Tuple[datetime, ReminderEvent, Optional[str]]] = []
+        self.wakeups = 0
+        self.deliveries = 0   # số thông báo / dialog thực sự hiện ra (sau khi gộp)
+        self.rate_limit: dict = {}
+        self.elapsed = 0.0
+
+    def counts(self) -> Dict[str, int]:
+        result: Dict[str, int] = {}
+        for _, event, _ in self.timeline:
+            result[event.key] = result.get(event.key, 0) + 1
+        return result
+
+    def to_records(self) -> List[dict]:
+        return [{
+            "time": at.isoformat(timespec="seconds"),
+            "key": event.key,
+            "style": event.style,
+            "title": event.title,
+            "choice": choice,
+        } for at, event, choice in self.timeline]
+
+
+def simulate(start: datetime, days: int = 1,
+             config: Optional[WorkConfig] = None,
+             intervals: Optional[ReminderInterval] = None,
+             enabled: Optional[Iterable[str]] = None,
+             answers: Optional[Dict[str, str]] = None) -> SimulationResult:
+    """Chạy engine trên giờ ảo từ start trong days ngày.
+
+    answers: key -> lựa chọn cho các dialog (mặc định chọn nút đầu tiên).
+    """
+    config = config or WorkConfig()
+    answers = answers or {}
+    clock = VirtualClock(start)
+    engine = ReminderEngine(config, intervals, clock=clock, enabled=enabled)
+    end = start + timedelta(days=days)
+    result = SimulationResult(config, start, end)
+
+    began = time.perf_counter()
+    while clock.now() < end:
+        pending = engine.limit(engine.poll())
+        result.deliveries += len(coalesce_events(pending))
+        while pending:
+            event = pending.pop(0)
+            choice = None
+            if event.style == "choice":
+                choice = answers.get(event.key, event.options[0])
+                replies = engine.answer(event, choice)
+                result.deliveries += len(replies)
+                pending[0:0] = replies
+            result.timeline.append((clock.now(), event, choice))
+
+        engine.plan()
+        top = engine.scheduler.peek()
+        if top is None or top[0] >= end:
+            break
+        engine.scheduler.wait()
+
+    result.wakeups = engine.scheduler.wakeups
+    result.rate_limit = engine.rate_limiter.metrics()
+    result.elapsed = time.perf_counter() - began
+    return result
+
+
+def format_result(result: SimulationResult) -> str:
+    lines = [f"=== {result.config.weekend_mode}: "
+             f"{result.start:%Y-%m-%d %H:%M} → {result.end:%Y-%m-%d %H:%M} ==="]
+    for at, event, choice in result.timeline:
+        line = f"{DAY_NAMES[at.weekday()]} {at:%Y-%m-%d %H:%M}  {event.key:<15} {event.title}"
+        if choice:
+            line += f"  → {choice}"
+        lines.append(line)
+    lines.append(f"Tổng: {len(result.timeline)} sự kiện, {result.deliveries} lần hiển thị, "
+                 f"{result.wakeups} lần thức, "
+                 f"{result.elapsed * 1000:.1f} ms")
+    if result.rate_limit.get("suppressed_total"):
+        lines.append(f"Bỏ qua do vượt ngân sách: {result.rate_limit['suppressed']}")
+    return "\n".join(lines)
+
+
+def next_monday(now: datetime) -> datetime:
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day + timedelta(days=(7 - day.weekday()) % 7)
+
+
+def run_cli(argv: List[str], config: Optional[WorkConfig] = None,
+            intervals: Optional[ReminderInterval] = None,
+            enabled: Optional[Iterable[str]] = None) -> int:
+    """Xử lý `--simulate day|week` cho các front-end"""
+    parser = argparse.ArgumentParser(description="Mô phỏng lịch nhắc nhở với giờ ảo")
+    parser.add_argument("--simulate", choices=("day", "week"), nargs="?", const="day", default="day")
+    parser.add_argument("--date", help="Ngày bắt đầu YYYY-MM-DD (mặc định: thứ 2 tới)")
+    parser.add_argument("--mode", choices=WEEKEND_MODES,
+                        help="weekend_mode (week: mặc định chạy tất cả)")
+    parser.add_argument("--json", action="store_true", help="In JSON lines")
+    args, _ = parser.parse_known_args(argv)
+
+    config = config or WorkConfig()
+    start = datetime.strptime(args.date, "%Y-%m-%d") if args.date else next_monday(datetime.now())
+
+    if args.simulate == "day":
+        modes = [args.mode or config.weekend_mode]
+        days = 1
+    else:
+        modes = [args.mode] if args.mode else list(WEEKEND_MODES)
+        days = 7
+
+    for mode in modes:
+        result = simulate(start, days, replace(config, weekend_mode=mode), intervals, enabled)
+        if args.json:
+            for record in result.to_records():
+                print(json.dumps(dict(record, mode=mode), ensure_ascii=False))
+        else:
+            print(format_result(result))
+            print()
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(run_cli(sys.argv[1:]))
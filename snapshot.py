@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Snapshot - Trạng thái bất biến dùng chung giữa các thread
+=========================================================
+Giữ một giá trị bất biến (frozen dataclass, tuple...) kèm generation tăng
+dần. Người đọc chỉ lấy tham chiếu hiện tại: không lock, không bao giờ thấy
+trạng thái dở dang. Người ghi gửi lệnh `giá trị cũ -> giá trị mới` vào một
+hàng đợi duy nhất; các lệnh được áp dụng lần lượt, mỗi lệnh một lần thay
+snapshot, nên không có hai lần ghi nào xen nhau.
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Generic, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SnapshotCell(Generic[T]):
+    """Một snapshot bất biến + generation, ghi qua hàng đợi lệnh"""
+
+    def __init__(self, value: T):
+        # (generation, value) trong một tuple: đọc một lần là có cả hai
+        self._current: Tuple[int, T] = (0, value)
+        self._commands: deque = deque()
+        self._writer = threading.Lock()
+
+    def get(self) -> T:
+        """Snapshot hiện tại (không lock)"""
+        return self._current[1]
+
+    def read(self) -> Tuple[int, T]:
+        """(generation, snapshot) nhất quán với nhau"""
+        return self._current
+
+    @property
+    def generation(self) -> int:
+        return self._current[0]
+
+    def submit(self, command: Callable[[T], T]) -> T:
+        """Đưa lệnh vào hàng đợi và chờ đến khi nó được áp dụng.
+
+        Thread nào đang giữ quyền ghi sẽ áp dụng luôn các lệnh đang chờ của
+        thread khác theo đúng thứ tự; khi submit() trả về thì lệnh của mình
+        đã có hiệu lực. Lệnh trả về đúng object cũ thì generation không đổi.
+
+        Trả về snapshot ngay sau lệnh của mình. Lệnh lỗi không đổi snapshot,
+        không chặn lệnh của thread khác, và exception được ném lại ở thread
+        đã gửi lệnh đó.
+        """
+        # Ô kết quả riêng cho lệnh: [lệnh, snapshot sau lệnh, exception]
+        slot = [command, None, None]
+        self._commands.append(slot)
+        with self._writer:
+            commands = self._commands
+            while commands:
+                pending = commands.popleft()
+                generation, value = self._current
+                try:
+                    new = pending[0](value)
+                except Exception as e:
+                    pending[2] = e
+                    continue
+                if new is not value:
+                    self._current = (generation + 1, new)
+                pending[1] = new
+        if slot[2] is not None:
+            raise slot[2]
+        return slot[1]
@@ -0,0 +1,6 @@
+"""Các module nằm ở thư mục gốc của repo (không đóng gói): thêm vào sys.path"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,113 @@
+import json
+from dataclasses import asdict
+
+import pytest
+
+from config_store import ConfigStore, edit_config, edit_intervals, settings_to_dict
+from reminder_engine import ReminderInterval, WorkConfig
+
+CUSTOM = WorkConfig(
+    work_start=(9, 0), work_end=(18, 0), weekend_mode="mon_sat_half",
+    is_configured=True, pomodoro_work=50,
+    coalesce_window=5, notifications_per_hour=12, dialog_timeout=45,
+)
+CUSTOM_INTERVALS = ReminderInterval(walk=40, water=20)
+
+
+def write_settings(path, config=CUSTOM, intervals=CUSTOM_INTERVALS):
+    path.write_text(json.dumps(settings_to_dict(config, intervals)), encoding="utf-8")
+
+
+def test_missing_file_is_not_configured(tmp_path):
+    config, intervals = ConfigStore(tmp_path / "settings.json").load()
+    assert config == WorkConfig()
+    assert intervals == ReminderInterval()
+
+
+def test_load_round_trip(tmp_path):
+    path = tmp_path / "settings.json"
+    write_settings(path)
+    assert ConfigStore(path).load() == (CUSTOM, CUSTOM_INTERVALS)
+
+
+def test_corrupt_file_is_moved_aside(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{not json", encoding="utf-8")
+    config, _ = ConfigStore(path).load()
+    assert config.is_configured
+    assert config.work_start == WorkConfig().work_start
+    assert any(tmp_path.glob("*.corrupt"))
+
+
+def test_invalid_field_falls_back_to_default(tmp_path):
+    path = tmp_path / "settings.json"
+    data = settings_to_dict(CUSTOM, CUSTOM_INTERVALS)
+    data["work_config"]["dialog_timeout"] = "soon"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    config, _ = ConfigStore(path).load()
+    assert config.dialog_timeout == WorkConfig().dialog_timeout
+    assert config.coalesce_window == CUSTOM.coalesce_window
+
+
+def test_menu_edit_keeps_other_fields(tmp_path):
+    path = tmp_path / "settings.json"
+    write_settings(path)
+    store = ConfigStore(path)
+    config, intervals = store.load()
+
+    edited = edit_config(config, work_start=(7, 30), work_end=(16, 30))
+    assert store.save_now(edited, intervals)
+    reloaded, reloaded_intervals = ConfigStore(path).load()
+
+    assert reloaded.work_start == (7, 30) and reloaded.work_end == (16, 30)
+    unchanged = {k: v for k, v in asdict(CUSTOM).items() if k not in ("work_start", "work_end")}
+    assert {k: getattr(reloaded, k) for k in unchanged} == unchanged
+    assert reloaded_intervals == CUSTOM_INTERVALS
+
+
+def test_debounced_saves_coalesce(tmp_path):
+    path = tmp_path / "settings.json"
+    store = ConfigStore(path, debounce=60)
+    for minutes in range(20, 30):
+        store.save(edit_config(CUSTOM, pomodoro_work=minutes), CUSTOM_INTERVALS)
+    assert store.pending and store.writes == 0
+    store.flush()
+    assert store.writes == 1
+    assert ConfigStore(path).load()[0].pomodoro_work == 29
+
+
+def test_reload_ignores_own_writes_and_reports_changes(tmp_path):
+    path = tmp_path / "settings.json"
+    store = ConfigStore(path)
+    store.save_now(CUSTOM, CUSTOM_INTERVALS)
+    assert not any(store.reload() or ({}, {}))
+
+    write_settings(path, edit_config(CUSTOM, dialog_timeout=90), ReminderInterval(walk=40, water=25))
+    config_changes, interval_changes = store.reload()
+    assert config_changes == {"dialog_timeout": 90}
+    assert interval_changes == {"water": 25}
+
+
+@pytest.mark.parametrize("changes", [
+    {"work_start": (25, 0)},
+    {"sleep_reminder_time": (23, 60)},
+    {"weekend_mode": "tue_fri"},
+    {"pomodoro_work": 0},
+    {"pomodoro_break": -5},
+])
+def test_menu_edit_rejects_values_the_schema_rejects(changes):
+    with pytest.raises(ValueError):
+        edit_config(CUSTOM, **changes)
+
+
+@pytest.mark.parametrize("minutes", [0, -1, 24 * 60 + 1])
+def test_interval_edit_rejects_out_of_range(minutes):
+    with pytest.raises(ValueError, match="walk"):
+        edit_intervals(CUSTOM_INTERVALS, walk=minutes)
+
+
+def test_valid_interval_edit_survives_reload(tmp_path):
+    path = tmp_path / "settings.json"
+    intervals = edit_intervals(CUSTOM_INTERVALS, walk=1, water=24 * 60)
+    ConfigStore(path).save_now(CUSTOM, intervals)
+    assert ConfigStore(path).load()[1] == intervals
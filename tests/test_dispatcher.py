@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+
+from dispatcher import AsyncNotificationDispatcher, DispatchQueueFull
+from notifier import RecordingNotifier
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_submissions_before_attach_run_after_attach(loop):
+    notifier = RecordingNotifier()
+    dispatcher = AsyncNotificationDispatcher(notifier)
+    early = [dispatcher.notify("early", str(i)) for i in range(3)]
+    answer = dispatcher.choose("ask", "?", ["A", "B"], default="B")
+    assert not any(f.done() for f in early + [answer])
+
+    loop.call_soon_threadsafe(dispatcher.attach, loop)
+    late = dispatcher.notify("late", "")
+    for future in early + [late]:
+        future.result(5)
+    assert answer.result(5) == "B"
+    notified = [call[1:] for call in notifier.calls if call[0] == "notify"]
+    assert notified[:3] == [("early", "0"), ("early", "1"), ("early", "2")]
+    assert ("late", "") in notified
+    dispatcher.close()
+
+
+def test_queue_limit_still_applies_before_attach():
+    dispatcher = AsyncNotificationDispatcher(RecordingNotifier(), max_queue=2)
+    futures = [dispatcher.notify("t", str(i)) for i in range(3)]
+    assert not futures[0].done() and not futures[1].done()
+    with pytest.raises(DispatchQueueFull):
+        futures[2].result(0)
+    dispatcher.close()
+
+
+def test_samples_export_depth_drops_and_latency(loop):
+    dispatcher = AsyncNotificationDispatcher(RecordingNotifier(), max_queue=1)
+    queued = dispatcher.notify("t", "1")
+    dispatcher.notify("t", "2")                   # đầy: bị bỏ
+    text = "\n".join(dispatcher.samples())
+    assert 'whr_dispatch_queue_depth{lane="notify"} 1' in text
+    assert 'whr_dispatch_dropped_total{lane="notify"} 1' in text
+    assert "# TYPE whr_dispatch_dropped_total counter" in text
+
+    loop.call_soon_threadsafe(dispatcher.attach, loop)
+    queued.result(5)
+    text = "\n".join(dispatcher.samples())
+    assert 'whr_dispatch_queue_depth{lane="notify"} 0' in text
+    assert 'whr_dispatch_delivered_total{lane="notify"} 1' in text
+    latency = [line for line in text.splitlines()
+               if line.startswith('whr_dispatch_latency_max_seconds{lane="notify"}')]
+    assert float(latency[0].split()[-1]) > 0
+    dispatcher.close()
@@ -0,0 +1,107 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from event_store import EventStore, week_start
+
+MONDAY = datetime(2026, 3, 9, 9, 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(tmp_path / "history.db")
+    yield store
+    store.close()
+
+
+def record_week(store):
+    """Mỗi ngày T2-T4: 3 lần nhắc nước, 2 lần đã uống, 1 lần bỏ qua đi bộ"""
+    for day in range(3):
+        base = MONDAY + timedelta(days=day)
+        for i in range(3):
+            store.record("fire", "water", None, base + timedelta(minutes=30 * i))
+        for i in range(2):
+            store.record("ack", "water", "menu", base + timedelta(minutes=30 * i + 1))
+        store.record("skip", "walk", "budget", base + timedelta(hours=1))
+    store.record("pause", when=MONDAY + timedelta(hours=2))
+
+
+def test_flush_and_query(store):
+    record_week(store)
+    assert store.pending == 19
+    assert store.flush() == 19
+    assert store.pending == 0 and store.written == 19
+
+    tuesday = store.query(since=MONDAY + timedelta(days=1), until=MONDAY + timedelta(days=2))
+    assert len(tuesday) == 6
+    assert tuesday == sorted(tuesday, key=lambda e: e.ts)
+    acks = store.query(kind="ack", reminder="water")
+    assert len(acks) == 6 and all(e.detail == "menu" for e in acks)
+    assert store.query(limit=2)[0].ts == MONDAY
+    assert store.count() == 19
+
+
+def test_reads_do_not_write(store):
+    record_week(store)
+    assert store.query() == []
+    assert store.daily(MONDAY.date()) == {}
+    # Đọc không ghi thay người gọi, chỉ đánh thức thread ghi
+    assert store.pending == 19
+    assert store._wake.is_set()
+
+
+def test_rollups(store):
+    record_week(store)
+    store.flush()
+    assert store.daily(MONDAY.date()) == {
+        ("water", "fire"): 3, ("water", "ack"): 2, ("walk", "skip"): 1, ("", "pause"): 1}
+    week = store.weekly(MONDAY.date() + timedelta(days=2))
+    assert week[("water", "fire")] == 9 and week[("water", "ack")] == 6
+    assert store.total(MONDAY.date(), MONDAY.date() + timedelta(days=2), reminder="water", kind="ack") == 4
+    assert week_start(MONDAY.date() + timedelta(days=6)) == MONDAY.date()
+
+
+def test_rollups_catch_up_after_loss(tmp_path):
+    path = tmp_path / "history.db"
+    store = EventStore(path)
+    record_week(store)
+    store.close()
+    conn = sqlite3.connect(str(path))
+    conn.execute("DROP TABLE daily_rollup")
+    conn.commit()
+    conn.close()
+
+    store = EventStore(path)
+    try:
+        store.flush()
+        assert store.daily(MONDAY.date())[("water", "fire")] == 3
+        assert store.weekly(MONDAY.date())[("water", "ack")] == 6
+    finally:
+        store.close()
+
+
+def test_failed_flush_keeps_rows(store):
+    store.record("fire", "water", None, MONDAY)
+    store.record("ack", "water", None, MONDAY + timedelta(minutes=1))
+    store._conn.execute("PRAGMA busy_timeout = 0")   # DB bị khoá: lỗi ngay thay vì chờ 5 s
+    other = sqlite3.connect(str(store.path), timeout=0)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        assert store.flush() == 0
+        assert store.pending == 2
+    finally:
+        other.rollback()
+        other.close()
+    store.record("skip", "walk", None, MONDAY + timedelta(minutes=2))
+    assert store.flush() == 3
+    assert [e.kind for e in store.query()] == ["fire", "ack", "skip"]
+
+
+def test_writer_thread_flushes(store):
+    store.flush_interval = 0.05
+    store.start()
+    store.record("fire", "water", None, MONDAY)
+    store.thread.join(0.3)
+    assert store.pending == 0
+    assert store.count() == 1
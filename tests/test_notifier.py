@@ -0,0 +1,28 @@
+import notifier
+from notifier import RecordingNotifier, _quote
+
+
+def test_quote_escapes_for_applescript():
+    assert _quote('Nói "ngủ"\\ngay\nđi') == 'Nói \\"ngủ\\"\\\\ngay\\nđi'
+
+
+def test_dialog_script_escapes_real_newlines(monkeypatch):
+    scripts = []
+
+    class Result:
+        stdout = "button returned:Đi ngủ 😴"
+
+    def fake_run(args, **kwargs):
+        scripts.append(args[-1])
+        return Result()
+
+    monkeypatch.setattr(notifier.subprocess, "run", fake_run)
+    choice = notifier.send_alert_with_options("Ngủ", "Dòng 1\nDòng 2", ["Đi ngủ 😴", "Bỏ qua"])
+    assert choice == "Đi ngủ 😴"
+    assert 'display dialog "Dòng 1\\nDòng 2"' in scripts[0]
+
+
+def test_recording_notifier_keeps_text_unescaped():
+    recorder = RecordingNotifier()
+    recorder.choose("Ngủ", "Dòng 1\nDòng 2", ["A", "B"], default="B")
+    assert recorder.calls == [("choose", "Ngủ", "Dòng 1\nDòng 2")]
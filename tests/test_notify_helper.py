@@ -0,0 +1,42 @@
+import time
+
+from notify_helper import NotifyCoprocess
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_acks_clear_pending():
+    helper = NotifyCoprocess("python")
+    try:
+        assert helper.send("t", "m", sound=False)
+        assert wait_for(lambda: helper.metrics()["acked"] == 1)
+        assert helper.metrics()["pending"] == 0
+    finally:
+        helper.close()
+
+
+def test_restart_drops_unacked_requests():
+    helper = NotifyCoprocess("python")
+    try:
+        assert helper.send("t", "1", sound=False)
+        assert helper.send("t", "2", sound=False)
+        helper._proc.kill()          # chết trước khi kịp ack
+        helper._proc.wait()
+
+        assert helper.send("t", "3", sound=False)
+        metrics = helper.metrics()
+        assert metrics["restarts"] == 1
+        assert metrics["lost"] == 2
+        assert metrics["pending"] <= 1
+        assert wait_for(lambda: helper.metrics()["acked"] == 1)
+        assert helper.metrics()["pending"] == 0
+    finally:
+        helper.close()
+    assert helper.metrics()["pending"] == 0
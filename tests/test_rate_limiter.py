@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from clock import VirtualClock
+from rate_limiter import PRIORITY_HIGH, PRIORITY_LOW, NotificationRateLimiter, priority_of
+from reminder_engine import ReminderEvent
+
+NOW = datetime(2026, 3, 9, 9, 0)
+
+
+def event(key, style="notification"):
+    return ReminderEvent(key=key, title=key, message="", style=style)
+
+
+def keys(events):
+    return [e.key for e in events]
+
+
+def test_priorities():
+    assert priority_of(event("blink")) == PRIORITY_LOW
+    assert priority_of(event("lunch_start")) == PRIORITY_HIGH
+    assert priority_of(event("water", style="choice")) == PRIORITY_HIGH
+
+
+def test_budget_runs_out_then_refills():
+    clock = VirtualClock(NOW)
+    limiter = NotificationRateLimiter(per_hour=6, burst=2, clock=clock)
+    assert keys(limiter.filter([event("water")])) == ["water"]
+    assert keys(limiter.filter([event("walk")])) == ["walk"]
+    assert limiter.filter([event("posture")]) == []
+    assert limiter.metrics()["suppressed"] == {"posture": 1}
+
+    clock.advance(timedelta(minutes=10))   # 6/giờ: thêm 1 token
+    assert keys(limiter.filter([event("posture")])) == ["posture"]
+
+
+def test_high_priority_always_passes():
+    limiter = NotificationRateLimiter(per_hour=6, burst=2, clock=VirtualClock(NOW))
+    limiter.filter([event("water")])
+    limiter.filter([event("walk")])
+    assert keys(limiter.filter([event("work_end"), event("water")])) == ["work_end"]
+
+
+def test_one_token_per_coalesced_notification():
+    limiter = NotificationRateLimiter(per_hour=6, burst=2, clock=VirtualClock(NOW))
+    batch = [event("walk"), event("water"), event("posture")]
+    assert keys(limiter.filter(batch)) == ["walk", "water", "posture"]
+    assert limiter.metrics()["tokens"] == 1
+
+
+def test_low_priority_rides_along_or_needs_half_bucket():
+    limiter = NotificationRateLimiter(per_hour=12, burst=4, clock=VirtualClock(NOW))
+    # Đi cùng thông báo khác: gộp chung, không tốn thêm token
+    assert keys(limiter.filter([event("water"), event("blink")])) == ["water", "blink"]
+    assert limiter.metrics()["merged"] == {"blink": 1}
+    assert limiter.tokens == 3
+    # Một mình: chỉ gửi nếu còn ít nhất nửa bucket sau đó
+    assert keys(limiter.filter([event("blink")])) == ["blink"]
+    assert limiter.filter([event("blink")]) == []
+    assert limiter.metrics()["suppressed"] == {"blink": 1}
+
+
+def test_unlimited_budget():
+    limiter = NotificationRateLimiter(per_hour=0, clock=VirtualClock(NOW))
+    batch = [event("blink") for _ in range(100)]
+    assert len(limiter.filter(batch)) == 100
+
+
+def test_samples_show_suppressed_per_type():
+    limiter = NotificationRateLimiter(per_hour=6, burst=2, clock=VirtualClock(NOW))
+    for key in ("water", "walk", "posture", "posture"):
+        limiter.filter([event(key)])
+    limiter.filter([event("water"), event("blink")])
+    text = "\n".join(limiter.samples())
+    assert 'whr_rate_limit_suppressed_total{type="posture"} 2' in text
+    assert 'whr_rate_limit_suppressed_total{type="blink"} 1' in text
+    assert "whr_rate_limit_allowed_total 2" in text
+    assert "# TYPE whr_rate_limit_suppressed_total counter" in text
+
+
+def test_summary_for_stats_menu():
+    limiter = NotificationRateLimiter(per_hour=6, burst=2, clock=VirtualClock(NOW))
+    assert limiter.summary() == "Bỏ qua do ngân sách: 0"
+    for key in ("water", "walk", "posture", "blink", "posture"):
+        limiter.filter([event(key)])
+    assert limiter.summary() == "Bỏ qua do ngân sách: 3 (posture 2, blink 1)"
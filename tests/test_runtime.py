@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from clock import VirtualClock
+from dispatcher import AsyncNotificationDispatcher
+from notifier import RecordingNotifier
+from reminder_engine import ReminderEngine
+from runtime import AsyncRuntime, engine_gauges
+
+
+def test_engine_gauges_include_rate_limiter_and_dispatcher():
+    dispatcher = AsyncNotificationDispatcher(RecordingNotifier())
+    engine = ReminderEngine(clock=VirtualClock(datetime(2026, 3, 9, 9, 0)), notifier=dispatcher)
+    text = "\n".join(engine_gauges(AsyncRuntime(engine, dispatcher=dispatcher)))
+    assert "whr_rate_limit_tokens" in text
+    assert 'whr_dispatch_queue_depth{lane="notify"} 0' in text
+    dispatcher.close()
+
+
+def test_bridge_only_runtime_has_no_engine_gauges():
+    assert engine_gauges(AsyncRuntime(None)) == []
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+from clock import VirtualClock
+from notifier import RecordingNotifier
+from reminder_engine import ReminderEngine, ReminderInterval, TrackerState, WorkConfig
+from scheduler import MIN_INTERVAL, DeadlineScheduler, interval_deadlines, next_minute, next_occurrence
+
+START = datetime(2026, 3, 9, 7, 59)   # thứ 2
+
+
+def test_wait_sleeps_until_earliest_deadline():
+    clock = VirtualClock(START)
+    scheduler = DeadlineScheduler(clock)
+    scheduler.schedule("water", START + timedelta(minutes=30))
+    scheduler.schedule("walk", START + timedelta(minutes=10))
+    assert scheduler.peek() == (START + timedelta(minutes=10), "walk")
+
+    assert scheduler.wait() == ["walk"]
+    assert clock.now() == START + timedelta(minutes=10)
+    assert scheduler.wait() == ["water"]
+    assert clock.now() == START + timedelta(minutes=30)
+    assert len(scheduler) == 0
+
+
+def test_reschedule_and_cancel_replace_old_entries():
+    clock = VirtualClock(START)
+    scheduler = DeadlineScheduler(clock)
+    scheduler.schedule("walk", START + timedelta(minutes=5))
+    scheduler.schedule("walk", START + timedelta(minutes=20))
+    scheduler.schedule("water", START + timedelta(minutes=10))
+    scheduler.cancel("water")
+    assert scheduler.deadline("water") is None
+    assert scheduler.pop_due(START + timedelta(minutes=15)) == []
+    assert scheduler.pop_due(START + timedelta(minutes=20)) == ["walk"]
+
+
+def test_wake_and_max_wait():
+    clock = VirtualClock(START)
+    scheduler = DeadlineScheduler(clock)
+    woken = []
+    scheduler.add_waker(woken.append)
+    scheduler.schedule("walk", START + timedelta(hours=1))
+    assert woken == [False]          # hạn chót sớm nhất đổi
+    scheduler.wake()
+    assert woken == [False, True]
+    assert scheduler.wait() == []    # bị đánh thức: không chờ
+    assert clock.now() == START
+    assert scheduler.wait(max_wait=60) == []
+    assert clock.now() == START + timedelta(minutes=1)
+
+
+def test_deadline_helpers():
+    now = datetime(2026, 3, 9, 11, 30, 15)
+    assert next_minute(now) == datetime(2026, 3, 9, 11, 31)
+    assert next_occurrence((11, 30), now) == datetime(2026, 3, 10, 11, 30)
+    assert next_occurrence((13, 0), now) == datetime(2026, 3, 9, 13, 0)
+
+
+def run_engine(engine, clock, until):
+    fired = []
+    while clock.now() < until:
+        fired.extend((clock.now(), event.key) for event in engine.tick())
+        engine.scheduler.wait()
+    return fired
+
+
+def test_engine_wakes_only_at_deadlines():
+    clock = VirtualClock(START)
+    notifier = RecordingNotifier()
+    engine = ReminderEngine(WorkConfig(is_configured=True), ReminderInterval(walk=30, water=45),
+                            clock=clock, notifier=notifier,
+                            enabled=["walk", "water", "morning", "lunch_start"])
+    fired = run_engine(engine, clock, datetime(2026, 3, 9, 11, 45))
+
+    walks = [at for at, key in fired if key == "walk"]
+    assert walks[:2] == [datetime(2026, 3, 9, 8, 30), datetime(2026, 3, 9, 9, 0)]
+    assert (datetime(2026, 3, 9, 8, 45), "water") in fired
+    assert (datetime(2026, 3, 9, 11, 30), "lunch_start") in fired
+    # Nghỉ trưa: không nhắc định kỳ
+    assert not [at for at, key in fired if key == "walk" and at > datetime(2026, 3, 9, 11, 30)]
+    # Chỉ thức khi đến hạn, không dò từng phút
+    assert engine.scheduler.wakeups < 20
+
+    morning = [call for call in notifier.calls if call[0] == "choose"]
+    assert morning and "\n" in morning[0][2] and "\\n" not in morning[0][2]
+    assert ("notify", "🍚 Giờ ăn trưa!", "Đi lấy phiếu ăn cơm thôi!") in notifier.calls
+
+
+def test_pause_cancels_interval_deadlines():
+    clock = VirtualClock(datetime(2026, 3, 9, 9, 0))
+    engine = ReminderEngine(WorkConfig(is_configured=True), clock=clock,
+                            notifier=RecordingNotifier(), enabled=["walk"])
+    engine.tick()
+    assert engine.scheduler.deadline("walk") is not None
+    engine.tracker.update(is_paused=True)
+    engine.plan()
+    assert engine.scheduler.deadline("walk") is None
+
+
+def test_interval_deadlines_clamp_zero_and_negative():
+    tracker = TrackerState().reset_all(START)
+    deadlines = interval_deadlines(tracker, ReminderInterval(walk=0, water=-5))
+    assert deadlines["walk"] == START + timedelta(minutes=MIN_INTERVAL)
+    assert deadlines["water"] == START + timedelta(minutes=MIN_INTERVAL)
+
+
+def test_zero_interval_does_not_spin():
+    clock = VirtualClock(datetime(2026, 3, 9, 8, 0))
+    engine = ReminderEngine(WorkConfig(is_configured=True), ReminderInterval(walk=0),
+                            clock=clock, notifier=RecordingNotifier(), enabled=["walk"])
+    assert engine.intervals.walk == MIN_INTERVAL
+    fired = run_engine(engine, clock, datetime(2026, 3, 9, 9, 0))
+    walks = [at for at, key in fired if key == "walk"]
+    assert len(walks) == len(set(walks)) <= 60
+    assert engine.scheduler.wakeups <= 61
+
+    engine.update_config(intervals=ReminderInterval(walk=-3))
+    assert engine.intervals.walk == MIN_INTERVAL
@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from snapshot import SnapshotCell
+
+
+def test_submit_returns_own_result_and_bumps_generation():
+    cell = SnapshotCell(0)
+    assert cell.submit(lambda v: v + 1) == 1
+    assert cell.read() == (1, 1)
+    # Trả về đúng object cũ: generation không đổi
+    assert cell.submit(lambda v: v) == 1
+    assert cell.generation == 1
+
+
+def test_failed_command_raises_in_submitter():
+    cell = SnapshotCell(0)
+    with pytest.raises(ZeroDivisionError):
+        cell.submit(lambda v: v // 0)
+    assert cell.read() == (0, 0)
+
+
+def test_failed_command_does_not_block_other_threads():
+    cell = SnapshotCell(0)
+    errors, results = [], []
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        barrier.wait()
+        for n in range(200):
+            try:
+                results.append(cell.submit(lambda v: v + 1 if (i + n) % 5 else v // 0))
+            except ZeroDivisionError:
+                errors.append((i, n))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    expected_errors = sum(1 for i in range(8) for n in range(200) if (i + n) % 5 == 0)
+    assert len(errors) == expected_errors
+    assert cell.get() == len(results) == 8 * 200 - expected_errors
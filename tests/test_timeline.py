@@ -0,0 +1,86 @@
+from datetime import date, datetime
+
+import pytest
+
+from reminder_engine import WorkConfig
+from timeline import (LUNCH, MORNING, WEEKEND_MODES, WORK, TimelineCache, compile_day,
+                      is_work_weekday, work_end_for_weekday)
+
+MONDAY = date(2026, 3, 9)
+SATURDAY = date(2026, 3, 14)
+SUNDAY = date(2026, 3, 15)
+
+
+def minute(hh, mm):
+    return hh * 60 + mm
+
+
+def test_weekday_segments():
+    timeline = compile_day(WorkConfig(), MONDAY)
+    assert timeline.is_work_day and not timeline.is_half_day
+    assert timeline.segments() == [
+        (0, minute(7, 30), 0),
+        (minute(7, 30), minute(8, 0), MORNING),
+        (minute(8, 0), minute(11, 30), WORK),
+        (minute(11, 30), minute(13, 0), LUNCH),
+        (minute(13, 0), minute(17, 30), WORK),
+        (minute(17, 30), 24 * 60, 0),
+    ]
+    assert timeline.flags_at(minute(11, 29)) == WORK
+    assert timeline.flags_at(minute(11, 30)) == LUNCH
+    assert timeline.flags_at(minute(17, 30)) == 0
+
+
+@pytest.mark.parametrize("mode, saturday, sunday", [
+    ("mon_fri", False, False),
+    ("mon_sat_full", True, False),
+    ("mon_sat_half", True, False),
+    ("mon_sun_full", True, True),
+    ("mon_sun_half", True, True),
+])
+def test_weekend_modes(mode, saturday, sunday):
+    assert mode in WEEKEND_MODES
+    config = WorkConfig(weekend_mode=mode)
+    assert is_work_weekday(config, 0)
+    assert is_work_weekday(config, 5) == saturday
+    assert is_work_weekday(config, 6) == sunday
+    assert compile_day(config, SATURDAY).is_work_day == saturday
+
+
+def test_half_day_has_no_lunch_and_ends_early():
+    config = WorkConfig(weekend_mode="mon_sat_half", saturday_end=(12, 0))
+    assert work_end_for_weekday(config, 5) == (12, 0)
+    timeline = compile_day(config, SATURDAY)
+    assert timeline.is_half_day
+    assert timeline.flags_at(minute(11, 45)) == WORK
+    assert timeline.flags_at(minute(12, 0)) == 0
+    assert not any(flags & LUNCH for _, _, flags in timeline.segments())
+    # Ngày thường vẫn theo giờ làm đầy đủ
+    assert compile_day(config, MONDAY).flags_at(minute(16, 0)) == WORK
+
+
+def test_day_off_only_has_no_flags():
+    assert compile_day(WorkConfig(), SUNDAY).segments() == [(0, 24 * 60, 0)]
+
+
+def test_cache_reuses_and_invalidates_on_new_config():
+    cache = TimelineCache()
+    config = WorkConfig()
+    first, flags = cache.at(config, datetime(2026, 3, 9, 9, 0))
+    assert flags == WORK
+    assert cache.get(config, MONDAY) is first
+
+    changed = WorkConfig(work_start=(9, 30))
+    generation = cache.generation
+    timeline, flags = cache.at(changed, datetime(2026, 3, 9, 9, 0))
+    assert cache.generation == generation + 1
+    assert timeline is not first
+    assert flags == MORNING
+
+
+def test_cache_is_bounded():
+    cache = TimelineCache(max_days=3)
+    config = WorkConfig()
+    for day in range(1, 10):
+        cache.get(config, date(2026, 3, day))
+    assert len(cache._days) <= 3
@@ -0,0 +1,117 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from clock import VirtualClock
+from reminder_engine import ReminderEngine, TrackerState
+from tracker_store import RESUME_GRACE, TIME_FIELDS, TrackerStore, decode_state, encode_state, reconcile
+
+SAVED = datetime(2026, 3, 10, 10, 0)
+
+
+def running_state(**changes) -> TrackerState:
+    state = TrackerState().reset_all(SAVED - timedelta(minutes=20))
+    return replace(state, morning_reminded=True, work_started_today=True, pomodoro_count=3, **changes)
+
+
+def test_encode_decode_round_trip():
+    state = running_state(focus_end_time=SAVED + timedelta(minutes=15), pomodoro_state="break",
+                          pomodoro_end_time=SAVED + timedelta(minutes=5), last_blink=None)
+    decoded, saved_at = decode_state(encode_state(state, SAVED))
+    assert decoded == state
+    assert saved_at == SAVED
+
+
+def test_decode_rejects_corrupt_data():
+    data = bytearray(encode_state(running_state(), SAVED))
+    data[-1] ^= 0xFF
+    with pytest.raises(ValueError):
+        decode_state(bytes(data))
+    with pytest.raises(ValueError):
+        decode_state(bytes(data[:-1]))
+
+
+def test_short_restart_keeps_overdue_timers():
+    state = running_state()
+    now = SAVED + timedelta(minutes=5)
+    assert reconcile(state, SAVED, now) == state
+
+
+def test_restart_after_grace_resets_timers():
+    now = SAVED + RESUME_GRACE + timedelta(minutes=1)
+    result = reconcile(running_state(), SAVED, now)
+    assert all(getattr(result, name) == now for name in TIME_FIELDS)
+    # Cùng ngày: flag hàng ngày giữ nguyên
+    assert result.morning_reminded and result.pomodoro_count == 3
+
+
+def test_day_rollover_resets_daily_flags():
+    now = datetime(2026, 3, 11, 7, 45)
+    result = reconcile(running_state(sleep_reminded=True), SAVED, now)
+    assert not (result.morning_reminded or result.sleep_reminded or result.work_started_today)
+    assert result.pomodoro_count == 0
+    assert all(getattr(result, name) == now for name in TIME_FIELDS)
+
+
+def test_clock_moved_backwards():
+    now = SAVED - timedelta(minutes=10)
+    result = reconcile(running_state(), SAVED, now)
+    assert all(getattr(result, name) == now for name in TIME_FIELDS)
+
+
+def test_future_timestamps_are_clamped_within_grace():
+    now = SAVED + timedelta(minutes=5)
+    state = running_state(last_water=now + timedelta(minutes=30))
+    result = reconcile(state, SAVED, now)
+    assert result.last_water == now
+    assert result.last_walk == state.last_walk
+
+
+def test_expired_focus_and_pomodoro_are_dropped():
+    now = SAVED + timedelta(minutes=10)
+    state = running_state(focus_end_time=SAVED + timedelta(minutes=5), pomodoro_state="work",
+                          pomodoro_end_time=SAVED + timedelta(minutes=8))
+    result = reconcile(state, SAVED, now)
+    assert result.focus_end_time is None
+    assert result.pomodoro_state is None and result.pomodoro_end_time is None
+
+
+def test_running_pomodoro_survives():
+    now = SAVED + timedelta(minutes=10)
+    end = SAVED + timedelta(minutes=20)
+    result = reconcile(running_state(pomodoro_state="work", pomodoro_end_time=end), SAVED, now)
+    assert result.pomodoro_state == "work" and result.pomodoro_end_time == end
+
+
+def test_pomodoro_waiting_for_answer_is_cleared():
+    # Hết giờ nghỉ, dialog "tiếp / dừng" mất theo app: không được kẹt ở "break"
+    state = running_state(pomodoro_state="break", pomodoro_end_time=None)
+    result = reconcile(state, SAVED, SAVED + timedelta(minutes=1))
+    assert result.pomodoro_state is None
+    assert not result.is_pomodoro_active()
+
+
+def test_store_restores_engine(tmp_path):
+    clock = VirtualClock(SAVED)
+    engine = ReminderEngine(clock=clock)
+    engine.tracker.update(last_walk=SAVED - timedelta(minutes=29), morning_reminded=True)
+    store = TrackerStore(engine.tracker, tmp_path / "tracker.bin")
+    assert store.save()
+    assert not store.save()          # chưa bẩn: không ghi lại
+    assert store.writes == 1
+
+    clock.advance(timedelta(minutes=5))
+    restarted = ReminderEngine(clock=clock)
+    restored = TrackerStore(restarted.tracker, tmp_path / "tracker.bin")
+    assert restored.restore(restarted)
+    assert restarted.tracker.state.last_walk == SAVED - timedelta(minutes=29)
+    assert restarted.tracker.state.morning_reminded
+    assert not restored.save()
+
+
+def test_store_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "tracker.bin"
+    path.write_bytes(b"garbage")
+    engine = ReminderEngine(clock=VirtualClock(SAVED))
+    assert not TrackerStore(engine.tracker, path).restore(engine)
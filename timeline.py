@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Schedule Timeline - Lịch trong ngày đã biên dịch
+================================================
+Biên dịch WorkConfig + weekend_mode thành một mảng mốc phút đã sắp xếp cho
+từng ngày. Tra cứu trạng thái (giờ làm, nghỉ trưa, khung nhắc buổi sáng)
+chỉ còn một lần bisect, và kết quả được nhớ theo ngày + thế hệ config.
+"""
+
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+# Cờ trạng thái của một đoạn trong ngày
+WORK = 1
+LUNCH = 2
+MORNING = 4
+
+MINUTES_PER_DAY = 24 * 60
+
+# Các giá trị hợp lệ của WorkConfig.weekend_mode
+WEEKEND_MODES = ("mon_fri", "mon_sat_full", "mon_sat_half", "mon_sun_full", "mon_sun_half")
+
+
+def time_to_minutes(hour: int, minute: int) -> int:
+    return hour * 60 + minute
+
+
+# ============================================
+# QUY TẮC NGÀY LÀM VIỆC (theo weekday)
+# ============================================
+
+def is_work_weekday(config, weekday: int) -> bool:
+    """Ngày trong tuần (Monday=0) có phải ngày làm việc không"""
+    mode = config.weekend_mode
+    if mode == "mon_fri":
+        return weekday < 5  # T2-T6
+    elif mode in ("mon_sat_full", "mon_sat_half"):
+        return weekday < 6  # T2-T7 (nửa ngày T7)
+    elif mode in ("mon_sun_full", "mon_sun_half"):
+        return True  # Cả tuần (T2-CN)
+    return weekday < 5
+
+
+def is_half_weekday(config, weekday: int) -> bool:
+    """T7/CN nửa ngày"""
+    if weekday == 5 and config.weekend_mode == "mon_sat_half":
+        return True
+    if weekday == 6 and config.weekend_mode == "mon_sun_half":
+        return True
+    return False
+
+
+def work_end_for_weekday(config, weekday: int) -> tuple:
+    """Giờ kết thúc của ngày (xử lý T7/CN nửa ngày)"""
+    if weekday == 5 and config.weekend_mode == "mon_sat_half":
+        return config.saturday_end
+    if weekday == 6 and config.weekend_mode == "mon_sun_half":
+        return config.sunday_end
+    return config.work_end
+
+
+# ============================================
+# TIMELINE
+# ============================================
+
+class DayTimeline:
+    """Các đoạn trạng thái của một ngày, tra cứu bằng bisect"""
+
+    __slots__ = ("day", "is_work_day", "is_half_day", "work_end", "boundaries", "flags")
+
+    def __init__(self, day: date, is_work_day: bool, is_half_day: bool, work_end: tuple,
+                 boundaries: List[int], flags: List[int]):
+        self.day = day
+        self.is_work_day = is_work_day
+        self.is_half_day = is_half_day
+        self.work_end = work_end
+        # flags[i] áp dụng cho [boundaries[i], boundaries[i + 1])
+        self.boundaries = boundaries
+        self.flags = flags
+
+    def flags_at(self, minute: int) -> int:
+        return self.flags[bisect_right(self.boundaries, minute) - 1]
+
+    def segments(self) -> List[Tuple[int, int, int]]:
+        """Danh sách (bắt đầu, kết thúc, cờ) theo phút trong ngày"""
+        ends = self.boundaries[1:] + [MINUTES_PER_DAY]
+        return list(zip(self.boundaries, ends, self.flags))
+
+
+def _flags_for_minute(config, work_day: bool, half_day: bool, work_end: tuple, current: int) -> int:
+    """Quy tắc gốc (giống is_work_time/is_lunch_break...) cho một phút"""
+    if not work_day:
+        return 0
+
+    flags = 0
+    work_start = time_to_minutes(*config.work_start)
+    end = time_to_minutes(*work_end)
+
+    if half_day:
+        # T7 nửa ngày: không có nghỉ trưa
+        if work_start <= current < end:
+            flags |= WORK
+    else:
+        lunch_start = time_to_minutes(*config.lunch_start)
+        work_resume = time_to_minutes(*config.work_resume)
+        if work_start <= current < lunch_start or work_resume <= current < end:
+            flags |= WORK
+        if lunch_start <= current < work_resume:
+            flags |= LUNCH
+
+    morning_start = time_to_minutes(*config.morning_reminder_start)
+    if morning_start <= current < work_start:
+        flags |= MORNING
+    return flags
+
+
+def compile_day(config, day: date) -> DayTimeline:
+    """Biên dịch config thành timeline cho một ngày"""
+    weekday = day.weekday()
+    work_day = is_work_weekday(config, weekday)
+    half_day = is_half_weekday(config, weekday)
+    work_end = work_end_for_weekday(config, weekday)
+
+    # Mọi mốc có thể làm đổi trạng thái; giữa hai mốc trạng thái không đổi
+    points = {0}
+    for hhmm in (config.work_start, config.lunch_start, config.work_resume,
+                 work_end, config.morning_reminder_start):
+        minute = time_to_minutes(*hhmm)
+        if 0 <= minute < MINUTES_PER_DAY:
+            points.add(minute)
+
+    boundaries: List[int] = []
+    flags: List[int] = []
+    for minute in sorted(points):
+        f = _flags_for_minute(config, work_day, half_day, work_end, minute)
+        if flags and flags[-1] == f:
+            continue  # gộp đoạn liền kề cùng trạng thái
+        boundaries.append(minute)
+        flags.append(f)
+
+    return DayTimeline(day, work_day, half_day, work_end, boundaries, flags)
+
+
+class TimelineCache:
+    """Nhớ timeline theo ngày, tự bỏ khi config đổi thế hệ"""
+
+    def __init__(self, max_days: int = 8):
+        self.max_days = max_days
+        self.generation = 0
+        self._config = None
+        self._days: Dict[date, DayTimeline] = {}
+        # Fast path: timeline gần nhất
+        self._last: Optional[DayTimeline] = None
+
+    def invalidate(self, config=None):
+        """Gọi khi config thay đổi"""
+        self.generation += 1
+        self._config = config
+        self._days.clear()
+        self._last = None
+
+    def get(self, config, day: date) -> DayTimeline:
+        if config is not self._config:
+            self.invalidate(config)
+
+        last = self._last
+        if last is not None and last.day == day:
+            return last
+
+        timeline = self._days.get(day)
+        if timeline is None:
+            if len(self._days) >= self.max_days:
+                self._days.clear()
+            timeline = compile_day(config, day)
+            self._days[day] = timeline
+        self._last = timeline
+        return timeline
+
+    def at(self, config, now: datetime) -> Tuple[DayTimeline, int]:
+        """(timeline của ngày, cờ trạng thái tại phút hiện tại)"""
+        timeline = self.get(config, now.date())
+        return timeline, timeline.flags_at(now.hour * 60 + now.minute)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Tracker Store - Lưu / khôi phục trạng thái tracker qua các lần khởi động
+========================================================================
+Trước đây mỗi lần khởi động lại (crash, đăng nhập lại...) tracker bắt đầu
+từ reset_all(): khởi động lại lúc 10:25 thì nhắc đi bộ đã quá hạn bị lùi
+thêm nguyên một chu kỳ.
+
+- File nhị phân cố định 116 byte (tracker.bin cạnh settings.json): header
+  (magic, version, crc32, thời điểm lưu) + các field của TrackerState.
+  Ghi nguyên tử bằng atomic_write() của config_store.
+- Chỉ ghi khi bẩn: so generation của tracker với lần lưu trước, kiểm tra
+  mỗi SAVE_INTERVAL giây trên event loop của runtime (không thêm thread).
+  Tracker không đổi thì vẫn ghi lại mỗi HEARTBEAT để "thời điểm lưu" cho
+  biết app còn chạy đến lúc nào (tính thời gian tắt khi khôi phục).
+- Khởi động: đọc + giải mã vài µs, rồi reconcile() theo đồng hồ thật trước
+  khi đưa vào engine (ReminderEngine.restore).
+"""
+
+import struct
+import time
+import zlib
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Tuple
+
+from config_store import atomic_write, default_config_dir
+from reminder_engine import INTERVAL_KEYS, TrackerState
+
+SAVE_INTERVAL = 5.0
+HEARTBEAT = 600.0
+# Tắt app lâu hơn thế này thì coi như người dùng đã rời máy (một lần nghỉ):
+# các timer định kỳ tính lại từ lúc mở app
+RESUME_GRACE = timedelta(minutes=30)
+
+MAGIC = b"WHRT"
+VERSION = 1
+TIME_FIELDS = tuple(f"last_{key}" for key in INTERVAL_KEYS)
+FLAG_FIELDS = ("is_paused", "night_mode_reminded", "sleep_reminded", "morning_reminded", "work_started_today")
+POMODORO_STATES = (None, "work", "break")
+
+HEADER = struct.Struct("<4sHId")   # magic, version, crc32(body), saved_at
+BODY = struct.Struct(f"<{len(TIME_FIELDS)}d{len(FLAG_FIELDS)}?dBdI")
+NONE = float("nan")
+
+
+def default_tracker_path() -> Path:
+    return default_config_dir() / "tracker.bin"
+
+
+# ============================================
+# MÃ HOÁ
+# ============================================
+
+def _ts(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else NONE
+
+
+def _dt(value: float) -> Optional[datetime]:
+    return None if value != value else datetime.fromtimestamp(value)   # NaN -> None
+
+
+def encode_state(state: TrackerState, saved_at: datetime) -> bytes:
+    pomodoro = POMODORO_STATES.index(state.pomodoro_state) if state.pomodoro_state in POMODORO_STATES else 0
+    body = BODY.pack(
+        *(_ts(getattr(state, name)) for name in TIME_FIELDS),
+        *(getattr(state, name) for name in FLAG_FIELDS),
+        _ts(state.focus_end_time), pomodoro, _ts(state.pomodoro_end_time), state.pomodoro_count,
+    )
+    return HEADER.pack(MAGIC, VERSION, zlib.crc32(body), saved_at.timestamp()) + body
+
+
+def decode_state(data: bytes) -> Tuple[TrackerState, datetime]:
+    """bytes -> (state, thời điểm lưu). ValueError nếu file sai định dạng / hỏng"""
+    if len(data) != HEADER.size + BODY.size:
+        raise ValueError(f"kích thước {len(data)} byte, cần {HEADER.size + BODY.size}")
+    magic, version, crc, saved_at = HEADER.unpack_from(data)
+    body = data[HEADER.size:]
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"định dạng không hỗ trợ: {magic!r} v{version}")
+    if zlib.crc32(body) != crc:
+        raise ValueError("sai checksum")
+    values = BODY.unpack(body)
+    n_times, n_flags = len(TIME_FIELDS), len(FLAG_FIELDS)
+    focus_end, pomodoro, pomodoro_end, pomodoro_count = values[n_times + n_flags:]
+    state = TrackerState(
+        **{name: _dt(v) for name, v in zip(TIME_FIELDS, values[:n_times])},
+        **dict(zip(FLAG_FIELDS, values[n_times:n_times + n_flags])),
+        focus_end_time=_dt(focus_end),
+        pomodoro_state=POMODORO_STATES[pomodoro] if pomodoro < len(POMODORO_STATES) else None,
+        pomodoro_end_time=_dt(pomodoro_end),
+        pomodoro_count=pomodoro_count,
+    )
+    return state, datetime.fromtimestamp(saved_at)
+
+
+# ============================================
+# ĐỐI CHIẾU VỚI ĐỒNG HỒ
+# ============================================
+
+def reconcile(state: TrackerState, saved_at: datetime, now: datetime,
+              grace: timedelta = RESUME_GRACE) -> TrackerState:
+    """Sửa snapshot cũ cho khớp với bây giờ.
+
+    - Sang ngày mới: reset các flag hàng ngày (như lúc 00:00).
+    - Tắt lâu hơn grace: timer định kỳ tính lại từ bây giờ; ngắn hơn thì giữ
+      nguyên để nhắc đã quá hạn vẫn bắn ngay.
+    - Mốc thời gian ở tương lai (đồng hồ bị lùi): kéo về bây giờ.
+    - Focus / Pomodoro đã hết giờ trong lúc tắt: bỏ. Pomodoro không có giờ
+      kết thúc (hết nghỉ, đang chờ hỏi tiếp / dừng): dialog đã mất theo app
+      nên cũng bỏ, không thì nhắc nhở bị tắt mãi.
+    """
+    if saved_at.date() != now.date():
+        state = state.reset_daily()
+    if now - saved_at > grace or saved_at > now:
+        state = state.reset_all(now)
+    else:
+        future = {name: now for name in TIME_FIELDS
+                  if getattr(state, name) is not None and getattr(state, name) > now}
+        if future:
+            state = replace(state, **future)
+    if state.focus_end_time is not None and state.focus_end_time <= now:
+        state = replace(state, focus_end_time=None)
+    if state.pomodoro_end_time is None or state.pomodoro_end_time <= now:
+        state = replace(state, pomodoro_state=None, pomodoro_end_time=None)
+    return state
+
+
+# ============================================
+# STORE
+# ============================================
+
+class TrackerStore:
+    """Lưu tracker khi bẩn, khôi phục lúc khởi động"""
+
+    def __init__(self, tracker, path: Optional[Path] = None, interval: float = SAVE_INTERVAL):
+        self.tracker = tracker
+        self.path = Path(path) if path else default_tracker_path()
+        self.interval = interval
+        self.loop = None
+        self._handle = None
+        self._saved_generation: Optional[int] = None
+        self._saved_at = 0.0
+        self.writes = 0
+
+    def load(self) -> Optional[Tuple[TrackerState, datetime]]:
+        """(state, saved_at) hoặc None nếu chưa có / hỏng"""
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Error loading tracker: {e}")
+            return None
+        try:
+            return decode_state(data)
+        except (ValueError, struct.error) as e:
+            print(f"Tracker snapshot ignored: {e}")
+            return None
+
+    def restore(self, engine) -> bool:
+        """Đọc snapshot, đối chiếu với đồng hồ rồi nạp vào engine"""
+        started = time.perf_counter()
+        loaded = self.load()
+        if loaded is None:
+            return False
+        state, saved_at = loaded
+        now = engine.now()
+        engine.restore(reconcile(state, saved_at, now), saved_at)
+        # Vừa nạp từ file: chưa bẩn
+        self._saved_generation = self.tracker.generation
+        self._saved_at = time.monotonic()
+        print(f"Tracker restored from {saved_at:%Y-%m-%d %H:%M:%S} "
+              f"({(time.perf_counter() - started) * 1000:.2f} ms)")
+        return True
+
+    def save(self, force: bool = False) -> bool:
+        """Ghi nếu tracker đã đổi từ lần ghi trước (hoặc đã quá HEARTBEAT)"""
+        generation, state = self.tracker.read()
+        if (not force and generation == self._saved_generation
+                and time.monotonic() - self._saved_at < HEARTBEAT):
+            return False
+        try:
+            atomic_write(self.path, encode_state(state, self.tracker.clock.now()))
+        except OSError as e:
+            print(f"Error saving tracker: {e}")
+            return False
+        self._saved_generation = generation
+        self._saved_at = time.monotonic()
+        self.writes += 1
+        return True
+
+    # ---------- Trên event loop ----------
+
+    def attach(self, loop):
+        """Kiểm tra bẩn mỗi interval giây (gọi trên thread của loop)"""
+        self.loop = loop
+        self._handle = loop.call_later(self.interval, self._tick)
+
+    def _tick(self):
+        self.save()
+        self._handle = self.loop.call_later(self.interval, self._tick)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+
+def main():
+    """In snapshot đang lưu"""
+    store = TrackerStore(None)
+    started = time.perf_counter()
+    loaded = store.load()
+    elapsed = (time.perf_counter() - started) * 1e6
+    if loaded is None:
+        print(f"Chưa có snapshot ({store.path})")
+        return
+    state, saved_at = loaded
+    print(f"{store.path} ({HEADER.size + BODY.size} byte), lưu lúc {saved_at:%Y-%m-%d %H:%M:%S}, đọc {elapsed:.0f} µs")
+    for name in TIME_FIELDS + FLAG_FIELDS + ("focus_end_time", "pomodoro_state", "pomodoro_end_time", "pomodoro_count"):
+        print(f"  {name:22} {getattr(state, name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,783 @@
+#!/usr/bin/env python3
+"""
+YouTube Bridge - HTTP server cho Chrome Extension
+=================================================
+Extension gửi trạng thái video (POST /youtube/state) về menubar app qua
+localhost:9876. HTTP/1.1 keep-alive, giới hạn số kết nối đồng thời và
+timeout mỗi request, để một tab chậm / kết nối treo không chặn các request
+khác.
+
+App phục vụ các endpoint này trên event loop của runtime.py; module này
+giữ state, route và handler dùng chung. create_server() /
+create_unix_server() (server đa luồng) chỉ còn cho bench_bridge.py so sánh.
+
+GET /youtube/state có version tăng dần: ETag / If-None-Match trả 304, và
+long-poll `?since=<version>&wait=<giây>` giữ request đến khi trạng thái đổi.
+
+POST /events/batch nhận một mảng event có kiểu (youtube_state, timer_reset,
+pomodoro...), kiểm tra hết rồi áp dụng một lần và trả lời một lần.
+
+GET /events là kênh Server-Sent Events: gửi snapshot đầy đủ lúc kết nối,
+sau đó chỉ đẩy các trường thay đổi (event "youtube" và "reminders"). Khi
+không có gì thay đổi thì không có dữ liệu nào đi qua, chỉ ping mỗi 15 giây.
+
+Ngoài TCP, cùng các endpoint này còn được phục vụ trên Unix domain socket
+`bridge.sock` trong thư mục config (xem bridge_client.py).
+"""
+
+import io
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from metrics import CONTENT_TYPE, HTTP_LATENCY, HTTP_REQUESTS, REGISTRY
+
+# HTTP port for Chrome extension communication
+YOUTUBE_HTTP_PORT = 9876
+
+# Unix domain socket cho công cụ local (cùng giao thức HTTP), trong thư mục config
+SOCKET_NAME = "bridge.sock"
+
+# Giới hạn server
+MAX_CONNECTIONS = 64        # số kết nối đồng thời
+REQUEST_TIMEOUT = 5.0       # giây chờ mỗi request (kể cả keep-alive rảnh)
+MAX_BODY_BYTES = 64 * 1024  # kích thước body tối đa
+
+BUSY_RESPONSE = (b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                 b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+
+# Dữ liệu cũ hơn N giây coi như không còn video
+STALE_AFTER = 5
+
+# Số tab YouTube tối đa được giữ (LRU)
+MAX_TABS = 32
+
+# POST /events/batch
+MAX_BATCH_EVENTS = 500
+
+# Route được đo riêng trong metrics (còn lại gộp vào "other")
+ROUTES = {'/youtube/state', '/youtube/tabs', '/events', '/events/batch', '/health', '/metrics'}
+
+# Long-poll GET /youtube/state?since=<version>&wait=<giây>
+MAX_LONG_POLL = 60.0
+
+# SSE
+SSE_KEEPALIVE = 15.0        # giây giữa hai lần ping khi không có sự kiện
+SSE_QUEUE_SIZE = 256        # client chậm đầy hàng đợi sẽ bị ngắt
+
+
+@dataclass(frozen=True)
+class YouTubeState:
+    """Trang thai YouTube tu Chrome Extension"""
+    title: str = ""
+    channel: str = ""
+    duration: float = 0
+    current_time: float = 0
+    is_playing: bool = False
+    volume: float = 1.0
+    is_muted: bool = False
+    url: str = ""
+    last_update: float = 0
+    tab_id: str = ""
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        return ((now or time.time()) - self.last_update) > STALE_AFTER
+
+    def to_dict(self) -> dict:
+        return {
+            'title': self.title,
+            'channel': self.channel,
+            'duration': self.duration,
+            'currentTime': self.current_time,
+            'isPlaying': self.is_playing,
+            'volume': self.volume,
+            'isMuted': self.is_muted,
+            'url': self.url,
+            'tabId': self.tab_id,
+            'lastUpdate': self.last_update,
+            'isStale': self.is_stale(),
+        }
+
+    @classmethod
+    def from_extension(cls, data: dict) -> "YouTubeState":
+        return cls(
+            title=data.get('title', ''),
+            channel=data.get('channel', ''),
+            duration=data.get('duration', 0),
+            current_time=data.get('currentTime', 0),
+            is_playing=data.get('isPlaying', False),
+            volume=data.get('volume', 1.0),
+            is_muted=data.get('isMuted', False),
+            url=data.get('url', ''),
+            last_update=time.time(),
+            tab_id=tab_key(data),
+        )
+
+
+def tab_key(data: dict) -> str:
+    """Khoá của tab: tabId từ extension, không có thì dùng URL video"""
+    tab_id = data.get('tabId')
+    if tab_id is not None:
+        return str(tab_id)
+    return data.get('url', '') or "default"
+
+
+# ============================================
+# EVENT HUB (SSE)
+# ============================================
+
+class EventHub:
+    """Pub/sub theo topic, chỉ phát các trường đã thay đổi"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, dict] = {}
+        self._subscribers: Set["queue.Queue"] = set()
+        self.published = 0
+
+    def publish(self, topic: str, data: dict) -> bool:
+        """Phát diff so với snapshot hiện tại; False nếu không có gì thay đổi"""
+        with self._lock:
+            snapshot = self._snapshots.setdefault(topic, {})
+            diff = {k: v for k, v in data.items() if k not in snapshot or snapshot[k] != v}
+            if not diff:
+                return False
+            snapshot.update(diff)
+            self.published += 1
+            for q in list(self._subscribers):
+                try:
+                    q.put_nowait((topic, diff))
+                except queue.Full:
+                    # Client không đọc kịp: ngắt, lần kết nối sau nhận snapshot mới
+                    self._subscribers.discard(q)
+                    q.put((None, None))
+            return True
+
+    def subscribe(self, q=None):
+        """Đăng ký nhận sự kiện: (hàng đợi, snapshot hiện tại của mọi topic).
+
+        q: hàng đợi riêng (cần put_nowait / put như queue.Queue), mặc định tạo mới.
+        """
+        if q is None:
+            q = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(q)
+            return q, {topic: dict(data) for topic, data in self._snapshots.items()}
+
+    def unsubscribe(self, q: "queue.Queue"):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+event_hub = EventHub()
+
+
+class YouTubeStateStore:
+    """Trạng thái YouTube dùng chung giữa thread HTTP và UI.
+
+    Mỗi lần nội dung thay đổi (kể cả chuyển sang isStale) thì version tăng;
+    JSON của version hiện tại được mã hoá một lần và dùng lại cho mọi GET.
+    """
+
+    def __init__(self, hub: EventHub = event_hub):
+        self._cond = threading.Condition()
+        self._state = YouTubeState()
+        self._public: dict = {}
+        self._hub = hub
+        self.version = 0
+        self._encoded: Optional[bytes] = None
+
+    def get(self) -> YouTubeState:
+        # YouTubeState bất biến: trả luôn tham chiếu, không cần lock / copy
+        return self._state
+
+    def update(self, state: YouTubeState):
+        public = self.public_dict(state)
+        with self._cond:
+            self._state = state
+            changed = public != self._public
+            if changed:
+                self._bump_locked(public)
+        if changed:
+            self._hub.publish("youtube", public)
+
+    def check_stale(self) -> float:
+        """Đánh dấu isStale khi dữ liệu hết hạn; trả về số giây đến lần hết hạn kế tiếp"""
+        with self._cond:
+            last_update = self._state.last_update
+            if not last_update:
+                return SSE_KEEPALIVE
+            remaining = last_update + STALE_AFTER - time.time()
+            if remaining >= 0:
+                return max(0.1, remaining + 0.05)
+            if self._public.get('isStale'):
+                return SSE_KEEPALIVE
+            self._bump_locked(dict(self._public, isStale=True))
+        self._hub.publish("youtube", {"isStale": True})
+        return SSE_KEEPALIVE
+
+    def _bump_locked(self, public: dict):
+        self._public = public
+        self.version += 1
+        self._encoded = None
+        self._cond.notify_all()
+
+    def snapshot(self) -> Tuple[int, bytes]:
+        """(version, JSON đã mã hoá) của trạng thái hiện tại"""
+        with self._cond:
+            if self._encoded is None:
+                data = dict(self._public or self.public_dict(self._state),
+                            lastUpdate=self._state.last_update, version=self.version)
+                self._encoded = json.dumps(data).encode()
+            return self.version, self._encoded
+
+    def wait_for_change(self, since: int, timeout: float) -> int:
+        """Long-poll: chờ đến khi version khác since (hoặc hết timeout)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            # Thức dậy đúng lúc dữ liệu hết hạn để báo isStale
+            stale_in = self.check_stale()
+            with self._cond:
+                remaining = deadline - time.monotonic()
+                if self.version != since or remaining <= 0:
+                    return self.version
+                self._cond.wait(min(remaining, stale_in))
+
+    @staticmethod
+    def public_dict(state: YouTubeState) -> dict:
+        # lastUpdate đổi mỗi lần POST: không tính là thay đổi để trạng thái đứng yên không sinh sự kiện
+        data = state.to_dict()
+        del data['lastUpdate']
+        return data
+
+
+# Global YouTube state
+youtube_state = YouTubeStateStore()
+
+
+class YouTubeTabStore:
+    """Trạng thái theo từng tab, chọn một tab "active" để hiển thị.
+
+    OrderedDict theo thời gian cập nhật vừa là LRU vừa là chỉ mục thời gian:
+    tab cũ nhất luôn ở đầu nên hết hạn / loại bớt là O(1) mỗi tab. Tab đang
+    phát được giữ thêm trong một OrderedDict riêng để chọn active không cần
+    duyệt. Chính sách: tab đang phát cập nhật gần nhất, không có thì tab cập
+    nhật gần nhất. Tab active được ghi vào youtube_state (version, SSE...).
+    """
+
+    def __init__(self, state: YouTubeStateStore = youtube_state, max_tabs: int = MAX_TABS):
+        self._lock = threading.Lock()
+        self._tabs: "OrderedDict[str, YouTubeState]" = OrderedDict()
+        self._playing: "OrderedDict[str, None]" = OrderedDict()
+        self._active: Optional[str] = None
+        self._state = state
+        self.max_tabs = max_tabs
+        self.evicted = 0
+        self.expired = 0
+
+    def post(self, data: dict):
+        """Nhận POST /youtube/state từ extension"""
+        if data.get('closed'):
+            self.remove(tab_key(data))
+        else:
+            self.update(YouTubeState.from_extension(data))
+
+    def update(self, state: YouTubeState):
+        key = state.tab_id
+        with self._lock:
+            self._tabs[key] = state
+            self._tabs.move_to_end(key)
+            if state.is_playing:
+                self._playing[key] = None
+                self._playing.move_to_end(key)
+            else:
+                self._playing.pop(key, None)
+            while len(self._tabs) > self.max_tabs:
+                self._drop_locked(next(iter(self._tabs)))
+                self.evicted += 1
+            self._expire_locked(state.last_update)
+            self._select_locked()
+
+    def remove(self, key: str):
+        with self._lock:
+            if key in self._tabs:
+                self._drop_locked(key)
+                self._select_locked()
+
+    def expire(self, now: Optional[float] = None):
+        """Bỏ các tab không cập nhật quá STALE_AFTER giây"""
+        with self._lock:
+            if self._expire_locked(now or time.time()):
+                self._select_locked()
+
+    def active(self) -> YouTubeState:
+        """Trạng thái của tab active (cho menu)"""
+        self.expire()
+        return self._state.get()
+
+    def tabs(self) -> list:
+        with self._lock:
+            return [dict(state.to_dict(), active=key == self._active)
+                    for key, state in reversed(self._tabs.items())]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tabs)
+
+    def _drop_locked(self, key: str):
+        del self._tabs[key]
+        self._playing.pop(key, None)
+
+    def _expire_locked(self, now: float) -> bool:
+        dropped = False
+        while self._tabs:
+            key, state = next(iter(self._tabs.items()))
+            if not state.is_stale(now):
+                break
+            self._drop_locked(key)
+            self.expired += 1
+            dropped = True
+        return dropped
+
+    def _select_locked(self):
+        if self._playing:
+            key = next(reversed(self._playing))
+        elif self._tabs:
+            key = next(reversed(self._tabs))
+        else:
+            # Không còn tab: giữ trạng thái cuối, tự chuyển isStale
+            self._active = None
+            return
+        self._active = key
+        self._state.update(self._tabs[key])
+
+
+youtube_tabs = YouTubeTabStore()
+
+
+def publish_reminders(data: dict) -> bool:
+    """Đẩy trạng thái nhắc nhở (status, số phút còn lại...) cho client SSE"""
+    return event_hub.publish("reminders", data)
+
+
+# ============================================
+# BATCH EVENTS
+# ============================================
+
+class BatchError(ValueError):
+    """Batch không hợp lệ, không event nào được áp dụng"""
+
+
+# type -> (các trường bắt buộc, hàm kiểm tra, handler). youtube_state có sẵn;
+# menubar đăng ký thêm timer_reset, pomodoro...
+_event_handlers: Dict[str, Tuple[Tuple[str, ...], Optional[Callable[[dict], None]], Callable[[dict], None]]] = {}
+_batch_lock = threading.Lock()
+
+
+def register_event_handler(event_type: str, handler: Callable[[dict], None],
+                           required: Tuple[str, ...] = (),
+                           validate: Optional[Callable[[dict], None]] = None):
+    """Đăng ký xử lý một loại event trong POST /events/batch.
+
+    validate(event) raise BatchError nếu event sai; được gọi cho cả batch
+    trước khi áp dụng bất kỳ event nào.
+    """
+    _event_handlers[event_type] = (required, validate, handler)
+
+
+def apply_batch(events: list) -> dict:
+    """Kiểm tra toàn bộ batch rồi áp dụng một lần (tất cả hoặc không gì cả).
+
+    Nhiều youtube_state của cùng một tab chỉ áp dụng bản cuối.
+    """
+    if not isinstance(events, list):
+        raise BatchError("events must be a list")
+    if len(events) > MAX_BATCH_EVENTS:
+        raise BatchError(f"too many events (max {MAX_BATCH_EVENTS})")
+    for i, event in enumerate(events):
+        if not isinstance(event, dict):
+            raise BatchError(f"event {i}: not an object")
+        entry = _event_handlers.get(event.get('type'))
+        if entry is None:
+            raise BatchError(f"event {i}: unknown type {event.get('type')!r}")
+        required, validate, _ = entry
+        missing = [name for name in required if name not in event]
+        if missing:
+            raise BatchError(f"event {i}: missing {', '.join(missing)}")
+        if validate is not None:
+            try:
+                validate(event)
+            except BatchError as e:
+                raise BatchError(f"event {i}: {e}")
+
+    # Chỉ giữ bản cuối của mỗi tab (vẫn theo thứ tự xuất hiện cuối)
+    latest: Dict[str, int] = {}
+    for i, event in enumerate(events):
+        if event['type'] == 'youtube_state':
+            latest[tab_key(event)] = i
+    keep = set(latest.values())
+
+    applied = 0
+    with _batch_lock:
+        for i, event in enumerate(events):
+            if event['type'] == 'youtube_state' and i not in keep:
+                continue
+            _event_handlers[event['type']][2](event)
+            applied += 1
+    return {'success': True, 'received': len(events), 'applied': applied}
+
+
+register_event_handler('youtube_state', youtube_tabs.post)
+
+
+# ============================================
+# HTTP HANDLER
+# ============================================
+
+class YouTubeHTTPHandler(BaseHTTPRequestHandler):
+    """HTTP handler for Chrome Extension communication"""
+
+    protocol_version = "HTTP/1.1"   # keep-alive
+    timeout = REQUEST_TIMEOUT       # socket timeout cho mỗi lần đọc
+    disable_nagle_algorithm = True  # header + body nhỏ: tránh trễ 40ms do delayed ACK
+    long_poll = True                # False: caller đã tự chờ (runtime asyncio)
+
+    def log_message(self, format, *args):
+        pass  # Suppress logging
+
+    def send_cors_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match')
+        self.send_header('Access-Control-Expose-Headers', 'ETag, X-State-Version')
+
+    def send_json(self, status: int, data: Optional[dict] = None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_cors_headers()
+        if data is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            # Không đọc body: đóng kết nối sau khi trả lời
+            self.close_connection = True
+            raise ValueError("body too large")
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight"""
+        self.send_json(200)
+
+    def send_response(self, code, message=None):
+        self.status_code = code
+        super().send_response(code, message)
+
+    def timed_request(self, method: str, handler: Callable[[], None]):
+        """Chạy handler, ghi độ trễ theo route (không tính luồng SSE /events)"""
+        route = urlsplit(self.path).path
+        if route not in ROUTES:
+            route = 'other'
+        self.status_code = 0
+        started = time.perf_counter()
+        try:
+            handler()
+        finally:
+            if route != '/events':
+                HTTP_LATENCY.observe(time.perf_counter() - started, (route, method))
+            HTTP_REQUESTS.inc((route, self.status_code))
+
+    def do_POST(self):
+        self.timed_request('POST', self.handle_post)
+
+    def do_GET(self):
+        self.timed_request('GET', self.handle_get)
+
+    def handle_post(self):
+        """Handle POST requests from extension"""
+        if self.path == '/youtube/state':
+            try:
+                with _batch_lock:
+                    youtube_tabs.post(self.read_json())
+                self.send_json(200, {'success': True})
+            except Exception as e:
+                self.send_json(400, {'error': str(e)})
+        elif self.path == '/events/batch':
+            try:
+                data = self.read_json()
+                events = data.get('events') if isinstance(data, dict) else data
+                self.send_json(200, apply_batch(events))
+            except ValueError as e:
+                self.send_json(400, {'error': str(e)})
+            except Exception as e:
+                self.send_json(500, {'error': str(e)})
+        else:
+            self.close_connection = True
+            self.send_json(404)
+
+    def handle_get(self):
+        """Handle GET requests"""
+        url = urlsplit(self.path)
+        if url.path == '/youtube/state':
+            self.send_youtube_state(parse_qs(url.query))
+        elif self.path == '/youtube/tabs':
+            self.send_json(200, {'tabs': youtube_tabs.tabs()})
+        elif self.path == '/events':
+            self.stream_events()
+        elif self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            self.send_metrics()
+        else:
+            self.send_json(404)
+
+    def send_metrics(self):
+        """GET /metrics: định dạng text Prometheus"""
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_youtube_state(self, query: dict):
+        """GET /youtube/state: ETag / If-None-Match → 304, long-poll ?since=&wait="""
+        youtube_tabs.expire()
+        youtube_state.check_stale()
+        try:
+            since = int(query['since'][0]) if 'since' in query else None
+            wait = min(float(query['wait'][0]), MAX_LONG_POLL) if 'wait' in query else 0.0
+        except ValueError:
+            self.send_json(400, {'error': 'invalid since/wait'})
+            return
+        if since is not None and wait > 0 and self.long_poll:
+            youtube_state.wait_for_change(since, wait)
+
+        version, body = youtube_state.snapshot()
+        etag = f'"v{version}"'
+        not_modified = (self.headers.get('If-None-Match') == etag
+                        or (since is not None and since == version))
+        self.send_response(304 if not_modified else 200)
+        self.send_cors_headers()
+        self.send_header('ETag', etag)
+        self.send_header('X-State-Version', str(version))
+        self.send_header('Cache-Control', 'no-cache')
+        if not_modified:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self):
+        """Server-Sent Events: snapshot rồi diff, giữ kết nối đến khi client đóng"""
+        q, snapshots = event_hub.subscribe()
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_cors_headers()
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for topic, data in snapshots.items():
+                self.write_event(topic, data)
+
+            last_write = time.monotonic()
+            while True:
+                # Thức dậy khi có sự kiện, khi video sắp hết hạn, hoặc để ping
+                idle = time.monotonic() - last_write
+                timeout = min(SSE_KEEPALIVE - idle, youtube_state.check_stale())
+                try:
+                    topic, data = q.get(timeout=max(timeout, 0.1))
+                except queue.Empty:
+                    if time.monotonic() - last_write >= SSE_KEEPALIVE:
+                        self.wfile.write(b": ping\n\n")
+                        last_write = time.monotonic()
+                    continue
+                if topic is None:
+                    break
+                self.write_event(topic, data)
+                last_write = time.monotonic()
+        except OSError:
+            pass  # client đã đóng
+        finally:
+            event_hub.unsubscribe(q)
+
+    def write_event(self, topic: str, data: dict):
+        self.wfile.write(f"event: {topic}\ndata: {json.dumps(data)}\n\n".encode())
+
+
+# ============================================
+# SERVER
+# ============================================
+
+BRIDGE_REJECTED = REGISTRY.counter(
+    "whr_bridge_rejected_connections_total", "Số kết nối bị từ chối (503) do quá giới hạn")
+
+
+def bridge_gauges() -> list:
+    """Gauge của bridge tính lúc scrape"""
+    return [
+        "# TYPE whr_sse_subscribers gauge",
+        f"whr_sse_subscribers {event_hub.subscriber_count()}",
+        "# TYPE whr_youtube_tabs gauge",
+        f"whr_youtube_tabs {len(youtube_tabs)}",
+        "# TYPE whr_youtube_state_version gauge",
+        f"whr_youtube_state_version {youtube_state.snapshot()[0]}",
+    ]
+
+
+REGISTRY.add_collector(bridge_gauges)
+
+
+class ConnectionLimitMixin:
+    """Giới hạn số kết nối đồng thời cho server đa luồng"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def _init_limits(self, max_connections: int):
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.rejected = 0
+
+    def process_request(self, request, client_address):
+        # Quá giới hạn: trả 503 và đóng ngay thay vì để kết nối chờ chiếm thread
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            BRIDGE_REJECTED.inc()
+            try:
+                request.sendall(BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+    def handle_error(self, request, client_address):
+        pass  # Kết nối timeout / bị đóng giữa chừng: bỏ qua
+
+
+class BridgeHTTPServer(ConnectionLimitMixin, ThreadingHTTPServer):
+    """ThreadingHTTPServer có giới hạn số kết nối đồng thời"""
+
+    def __init__(self, address, handler=YouTubeHTTPHandler, max_connections: int = MAX_CONNECTIONS):
+        self._init_limits(max_connections)
+        super().__init__(address, handler)
+
+
+class BufferedHTTPHandler(YouTubeHTTPHandler):
+    """Xử lý một request đã đọc sẵn trong bộ nhớ (cho server asyncio).
+
+    Không đụng tới socket: đọc từ raw, ghi câu trả lời vào self.response.
+    Không chờ long-poll (runtime đã chờ trước khi gọi).
+    """
+
+    long_poll = False
+
+    def __init__(self, raw: bytes, client_address=("local", 0)):
+        self.rfile = io.BytesIO(raw)
+        self.wfile = io.BytesIO()
+        self.client_address = client_address
+        self.close_connection = True
+        self.handle_one_request()
+        self.response = self.wfile.getvalue()
+
+
+class UnixYouTubeHTTPHandler(YouTubeHTTPHandler):
+    """Cùng giao thức HTTP, trên Unix domain socket"""
+
+    disable_nagle_algorithm = False  # không có TCP_NODELAY trên AF_UNIX
+
+    def address_string(self):
+        return "unix"
+
+
+class UnixBridgeServer(ConnectionLimitMixin, socketserver.ThreadingUnixStreamServer):
+    """Bridge trên Unix domain socket (không chiếm port, không qua TCP loopback)"""
+
+    def __init__(self, path: str, handler=UnixYouTubeHTTPHandler, max_connections: int = MAX_CONNECTIONS):
+        self._init_limits(max_connections)
+        self.path = path
+        super().__init__(path, handler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def default_socket_path() -> Path:
+    """Socket nằm cạnh settings.json trong thư mục config của app"""
+    return Path.home() / "Library" / "Application Support" / "WorkHealthReminder" / SOCKET_NAME
+
+
+def socket_in_use(path: Path) -> bool:
+    """Có process khác đang nghe trên socket này không"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(0.5)
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def create_server(host: str = 'localhost', port: int = YOUTUBE_HTTP_PORT,
+                  max_connections: int = MAX_CONNECTIONS) -> BridgeHTTPServer:
+    """Server HTTP đa luồng (chỉ dùng trong bench_bridge.py, app chạy trên runtime.py)"""
+    return BridgeHTTPServer((host, port), max_connections=max_connections)
+
+
+def create_unix_server(path: Optional[Path] = None,
+                       max_connections: int = MAX_CONNECTIONS) -> UnixBridgeServer:
+    """Tạo server Unix socket; dọn file socket cũ nếu không còn ai nghe"""
+    path = prepare_socket_path(path)
+    return UnixBridgeServer(str(path), max_connections=max_connections)
+
+
+def prepare_socket_path(path: Optional[Path] = None) -> Path:
+    """Tạo thư mục và bỏ file socket cũ; lỗi nếu một instance khác đang nghe"""
+    path = Path(path or default_socket_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if socket_in_use(path):
+            raise OSError(f"another instance is listening on {path}")
+        path.unlink()
+    return path